@@ -22,192 +22,147 @@
 # 3. get probability of occurence of each number on a particular day of the month 
 # 4. get probability of occurence of each number on a particular day of the week 
 
-import json
+import numpy as np
 import pandas as pd
-from collections import Counter
 from datetime import datetime, timedelta
-from tabulate import tabulate
+from functools import partial
 
-import requests
-from bs4 import BeautifulSoup
-import re
+from aggregates import aggregates_of
+from cooccurrence import cooccurrence_of
+from draw_store import LUNCHTIME, TEATIME, append_draws, date_to_day, load_draws
+from incidence import DOW_NAMES, incidence_of
+from scraper import scrape_since
+from signals import DEFAULT_SIGNALS, SignalEngine, combine_votes, signal_groups
+from stages import run_stages, stage
+from windows import window_index
 
 def load_lottery_data(file_path):
-    with open(file_path, "r") as f:
-        return json.load(f)
+    return load_draws(file_path)
 
-# Process data into a DataFrame
+# Process data into a draw x number incidence matrix
 def process_data(lottery_data):
-    records = []
-    for entry in lottery_data:
-        date_obj = datetime.strptime(entry["date"], "%Y-%m-%d")
-        for num in entry["numbers"]:
-            records.append({
-                "date": entry["date"],
-                "time": entry["time"],
-                "dom": date_obj.day,
-                "dow": date_obj.strftime("%A"),
-                "number": num
-            })
-    return pd.DataFrame(records)
-
-# Compute number frequency and ranking
-def number_frequency(df):
-    freq = Counter(df["number"])
-    sorted_freq = sorted(freq.items(), key=lambda x: x[1], reverse=True)
-    total_draws = len(df) / 7  # Since each draw has 7 numbers
-    probability = {num: round(count / total_draws, 3) for num, count in freq.items()}
+    return incidence_of(lottery_data)
+
+# Compute number frequency and ranking from per-number counts (index 0 = ball 1)
+def number_frequency(freq):
+    drawn = np.flatnonzero(freq)
+    ranked = drawn[np.argsort(-freq[drawn], kind="stable")]
+    sorted_freq = [(int(n) + 1, int(freq[n])) for n in ranked]
+    total_draws = freq.sum() / 7  # Since each draw has 7 numbers
+    probability = {int(n) + 1: round(freq[n] / total_draws, 3) for n in drawn}
     return sorted_freq, probability
 
+def _probability_per_group(grouped, labels):
+    total_per_day = grouped.sum(axis=1)
+    seen_days = np.flatnonzero(total_per_day)
+    seen_numbers = np.flatnonzero(grouped.sum(axis=0))
+    prob = (grouped[seen_days] / total_per_day[seen_days, None]).round(3)
+    return pd.DataFrame(
+        prob[:, seen_numbers].T,
+        index=pd.Index(seen_numbers + 1, name="number"),
+        columns=pd.Index([labels[d] for d in seen_days]),
+    )
+
 # Probability per day of the month
-def probability_per_day_of_month(df):
-    grouped = df.groupby(["dom", "number"]).size().unstack(fill_value=0)
-    total_per_day = df.groupby("dom").size()
-    prob_df = (grouped.div(total_per_day, axis=0)).fillna(0).round(3)
-    return prob_df.T
+def probability_per_day_of_month(incidence):
+    return _probability_per_group(incidence.dom_counts(), range(32))
 
 # Probability per day of the week
-def probability_per_day_of_week(df):
-    grouped = df.groupby(["dow", "number"]).size().unstack(fill_value=0)
-    total_per_day = df.groupby("dow").size()
-    prob_df = (grouped.div(total_per_day, axis=0)).fillna(0).round(3)
-    return prob_df.T
-
-def yester_check(generated_number_frequencies, play_numbers):
-    result = []
-    
-    # Iterate over each play number
-    for play_number in play_numbers:
-        frequency = 0
-        description = []
-        
-        # print(generated_number_frequencies)
-        for record in generated_number_frequencies:
-            # print(record['probability'])
-            if record['number'] == play_number:
-                frequency += 1
-                description.append(record['coming_from'])
-        
-        # Append the result for the current play_number
-        result.append({
-            "number": play_number,
-            "frequency": frequency,
-            "description": description
-        })
-    
-    return result
-
-def top_numbers(number_frequencies):
-    numbers = [entry["number"] for entry in number_frequencies]
-    number_counts = Counter(numbers)
-    top_3_numbers = number_counts.most_common(7)
-    return top_3_numbers
-
-def top_3_numbers_with_play_number(lottery_data, play_number):
-    co_occurring_numbers = []
-
-    # Step 1: Loop through dataset to find play_number occurrences
-    for draw in lottery_data:
-        numbers = draw["numbers"]
-        if play_number in numbers:
-            # Step 2: Add all other numbers in the same draw
-            co_occurring_numbers.extend([num for num in numbers if num != play_number])
-
-    # Step 3: Count occurrences of co-occurring numbers
-    number_counts = Counter(co_occurring_numbers)
+def probability_per_day_of_week(incidence):
+    return _probability_per_group(incidence.dow_counts(), DOW_NAMES)
 
-    # Step 4: Get the top 3 numbers played alongside play_number
-    top_3 = number_counts.most_common(3)
-
-    return top_3
-
-
-def scrap_link(url, last_day, time):
-    response = requests.get(url)
-    results = []
-    if response.status_code == 200:
-        soup = BeautifulSoup(response.text, "html.parser")
-        rows = soup.find_all("tr")
-        
-        
-        for row in rows:
-            columns = row.find_all("td")
-
-            if len(columns) > 1:
-                date_str = columns[0].text.strip()
-                try:
-                    date_str = " ".join(date_str.split(" ")[1:])  # Removes "Thursday"
-                    date_str = re.sub(r"(\d+)(st|nd|rd|th)", r"\1", date_str)  # Converts "26th" → "26"
-                    
-                    date_obj = datetime.strptime(date_str, "%d %B %Y")
-                    formatted_date = date_obj.strftime("%Y-%m-%d")  # Convert to YYYY-MM-DD
-                    
-                except ValueError:
-                    print('Invalid date', columns[0].text)
-                    continue  # Skip rows with invalid dates
-                
-                try:
-                    numbers = [int(num.text.strip()) for num in columns[1].find_all("li")]
-                except ValueError:
-                    print('Invalid value skipped')
-                    continue
-                # print('about to compare')
-                if (datetime.strptime(formatted_date, "%Y-%m-%d").date() >= last_day):
-                    # print('comp done')
-                    draw_data = {
-                        "date": formatted_date,
-                        "time": time,
-                        "numbers": numbers
-                    }
-                    results.append(draw_data)
-    return results
-
-
-
-def update_dataset(data):
-    first_record = data[0]
-    play_time = 0
+# How many signals voted for each play number, and which ones
+def yester_check(votes, play_numbers):
+    hits = votes.hits([play_numbers])[0]
+    fired = votes.fired_by_number([play_numbers])[0]
+    return [
+        {"number": number, "frequency": hits[i].item(), "description": [votes.names[s] for s in np.flatnonzero(fired[i])]}
+        for i, number in enumerate(play_numbers)
+    ]
 
-    day_today = datetime.today().date()
-    last_recorded_day = datetime.strptime(first_record['date'], "%Y-%m-%d").date()
+def top_numbers(votes, k=7):
+    return votes.top(k)
 
-    if (first_record['time'] == 'lunchtime'):
-        play_time = 1
-    elif (first_record['time'] == 'teatime'):
-        play_time = 0 
+def scrape_new_draws(latest):
+    # the draw after `latest` (the newest one we have) is where the scrape starts
+    last_recorded_day = datetime.strptime(latest['date'], "%Y-%m-%d").date()
+    if latest['time'] == 'teatime':
         last_recorded_day = last_recorded_day + timedelta(days=1)
 
-    all_results = []
-
-    url = "https://za.lottonumbers.com/"
-    url = url+"uk-49s-lunchtime/results/2025"
-    get_lunchtime_data = scrap_link(url, last_recorded_day, 'lunchtime')
-    all_results.extend(
-        get_lunchtime_data,
-    )
+    # lunchtime and teatime pages of every year since then, fetched together
+    return scrape_since(last_recorded_day)
 
+# Stages of the daily run. Each worker reopens the memory-mapped store, so
+# the history is shared read-only rather than pickled into every process.
 
-    url = "https://za.lottonumbers.com/"
-    url = url+"uk-49s-teatime/results/2025"
-    get_teatime_data = scrap_link(url, last_recorded_day, 'teatime')
-    all_results.extend(
-        get_teatime_data,
-    )
+def warm_tables(file_path):
+    # bring the persisted aggregate and window tables up to date with the
+    # store; later stages then only read them
+    draws = load_lottery_data(file_path)
+    aggregates_of(draws)
+    window_index(draws)
+    return len(draws)
 
-    # extend original json data 
-    all_results.extend(
-        data,
-    )
-    
-    all_results.sort(
-        key=lambda x: (datetime.strptime(x["date"], "%Y-%m-%d"), 1 if x["time"] == "teatime" else 0), 
-        reverse=True  # Sort by date descending, then time descending
-    )
+def evaluate_signal_group(file_path, today, dom, dow, signals):
+    return SignalEngine(load_lottery_data(file_path), today, dom, dow).evaluate(signals)
 
-    with open("merged_uk_49s_results.json", "w") as output_file:
-        json.dump(all_results, output_file, indent=4)
+def pairs_of(file_path):
+    return cooccurrence_of(load_lottery_data(file_path))
 
+# Each sample of one statistic, numbers in the order the sample lists them
+def print_samples(votes, statistic):
+    samples = {}
+    for record in votes.select(lambda signal: signal.statistic == statistic).records():
+        samples.setdefault(record["coming_from"], []).append(f"{record['number']} ({record['probability']})")
+    for name, picks in samples.items():
+        print(f"{name}: {', '.join(picks)}")
 
+def print_suggestions(votes, pairs):
+    # the analysis sections, scored by the signal stages
+    print("\n############################################Number Frequency Ranking########################################")
+    print_samples(votes, "frequency")
+    print("\n########################################################Probability of Occurrence per Day of the Month#########################")
+    print_samples(votes, "dom")
+    print("\n###################################################Probability of Occurrence per Day of the Week#######################")
+    print_samples(votes, "dow")
+
+    # a draw time's suggestion uses the all-draws signals plus its own
+    for label, time in (('lunchtime', LUNCHTIME), ('\n\nteatime', TEATIME)):
+        # Using number combinations.
+        # goal is to get a definite number and find combinations we can put to it
+        play_suggestion = top_numbers(votes.for_time(time))
+
+        # the 3 numbers drawn most often alongside each suggestion, all at once
+        # from the 49x49 co-occurrence counts
+        print(label)
+        play_numbers = [record[0] for record in play_suggestion]
+        for play_number, top_3 in zip(play_numbers, pairs.partners(play_numbers, 3)[0].tolist()):
+            for one in top_3:
+                print(play_number, one)
+
+def daily_stages(file_path, today, dom, dow, signals=DEFAULT_SIGNALS):
+    """The daily run as a stage graph: the scrape overlaps warming the tables
+    on the history we already have, and after the new draws are appended the
+    signal groups and co-occurrence counts run side by side."""
+    groups = signal_groups(signals)
+    group_names = ["signals-%s-%s" % ("all" if group[0].window is None else "last%d" % group[0].window, group[0].statistic)
+                   for group in groups]
+    return [
+        stage("load", lambda: load_lottery_data(file_path)[-1], kind="main"),
+        stage("scrape", scrape_new_draws, deps=["load"], kind="io"),
+        stage("warm", partial(warm_tables, file_path), after=["load"]),
+        # journal only the draws we don't have yet; the merged JSON is
+        # rewritten only when the journal gets compacted
+        stage("update", partial(append_draws, file_path), deps=["scrape"], kind="io", after=["warm"]),
+        stage("refresh", partial(warm_tables, file_path), after=["update"]),
+    ] + [
+        stage(name, partial(evaluate_signal_group, file_path, today, dom, dow, group), after=["refresh"])
+        for name, group in zip(group_names, groups)
+    ] + [
+        stage("pairs", partial(pairs_of, file_path), after=["refresh"]),
+        stage("votes", lambda *parts: combine_votes(parts, signals), deps=group_names, kind="main"),
+        stage("suggest", print_suggestions, deps=["votes", "pairs"], kind="main"),
+    ]
 
 
 if __name__ == "__main__":
@@ -215,502 +170,27 @@ if __name__ == "__main__":
     today_dow = 'Monday'
     # Using number frequencies 
     file_path = "merged_uk_49s_results.json"
-    lottery_data = load_lottery_data(file_path)
-
-    update_dataset(lottery_data)
-    
 
     # yester play results 
     play_lunchtime_numbers = [1, 2, 4, 7, 8, 9, 12]
     play_teatime_numbers = [1,2,15,31,42,46,48]
     
-    full_dataset_df = process_data(lottery_data)
-
-    full_lunchtime_df = full_dataset_df[full_dataset_df["time"] == "lunchtime"]
-    full_teatime_df = full_dataset_df[full_dataset_df["time"] == "teatime"]
-
-    full_dataset_df["date"] = pd.to_datetime(full_dataset_df["date"])
-    full_lunchtime_df["date"] = pd.to_datetime(full_lunchtime_df["date"])
-    full_teatime_df["date"] = pd.to_datetime(full_teatime_df["date"])
-
-    cutoff_date = datetime.today() - timedelta(days=49)
-
-    last49_dataset_df = full_dataset_df[full_dataset_df["date"] >= cutoff_date]
-    last49_lunchtime_df = full_lunchtime_df[full_lunchtime_df["date"] >= cutoff_date]
-    last49_teatime_df = full_teatime_df[full_teatime_df["date"] >= cutoff_date]
-   
-    
-    print("\n############################################Number Frequency Ranking########################################")
-    sorted_freq, probability = number_frequency(full_dataset_df)
-    # for rank, (num, count) in enumerate(sorted_freq, 1):
-    #     print(f"{rank}. Number {num} - {count} times (Probability: {probability[num]})")
-    
-    top_6_numbers = sorted_freq[:6] 
-    all_top_sample = [{"number": num, "probability": probability[num], "coming_from": "all_top_sample"} for num, count in top_6_numbers]
-
-    bottom_6_numbers = sorted_freq[-6:]
-    all_bottom_sample = [{"number": num, "probability": probability[num], "coming_from": "all_bottom_sample"} for num, count in bottom_6_numbers]
-
-    # print('all top sample', all_top_sample)
-    # print('all bottom sample', all_bottom_sample)
-
-    sorted_freq, probability = number_frequency(full_lunchtime_df)
-    top_6_numbers = sorted_freq[:6] 
-    all_top_lunchtime_sample = [{"number": num, "probability": probability[num], "coming_from": "all_top_lunchtime_sample"} for num, count in top_6_numbers]
-
-    bottom_6_numbers = sorted_freq[-6:]
-    all_bottom_lunchtime_sample = [{"number": num, "probability": probability[num], "coming_from": "all_bottom_lunchtime_sample"} for num, count in bottom_6_numbers]
-
-    # print('all top lunchtime sample', all_top_lunchtime_sample)
-    # print('all bottom lunchtime sample', all_bottom_lunchtime_sample) 
-
-    sorted_freq, probability = number_frequency(full_teatime_df)
-    top_6_numbers = sorted_freq[:6] 
-    all_top_teatime_sample = [{"number": num, "probability": probability[num], "coming_from": "all_top_teatime_sample"} for num, count in top_6_numbers]
-
-    bottom_6_numbers = sorted_freq[-6:]
-    all_bottom_teatime_sample = [{"number": num, "probability": probability[num], "coming_from": "all_bottom_teatime_sample"} for num, count in bottom_6_numbers]
-
-    # print('all top teatime sample', all_top_teatime_sample)
-    # print('all bottom teatime sample', all_bottom_teatime_sample)
-
-
-
-    sorted_freq, probability = number_frequency(last49_dataset_df)
-    
-    top_6_numbers = sorted_freq[:6] 
-    last49_top_sample = [{"number": num, "probability": probability[num], "coming_from": "last49_top_sample"} for num, count in top_6_numbers]
-
-    bottom_6_numbers = sorted_freq[-6:]
-    last49_bottom_sample = [{"number": num, "probability": probability[num], "coming_from": "last49_bottom_sample"} for num, count in bottom_6_numbers]
-
-    sorted_freq, probability = number_frequency(last49_lunchtime_df)
-    top_6_numbers = sorted_freq[:6] 
-    last49_top_lunchtime_sample = [{"number": num, "probability": probability[num], "coming_from": "last49_top_lunchtime_sample"} for num, count in top_6_numbers]
-
-    bottom_6_numbers = sorted_freq[-6:]
-    last49_bottom_lunchtime_sample = [{"number": num, "probability": probability[num], "coming_from": "last49_bottom_lunchtime_sample"} for num, count in bottom_6_numbers]
-
-    sorted_freq, probability = number_frequency(last49_teatime_df)
-    top_6_numbers = sorted_freq[:6] 
-    last49_top_teatime_sample = [{"number": num, "probability": probability[num], "coming_from": "last49_top_teatime_sample"} for num, count in top_6_numbers]
-
-    bottom_6_numbers = sorted_freq[-6:]
-    last49_bottom_teatime_sample = [{"number": num, "probability": probability[num], "coming_from": "last49_bottom_teatime_sample"} for num, count in bottom_6_numbers]
-
-    
-    
-    print("\n########################################################Probability of Occurrence per Day of the Month#########################")
-    prob_dom = probability_per_day_of_month(full_dataset_df)
-    # print(prob_dom.columns)
-
-    today_prob = prob_dom[[today_dom]]
-    top_6_numbers = today_prob.sort_values(by=today_dom, ascending=False).head(6)
-    # print(top_6_numbers)
-    
-    # date_top_sample = [{"number": ?value1, "probability": ?value1, "coming_from": "date_top_sample"} for num, count in top_6_numbers]
-    all_date_top_sample = [
-        {"number": num, "probability": top_6_numbers[today_dom].loc[num], "coming_from": "all_date_top_sample"}
-        for num in top_6_numbers.index
-    ]
-    # print(date_top_sample)
-
-    # Sort the probabilities in ascending order for bottom probabilities
-    bottom_6_numbers = today_prob.sort_values(by=today_dom, ascending=True).head(6)
-    all_date_bottom_sample = [
-        {"number": num, "probability": bottom_6_numbers[today_dom].loc[num], "coming_from": "all_date_bottom_sample"}
-        for num in bottom_6_numbers.index
-    ] 
-
-
-
-    prob_dom = probability_per_day_of_month(full_lunchtime_df)
-    # print(prob_dom.columns)
-
-    today_prob = prob_dom[[today_dom]]
-    top_6_numbers = today_prob.sort_values(by=today_dom, ascending=False).head(6)
-    # print(top_6_numbers)
-    
-    # date_top_sample = [{"number": ?value1, "probability": ?value1, "coming_from": "date_top_sample"} for num, count in top_6_numbers]
-    all_date_top_lunchtime_sample = [
-        {"number": num, "probability": top_6_numbers[today_dom].loc[num], "coming_from": "all_date_top_lunchtime_sample"}
-        for num in top_6_numbers.index
-    ]
-    # print(date_top_sample)
-
-    # Sort the probabilities in ascending order for bottom probabilities
-    bottom_6_numbers = today_prob.sort_values(by=today_dom, ascending=True).head(6)
-    all_date_bottom_lunchtime_sample = [
-        {"number": num, "probability": bottom_6_numbers[today_dom].loc[num], "coming_from": "all_date_bottom_lunchtime_sample"}
-        for num in bottom_6_numbers.index
-    ] 
-
-
-
-    prob_dom = probability_per_day_of_month(full_teatime_df)
-    # print(prob_dom.columns)
-
-    today_prob = prob_dom[[today_dom]]
-    top_6_numbers = today_prob.sort_values(by=today_dom, ascending=False).head(6)
-    # print(top_6_numbers)
-    
-    # date_top_sample = [{"number": ?value1, "probability": ?value1, "coming_from": "date_top_sample"} for num, count in top_6_numbers]
-    all_date_top_teatime_sample = [
-        {"number": num, "probability": top_6_numbers[today_dom].loc[num], "coming_from": "all_date_top_teatime_sample"}
-        for num in top_6_numbers.index
-    ]
-    # print(date_top_sample)
-
-    # Sort the probabilities in ascending order for bottom probabilities
-    bottom_6_numbers = today_prob.sort_values(by=today_dom, ascending=True).head(6)
-    all_date_bottom_teatime_sample = [
-        {"number": num, "probability": bottom_6_numbers[today_dom].loc[num], "coming_from": "all_date_bottom_teatime_sample"}
-        for num in bottom_6_numbers.index
-    ] 
-
-
-
-
+    # every (population x window x statistic x top/bottom) sample is one
+    # declared signal; each (window, statistic) group is scored in its own
+    # stage (whole history from the aggregate store, windows from the
+    # prefix-sum table) and merged into one signals x 49 vote matrix
+    today = date_to_day(datetime.today().date().isoformat())
+    run = run_stages(daily_stages(file_path, today, today_dom, DOW_NAMES.index(today_dow)))
+    votes = run["votes"]
 
-    prob_dom = probability_per_day_of_month(last49_dataset_df)
-    # print(prob_dom.columns)
-
-    today_prob = prob_dom[[today_dom]]
-    top_6_numbers = today_prob.sort_values(by=today_dom, ascending=False).head(6)
-    # print(top_6_numbers)
-    
-    # date_top_sample = [{"number": ?value1, "probability": ?value1, "coming_from": "date_top_sample"} for num, count in top_6_numbers]
-    last49_date_top_sample = [
-        {"number": num, "probability": top_6_numbers[today_dom].loc[num], "coming_from": "last49_date_top_sample"}
-        for num in top_6_numbers.index
-    ]
-    # print(date_top_sample)
-
-    # Sort the probabilities in ascending order for bottom probabilities
-    bottom_6_numbers = today_prob.sort_values(by=today_dom, ascending=True).head(6)
-    last49_date_bottom_sample = [
-        {"number": num, "probability": bottom_6_numbers[today_dom].loc[num], "coming_from": "last49_date_bottom_sample"}
-        for num in bottom_6_numbers.index
-    ]
-
-
-    prob_dom = probability_per_day_of_month(last49_lunchtime_df)
-    # print(prob_dom.columns)
-
-    today_prob = prob_dom[[today_dom]]
-    top_6_numbers = today_prob.sort_values(by=today_dom, ascending=False).head(6)
-    # print(top_6_numbers)
-    
-    # date_top_sample = [{"number": ?value1, "probability": ?value1, "coming_from": "date_top_sample"} for num, count in top_6_numbers]
-    last49_date_top_lunchtime_sample = [
-        {"number": num, "probability": top_6_numbers[today_dom].loc[num], "coming_from": "last49_date_top_lunchtime_sample"}
-        for num in top_6_numbers.index
-    ]
-    # print(date_top_sample)
-
-    # Sort the probabilities in ascending order for bottom probabilities
-    bottom_6_numbers = today_prob.sort_values(by=today_dom, ascending=True).head(6)
-    last49_date_bottom_lunchtime_sample = [
-        {"number": num, "probability": bottom_6_numbers[today_dom].loc[num], "coming_from": "last49_date_bottom_lunchtime_sample"}
-        for num in bottom_6_numbers.index
-    ]
-
-
-
-    prob_dom = probability_per_day_of_month(last49_teatime_df)
-    # print(prob_dom.columns)
-
-    today_prob = prob_dom[[today_dom]]
-    top_6_numbers = today_prob.sort_values(by=today_dom, ascending=False).head(6)
-    # print(top_6_numbers)
-    
-    # date_top_sample = [{"number": ?value1, "probability": ?value1, "coming_from": "date_top_sample"} for num, count in top_6_numbers]
-    last49_date_top_teatime_sample = [
-        {"number": num, "probability": top_6_numbers[today_dom].loc[num], "coming_from": "last49_date_top_teatime_sample"}
-        for num in top_6_numbers.index
-    ]
-    # print(date_top_sample)
-
-    # Sort the probabilities in ascending order for bottom probabilities
-    bottom_6_numbers = today_prob.sort_values(by=today_dom, ascending=True).head(6)
-    last49_date_bottom_teatime_sample = [
-        {"number": num, "probability": bottom_6_numbers[today_dom].loc[num], "coming_from": "last49_date_bottom_teatime_sample"}
-        for num in bottom_6_numbers.index
-    ]
-
-    
-    
-    print("\n###################################################Probability of Occurrence per Day of the Week#######################")
-    prob_dow = probability_per_day_of_week(full_dataset_df)
-    # print(prob_dow)
-
-    today_prob = prob_dow[[today_dow]]
-    # print(today_prob)
-    top_6_numbers = today_prob.sort_values(by=today_dow, ascending=False).head(6)
-    all_day_top_sample = [
-        {"number": num, "probability": top_6_numbers[today_dow].loc[num], "coming_from": "all_day_top_sample"}
-        for num in top_6_numbers.index
-    ]
-
-    bottom_6_numbers = today_prob.sort_values(by=today_dow, ascending=True).head(6)
-    all_day_bottom_sample = [
-        {"number": num, "probability": bottom_6_numbers[today_dow].loc[num], "coming_from": "all_day_bottom_sample"}
-        for num in bottom_6_numbers.index
-    ] 
-
-
-
-    prob_dow = probability_per_day_of_week(full_lunchtime_df)
-    # print(prob_dow)
-
-    today_prob = prob_dow[[today_dow]]
-    # print(today_prob)
-    top_6_numbers = today_prob.sort_values(by=today_dow, ascending=False).head(6)
-    all_day_top_lunchtime_sample = [
-        {"number": num, "probability": top_6_numbers[today_dow].loc[num], "coming_from": "all_day_top_lunchtime_sample"}
-        for num in top_6_numbers.index
-    ]
-
-    bottom_6_numbers = today_prob.sort_values(by=today_dow, ascending=True).head(6)
-    all_day_bottom_lunchtime_sample = [
-        {"number": num, "probability": bottom_6_numbers[today_dow].loc[num], "coming_from": "all_day_bottom_lunchtime_sample"}
-        for num in bottom_6_numbers.index
-    ]
-
-
-    prob_dow = probability_per_day_of_week(full_teatime_df)
-    # print(prob_dow)
-
-    today_prob = prob_dow[[today_dow]]
-    # print(today_prob)
-    top_6_numbers = today_prob.sort_values(by=today_dow, ascending=False).head(6)
-    all_day_top_teatime_sample = [
-        {"number": num, "probability": top_6_numbers[today_dow].loc[num], "coming_from": "all_day_top_teatime_sample"}
-        for num in top_6_numbers.index
-    ]
-
-    bottom_6_numbers = today_prob.sort_values(by=today_dow, ascending=True).head(6)
-    all_day_bottom_teatime_sample = [
-        {"number": num, "probability": bottom_6_numbers[today_dow].loc[num], "coming_from": "all_day_bottom_teatime_sample"}
-        for num in bottom_6_numbers.index
-    ] 
-
-
-
-
-
-    prob_dow = probability_per_day_of_week(last49_dataset_df)
-    # print(prob_dow)
-
-    today_prob = prob_dow[[today_dow]]
-    # print(today_prob)
-    top_6_numbers = today_prob.sort_values(by=today_dow, ascending=False).head(6)
-    last49_day_top_sample = [
-        {"number": num, "probability": top_6_numbers[today_dow].loc[num], "coming_from": "last49_day_top_sample"}
-        for num in top_6_numbers.index
-    ]
-
-    bottom_6_numbers = today_prob.sort_values(by=today_dow, ascending=True).head(6)
-    last49_day_bottom_sample = [
-        {"number": num, "probability": bottom_6_numbers[today_dow].loc[num], "coming_from": "last49_day_bottom_sample"}
-        for num in bottom_6_numbers.index
-    ]
-
-    prob_dow = probability_per_day_of_week(last49_lunchtime_df)
-    # print(prob_dow)
-
-    today_prob = prob_dow[[today_dow]]
-    # print(today_prob)
-    top_6_numbers = today_prob.sort_values(by=today_dow, ascending=False).head(6)
-    last49_day_top_lunchtime_sample = [
-        {"number": num, "probability": top_6_numbers[today_dow].loc[num], "coming_from": "last49_day_top_lunchtime_sample"}
-        for num in top_6_numbers.index
-    ]
-
-    bottom_6_numbers = today_prob.sort_values(by=today_dow, ascending=True).head(6)
-    last49_day_bottom_lunchtime_sample = [
-        {"number": num, "probability": bottom_6_numbers[today_dow].loc[num], "coming_from": "last49_day_bottom_lunchtime_sample"}
-        for num in bottom_6_numbers.index
-    ]
-
-    prob_dow = probability_per_day_of_week(last49_teatime_df)
-    # print(prob_dow)
-
-    today_prob = prob_dow[[today_dow]]
-    # print(today_prob)
-    top_6_numbers = today_prob.sort_values(by=today_dow, ascending=False).head(6)
-    last49_day_top_teatime_sample = [
-        {"number": num, "probability": top_6_numbers[today_dow].loc[num], "coming_from": "last49_day_top_teatime_sample"}
-        for num in top_6_numbers.index
-    ]
-
-    bottom_6_numbers = today_prob.sort_values(by=today_dow, ascending=True).head(6)
-    last49_day_bottom_teatime_sample = [
-        {"number": num, "probability": bottom_6_numbers[today_dow].loc[num], "coming_from": "last49_day_bottom_teatime_sample"}
-        for num in bottom_6_numbers.index
-    ] 
-
-    merged_all_number_frequencies = (
-        all_top_sample +
-        all_bottom_sample +
-        all_top_lunchtime_sample +
-        all_bottom_lunchtime_sample +
-        all_top_teatime_sample +
-        all_bottom_teatime_sample + 
-
-        all_date_top_sample + 
-        all_date_bottom_sample +
-        all_date_top_lunchtime_sample + 
-        all_date_bottom_lunchtime_sample +
-        all_date_top_teatime_sample + 
-        all_date_bottom_teatime_sample +
-        
-        all_day_top_sample +
-        all_day_bottom_sample +
-        all_day_top_lunchtime_sample +
-        all_day_bottom_lunchtime_sample +
-        all_day_top_teatime_sample +
-        all_day_bottom_teatime_sample +
-
-        last49_top_sample +
-        last49_bottom_sample +
-        last49_top_lunchtime_sample +
-        last49_bottom_lunchtime_sample +
-        last49_top_teatime_sample +
-        last49_bottom_teatime_sample + 
-
-        last49_date_top_sample + 
-        last49_date_bottom_sample +
-        last49_date_top_lunchtime_sample + 
-        last49_date_bottom_lunchtime_sample +
-        last49_date_top_teatime_sample + 
-        last49_date_bottom_teatime_sample +
-        
-        last49_day_top_sample +
-        last49_day_bottom_sample +
-        last49_day_top_lunchtime_sample +
-        last49_day_bottom_lunchtime_sample +
-        last49_day_top_teatime_sample +
-        last49_day_bottom_teatime_sample 
-    )
-    # print(tabulate(merged_all_number_frequencies, headers="keys", tablefmt="grid"))
-
-
-    merged_lunchtime_number_frequencies = (
-        all_top_sample +
-        all_bottom_sample +
-        all_top_lunchtime_sample +
-        all_bottom_lunchtime_sample +
-        # all_top_teatime_sample +
-        # all_bottom_teatime_sample + 
-
-        all_date_top_sample + 
-        all_date_bottom_sample +
-        all_date_top_lunchtime_sample + 
-        all_date_bottom_lunchtime_sample +
-        # all_date_top_teatime_sample + 
-        # all_date_bottom_teatime_sample +
-        
-        all_day_top_sample +
-        all_day_bottom_sample +
-        all_day_top_lunchtime_sample +
-        all_day_bottom_lunchtime_sample +
-        # all_day_top_teatime_sample +
-        # all_day_bottom_teatime_sample +
-
-        last49_top_sample +
-        last49_bottom_sample +
-        last49_top_lunchtime_sample +
-        last49_bottom_lunchtime_sample +
-        # last49_top_teatime_sample +
-        # last49_bottom_teatime_sample + 
-
-        last49_date_top_sample + 
-        last49_date_bottom_sample +
-        last49_date_top_lunchtime_sample + 
-        last49_date_bottom_lunchtime_sample +
-        # last49_date_top_teatime_sample + 
-        # last49_date_bottom_teatime_sample +
-        
-        last49_day_top_sample +
-        last49_day_bottom_sample +
-        last49_day_top_lunchtime_sample +
-        last49_day_bottom_lunchtime_sample 
-        # last49_day_top_teatime_sample +
-        # last49_day_bottom_teatime_sample 
-    )
-
-
-    merged_teatime_number_frequencies = (
-        all_top_sample +
-        all_bottom_sample +
-        # all_top_lunchtime_sample +
-        # all_bottom_lunchtime_sample +
-        all_top_teatime_sample +
-        all_bottom_teatime_sample + 
-
-        all_date_top_sample + 
-        all_date_bottom_sample +
-        # all_date_top_lunchtime_sample + 
-        # all_date_bottom_lunchtime_sample +
-        all_date_top_teatime_sample + 
-        all_date_bottom_teatime_sample +
-        
-        all_day_top_sample +
-        all_day_bottom_sample +
-        # all_day_top_lunchtime_sample +
-        # all_day_bottom_lunchtime_sample +
-        all_day_top_teatime_sample +
-        all_day_bottom_teatime_sample +
-
-        last49_top_sample +
-        last49_bottom_sample +
-        # last49_top_lunchtime_sample +
-        # last49_bottom_lunchtime_sample +
-        last49_top_teatime_sample +
-        last49_bottom_teatime_sample + 
-
-        last49_date_top_sample + 
-        last49_date_bottom_sample +
-        # last49_date_top_lunchtime_sample + 
-        # last49_date_bottom_lunchtime_sample +
-        last49_date_top_teatime_sample + 
-        last49_date_bottom_teatime_sample +
-        
-        last49_day_top_sample +
-        last49_day_bottom_sample +
-        # last49_day_top_lunchtime_sample +
-        # last49_day_bottom_lunchtime_sample +
-        last49_day_top_teatime_sample +
-        last49_day_bottom_teatime_sample 
-    )
+    # print(tabulate(votes.records(), headers="keys", tablefmt="grid"))
 
     # print("\n###################################################Measure results impact#######################")
-    # lunchtime_impact = yester_check(merged_all_number_frequencies, play_lunchtime_numbers)
+    # lunchtime_impact = yester_check(votes, play_lunchtime_numbers)
     # print(tabulate(lunchtime_impact, headers="keys", tablefmt="grid"))
 
-    # teatime_impact = yester_check(merged_all_number_frequencies, play_teatime_numbers)
+    # teatime_impact = yester_check(votes, play_teatime_numbers)
     # print(tabulate(teatime_impact, headers="keys", tablefmt="grid"))
 
-
-    # Using number combinations.
-    # goal is to get a definite number and find combinations we can put to it  
-    lunchtime_play_suggestion = top_numbers(merged_lunchtime_number_frequencies)
-    teatime_play_suggestion = top_numbers(merged_teatime_number_frequencies)
-
-    print('lunchtime')
-    for record in lunchtime_play_suggestion:
-        play_number = record[0]
-        top_3 = top_3_numbers_with_play_number(lottery_data, play_number)
-        for one in top_3:
-            print(play_number, one[0])
-
-    print('\n\nteatime')
-    for record in teatime_play_suggestion:
-        play_number = record[0]
-        top_3 = top_3_numbers_with_play_number(lottery_data, play_number)
-        for one in top_3:
-            print(play_number, one[0])
-
-     
-
+    print("\n###################################################Stage timings#######################")
+    print(run.report())
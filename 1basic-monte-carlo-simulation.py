@@ -1,45 +1,38 @@
-import random
-import json
-import pandas as pd
-from collections import Counter
-from datetime import datetime, timedelta
+from aggregates import aggregates_of
+from draw_store import load_draws
+from incidence import frequency_dict
+from sampler import TicketSampler
 
 def load_lottery_data(file_path):
-    with open(file_path, "r") as f:
-        return json.load(f)
+    return load_draws(file_path)
 
+def get_filtered_draws(data, draw_time):
+    return data.filter_time(draw_time)
 
-file_path = "merged_uk_49s_results.json"
-lottery_data = load_lottery_data(file_path)
+def basic_predict(draws, k=5, seed=None):
+    # Step 1 & 2: Count frequency of each number (kept up to date in the aggregate store)
+    freq = aggregates_of(draws).counts()
 
+    # Step 3: Normalize to probability distribution
+    prob_dist = frequency_dict(freq)
 
-lunchtime_draws = [entry for entry in lottery_data if entry['time'] == 'lunchtime']
-teatime_draws = [entry for entry in lottery_data if entry['time'] == 'teatime']
+    return sample_lottery_numbers(prob_dist, k, seed)
 
-time_filter = input("Enter draw time (lunchtime/teatime): ").strip().lower()
-num_predictions = int(input("How many 4-number predictions would you like to generate? "))
-
-dataset = lunchtime_draws
-if (time_filter == 'teatime'):
-    dataset = teatime_draws
+# Step 4: Monte Carlo sampling of specified unique numbers
+def sample_lottery_numbers(prob_dist, k=5, seed=None):
+    return TicketSampler.from_distribution(prob_dist, k, seed).sample(1)[0].tolist()
 
-# Step 1: Aggregate all numbers
-all_numbers = []
-for draw in dataset:
-    all_numbers.extend(draw['numbers'])
+def main():
+    file_path = "merged_uk_49s_results.json"
+    lottery_data = load_lottery_data(file_path)
 
-# Step 2: Count frequency of each number
-freq = Counter(all_numbers)
+    time_filter = input("Enter draw time (lunchtime/teatime): ").strip().lower()
+    num_predictions = int(input("How many 4-number predictions would you like to generate? "))
 
-# Step 3: Normalize to probability distribution
-total_counts = sum(freq.values())
-prob_dist = {num: count / total_counts for num, count in freq.items()}
+    dataset = get_filtered_draws(lottery_data, 'teatime' if time_filter == 'teatime' else 'lunchtime')
 
-# Step 4: Monte Carlo sampling of specified unique numbers
-def sample_lottery_numbers(prob_dist, k=num_predictions):
-    numbers = list(prob_dist.keys())
-    weights = list(prob_dist.values())
-    return random.choices(numbers, weights=weights, k=k)
+    predicted_numbers = basic_predict(dataset, num_predictions)
+    print("Play numbers:", predicted_numbers)
 
-predicted_numbers = sample_lottery_numbers(prob_dist)
-print("Play numbers:", predicted_numbers)
+if __name__ == "__main__":
+    main()
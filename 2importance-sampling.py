@@ -4,39 +4,32 @@
 
 # Sample numbers based on that distribution rather than uniformly at random.
 
-import random
-import json
-from collections import Counter
+from aggregates import aggregates_of
+from draw_store import load_draws
+from incidence import frequency_dict
+from sampler import TicketSampler
 
 def load_lottery_data(file_path):
-    with open(file_path, "r") as f:
-        return json.load(f)
+    return load_draws(file_path)
 
 def get_filtered_draws(data, draw_time):
-    return [entry for entry in data if entry['time'].lower() == draw_time]
+    return data.filter_time(draw_time)
 
 def build_importance_distribution(draws):
-    # Flatten all numbers into one list
-    all_numbers = [num for entry in draws for num in entry['numbers']]
-    
-    # Count frequency
-    frequency = Counter(all_numbers)
-    
+    # Count frequency: per-number totals from the aggregate store
+    frequency = aggregates_of(draws).counts()
+
     # Normalize frequencies to probabilities
-    total = sum(frequency.values())
-    probability_distribution = {num: count / total for num, count in frequency.items()}
-    
-    return probability_distribution
+    return frequency_dict(frequency)
 
 def importance_sample(prob_dist, k=4):
-    numbers = list(prob_dist.keys())
-    weights = list(prob_dist.values())
-    
     # Sample 4 unique numbers based on importance weights
-    sampled = set()
-    while len(sampled) < k:
-        sampled.add(random.choices(numbers, weights=weights, k=1)[0])
-    return sorted(sampled)
+    return TicketSampler.from_distribution(prob_dist, k).sample(1)[0].tolist()
+
+def importance_predict(draws, num_predictions=5, sequence_length=4, seed=None):
+    # Build the sampler once, then draw every ticket in a single batch
+    sampler = TicketSampler.from_distribution(build_importance_distribution(draws), sequence_length, seed)
+    return sampler.sample(num_predictions).tolist()
 
 def main():
     file_path = "merged_uk_49s_results.json"
@@ -49,13 +42,12 @@ def main():
     # Filter dataset
     filtered_draws = get_filtered_draws(lottery_data, time_filter)
 
-    # Build importance distribution
-    importance_dist = build_importance_distribution(filtered_draws)
+    # Build importance distribution and generate predictions
+    predictions = importance_predict(filtered_draws, num_predictions)
 
-    # Generate predictions
     print(f"\n🎯 Predicted {num_predictions} sets of 4 numbers (Importance Sampling):")
-    for _ in range(num_predictions):
-        print(importance_sample(importance_dist))
+    for pred in predictions:
+        print(pred)
 
 if __name__ == "__main__":
     main()
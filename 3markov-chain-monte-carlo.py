@@ -4,56 +4,151 @@
 
 # Use MCMC to sample 4-number sequences based on the learned transition probabilities.
 
-import random
-import json
-from collections import defaultdict, Counter
+import numpy as np
+
+from aggregates import aggregates_of
+from draw_store import load_draws
 
 def load_lottery_data(file_path):
-    with open(file_path, "r") as f:
-        return json.load(f)
+    return load_draws(file_path)
 
 def get_filtered_draws(data, draw_time):
-    return [entry for entry in data if entry['time'].lower() == draw_time]
-
-def build_markov_chain(draws):
-    transitions = defaultdict(Counter)
-
-    # For each draw, record number-to-number transitions
-    for entry in draws:
-        numbers = sorted(entry['numbers'])  # sort to simulate a sequence
-        for i in range(len(numbers) - 1):
-            transitions[numbers[i]][numbers[i + 1]] += 1
-
-    # Normalize transitions to probabilities
-    markov_chain = {}
-    for current, next_counts in transitions.items():
-        total = sum(next_counts.values())
-        markov_chain[current] = {nxt: count / total for nxt, count in next_counts.items()}
-
-    return markov_chain
+    return data.filter_time(draw_time)
+
+NUMBERS = 49
+
+def sorted_draw_numbers(draws):
+    # each draw's balls in ascending order, empty slots (0) first
+    return np.sort(np.asarray(draws.numbers, dtype=np.int64), axis=1)
+
+def transition_counts(draws, order=1):
+    """Count number-to-number transitions within each sorted draw.
+
+    order=1 gives the dense (49, 49) count matrix kept in the aggregate
+    store; order=2 gives (contexts, next_states, counts) for the
+    (previous two -> next) triples, where context = (first - 1) * 49 + (second - 1).
+    """
+    if order == 1:
+        return aggregates_of(draws).transitions()
+
+    numbers = sorted_draw_numbers(draws)
+    width = numbers.shape[1]
+    first, second, following = (numbers[:, i:width - 2 + i].ravel() for i in range(3))
+    seen = first > 0
+    context = (first[seen] - 1) * NUMBERS + second[seen] - 1
+    keys, counts = np.unique(context * NUMBERS + following[seen] - 1, return_counts=True)
+    return keys // NUMBERS, keys % NUMBERS + 1, counts
+
+class TransitionTable:
+    """Sparse context -> next-state distribution with one global cumulative array.
+
+    Entries are sorted by (context, next state). Each context's cumulative
+    probabilities are shifted by the context's rank, so a single
+    searchsorted over `cum` does an inverse-CDF lookup for many chains with
+    different contexts at once.
+    """
+
+    def __init__(self, contexts, next_states, counts):
+        self.keys = contexts * NUMBERS + (next_states - 1)
+        self.next_states = next_states
+        self.contexts, start, per_context = np.unique(contexts, return_index=True, return_counts=True)
+        rank = np.repeat(np.arange(len(self.contexts)), per_context)
+        totals = np.add.reduceat(counts, start).astype(np.float64)
+        self.probs = counts / totals[rank]
+        within = np.cumsum(self.probs) - np.repeat(np.cumsum(self.probs)[start] - self.probs[start], per_context)
+        self.cum_within = within
+        self.cum = within + rank
+        self.start, self.stop = start, start + per_context
+
+    def _lookup(self, contexts, states):
+        # entry index of (context, state), or -1 when that transition never happened
+        keys = contexts * NUMBERS + (states - 1)
+        index = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        return np.where((self.keys[index] == keys) & (states > 0), index, -1)
+
+    def sample(self, contexts, chosen, rng):
+        """Next state per chain, never one in `chosen` (sorted rows, 0 = empty); -1 at a dead end."""
+        rank = np.searchsorted(self.contexts, contexts)
+        known = (rank < len(self.contexts)) & (self.contexts[np.minimum(rank, len(self.contexts) - 1)] == contexts)
+        rank = np.where(known, rank, 0)
+
+        entries = [self._lookup(contexts, chosen[:, j]) for j in range(chosen.shape[1])]
+        masked = [np.where(e >= 0, self.probs[e], 0.0) for e in entries]
+        remaining = 1.0 - sum(masked, np.zeros(len(contexts)))
+        alive = known & (remaining > 1e-12)
+
+        # Draw u over the unmasked mass, then step it past every chosen state
+        # at or below it: an exact inverse-CDF draw of the masked row
+        u = rng.random(len(contexts)) * remaining
+        for entry, mass in zip(entries, masked):
+            before = np.where(entry >= 0, self.cum_within[entry] - mass, np.inf)
+            u = np.where(u >= before, u + mass, u)
+
+        index = np.searchsorted(self.cum, rank + u, side="right")
+        index = np.clip(index, self.start[rank], self.stop[rank] - 1)
+        return np.where(alive, self.next_states[index], -1)
+
+class MarkovChain:
+    """First-order transitions as a dense 49x49 matrix with cumulative rows, plus optional second order."""
+
+    def __init__(self, counts, second_order=None):
+        totals = counts.sum(axis=1, keepdims=True)
+        self.matrix = np.divide(counts, totals, out=np.zeros(counts.shape), where=totals > 0)
+        self.cdf = np.cumsum(self.matrix, axis=1)
+        self.starts = np.flatnonzero(totals[:, 0]) + 1  # states with somewhere to go
+        rows, cols = np.nonzero(counts)
+        self.first = TransitionTable(rows, cols + 1, counts[rows, cols])
+        self.second = TransitionTable(*second_order) if second_order is not None else None
+
+    def sample(self, num_sequences, sequence_length=4, rng=None):
+        """Advance num_sequences chains in lockstep; returns (num_sequences, sequence_length) sorted."""
+        rng = np.random.default_rng() if rng is None else rng
+        sequences = np.zeros((num_sequences, sequence_length), dtype=np.int64)
+        current = self.starts[rng.integers(len(self.starts), size=num_sequences)]
+        previous = np.zeros(num_sequences, dtype=np.int64)
+        sequences[:, 0] = current
+        length = np.ones(num_sequences, dtype=np.int64)
+
+        while True:
+            active = np.flatnonzero(length < sequence_length)
+            if not len(active):
+                break
+            chosen = np.sort(sequences[active], axis=1)
+            cur, prev = current[active], previous[active]
+            following = self.first.sample(cur - 1, chosen, rng)
+            if self.second is not None:
+                has_pair = prev > 0
+                pair = self.second.sample((prev[has_pair] - 1) * NUMBERS + cur[has_pair] - 1, chosen[has_pair], rng)
+                # fall back to first order where the pair was never seen
+                following[has_pair] = np.where(pair > 0, pair, following[has_pair])
+
+            # Dead end: restart from another random state (not added to the sequence)
+            dead = following < 0
+            restart = active[dead]
+            current[restart] = self.starts[rng.integers(len(self.starts), size=len(restart))]
+            previous[restart] = 0
+
+            moved = active[~dead]
+            sequences[moved, length[moved]] = following[~dead]
+            previous[moved] = current[moved]
+            current[moved] = following[~dead]
+            length[moved] += 1
+
+        sequences.sort(axis=1)
+        return sequences
+
+def build_markov_chain(draws, order=1):
+    # Record number-to-number transitions (draws sorted to simulate a
+    # sequence) and normalize each row to probabilities
+    second_order = transition_counts(draws, order=2) if order >= 2 else None
+    return MarkovChain(transition_counts(draws), second_order)
 
 def mcmc_sample(chain, sequence_length=4):
-    # Start from a random state
-    current = random.choice(list(chain.keys()))
-    sequence = [current]
-
-    while len(sequence) < sequence_length:
-        next_states = chain.get(current, {})
-        if not next_states:
-            # If dead end, restart from another random state
-            current = random.choice(list(chain.keys()))
-            continue
-
-        next_numbers = list(next_states.keys())
-        probs = list(next_states.values())
-
-        current = random.choices(next_numbers, weights=probs, k=1)[0]
-
-        # Avoid repeating numbers
-        if current not in sequence:
-            sequence.append(current)
+    return chain.sample(1, sequence_length)[0].tolist()
 
-    return sorted(sequence)
+def mcmc_predict(draws, num_predictions=5, sequence_length=4, order=1, seed=None):
+    chain = build_markov_chain(draws, order)
+    return chain.sample(num_predictions, sequence_length, np.random.default_rng(seed)).tolist()
 
 def main():
     file_path = "merged_uk_49s_results.json"
@@ -73,8 +168,8 @@ def main():
 
     # Generate predictions
     print(f"\n🎯 Predicted {num_predictions} sets of 4 numbers using MCMC:")
-    for _ in range(num_predictions):
-        print(mcmc_sample(markov_chain))
+    for sequence in markov_chain.sample(num_predictions).tolist():
+        print(sequence)
 
 if __name__ == "__main__":
     main()
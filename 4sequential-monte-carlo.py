@@ -17,69 +17,112 @@
 
 # Return top-k predictions. 
 
-import random
-import json
-from collections import Counter
+import numpy as np
+
+from aggregates import aggregates_of
+from draw_store import load_draws
+from incidence import frequency_dict
+from tickets import random_numbers, repair_duplicates, replace_one, tally_tickets
 
 def load_lottery_data(file_path):
-    with open(file_path, "r") as f:
-        return json.load(f)
+    return load_draws(file_path)
 
 def get_filtered_draws(data, draw_time):
-    return [entry for entry in data if entry['time'].lower() == draw_time]
+    return data.filter_time(draw_time)
 
 def compute_number_frequencies(draws):
-    all_numbers = [num for entry in draws for num in entry['numbers']]
-    frequency = Counter(all_numbers)
-    total = sum(frequency.values())
-    return {num: freq / total for num, freq in frequency.items()}
-
-def initialize_particles(num_particles, number_pool, sequence_length=4):
-    particles = []
-    for _ in range(num_particles):
-        particles.append(sorted(random.sample(number_pool, sequence_length)))
-    return particles
-
-def likelihood(sequence, freq_dist):
-    # Simple likelihood: sum of individual number probabilities
-    return sum([freq_dist.get(n, 0.0001) for n in sequence])
-
-def mutate(sequence, number_pool):
-    # Mutate by replacing one number
-    new_seq = sequence[:]
-    index_to_replace = random.randint(0, len(new_seq) - 1)
-    new_number = random.choice([n for n in number_pool if n not in new_seq])
-    new_seq[index_to_replace] = new_number
-    return sorted(new_seq)
-
-def smc_predict(draws, num_predictions=5, num_particles=100, iterations=5, sequence_length=4):
-    freq_dist = compute_number_frequencies(draws)
-    number_pool = list(freq_dist.keys())
-
-    particles = initialize_particles(num_particles, number_pool, sequence_length)
-
-    for _ in range(iterations):
-        # Weight particles
-        weights = [likelihood(p, freq_dist) for p in particles]
+    return frequency_dict(aggregates_of(draws).counts())
+
+def frequency_array(freq_dist, default=0.0001):
+    # index n-1 holds ball n; numbers never drawn get a small floor
+    probs = np.full(49, default)
+    for num, freq in freq_dist.items():
+        probs[num - 1] = freq
+    return probs
+
+def initialize_particles(num_particles, number_pool, sequence_length=4, rng=None):
+    rng = np.random.default_rng() if rng is None else rng
+    pool = np.asarray(number_pool, dtype=np.uint8)
+    particles = random_numbers((num_particles, sequence_length), rng, pool=pool).astype(np.uint8)
+    return repair_duplicates(particles, rng, pool=pool)
+
+def particle_likelihoods(particles, probs):
+    # Simple likelihood: sum of individual number probabilities, for every particle at once
+    return probs[particles.astype(np.intp) - 1].sum(axis=1)
+
+def effective_sample_size(weights):
+    return 1.0 / np.sum(weights ** 2)
+
+def systematic_resample(weights, rng):
+    # One uniform offset shared by N evenly spaced pointers: low variance, O(N)
+    positions = (rng.random() + np.arange(len(weights))) / len(weights)
+    return np.minimum(np.searchsorted(np.cumsum(weights), positions), len(weights) - 1)
+
+def stratified_resample(weights, rng):
+    # One uniform per stratum [i/N, (i+1)/N)
+    positions = (rng.random(len(weights)) + np.arange(len(weights))) / len(weights)
+    return np.minimum(np.searchsorted(np.cumsum(weights), positions), len(weights) - 1)
+
+RESAMPLERS = {"systematic": systematic_resample, "stratified": stratified_resample}
+
+def mutate(particles, number_pool, rng=None):
+    # Mutate by replacing one number with one the particle doesn't hold yet
+    rng = np.random.default_rng() if rng is None else rng
+    return replace_one(particles, rng, pool=np.asarray(number_pool, dtype=particles.dtype))
+
+def smc_predict(draws, num_predictions=5, num_particles=100, iterations=5, sequence_length=4,
+                ess_threshold=0.5, resampling="systematic", seed=None):
+    return smc_from_counts(aggregates_of(draws).counts(), num_predictions, num_particles, iterations,
+                           sequence_length, ess_threshold, resampling, np.random.default_rng(seed))
+
+def smc_from_counts(counts, num_predictions=5, num_particles=100, iterations=5, sequence_length=4,
+                    ess_threshold=0.5, resampling="systematic", rng=None):
+    # the filter itself, from per-number counts (index 0 = ball 1), so callers
+    # that keep running totals don't need a DrawTable
+    rng = np.random.default_rng() if rng is None else rng
+    resample = RESAMPLERS[resampling]
+    freq_dist = frequency_dict(counts)
+    probs = frequency_array(freq_dist)
+    number_pool = np.array(sorted(freq_dist), dtype=np.uint8)
+
+    particles = initialize_particles(num_particles, number_pool, sequence_length, rng)
+    log_likes = np.log(np.maximum(particle_likelihoods(particles, probs), 1e-300))
+    log_weights = np.zeros(num_particles)
+
+    # Tempering: iteration t targets likelihood ** (t / iterations), so the
+    # particles move from uniform tickets to the likelihood in even steps
+    beta = 0.0
+    for t in range(1, iterations + 1):
+        next_beta = t / iterations
+
+        # Reweight by the step to the next target (log space, so weights can
+        # accumulate between resamples)
+        log_weights += (next_beta - beta) * log_likes
+        beta = next_beta
 
         # Normalize
-        total_weight = sum(weights)
-        if total_weight == 0:
-            weights = [1/len(particles)] * len(particles)
-        else:
-            weights = [w / total_weight for w in weights]
-
-        # Resample
-        particles = random.choices(particles, weights=weights, k=num_particles)
-
-        # Mutate
-        particles = [mutate(p, number_pool) for p in particles]
-
-    # Final predictions: return the most frequent or top-weighted unique sequences
-    final_sequences = Counter(tuple(p) for p in particles)
-    top_sequences = final_sequences.most_common(num_predictions)
-
-    return [list(seq) for seq, _ in top_sequences]
+        weights = np.exp(log_weights - log_weights.max())
+        weights /= weights.sum()
+
+        # Resample only once the weights have degenerated
+        if effective_sample_size(weights) < ess_threshold * num_particles:
+            keep = resample(weights, rng)
+            particles, log_likes = particles[keep], log_likes[keep]
+            log_weights[:] = 0.0
+
+        # Mutate: a Metropolis move that keeps the current target, so the
+        # weights stay those of the states the particles hold
+        proposals = mutate(particles.copy(), number_pool, rng)
+        proposal_log_likes = np.log(np.maximum(particle_likelihoods(proposals, probs), 1e-300))
+        accept = np.log(rng.random(num_particles)) < beta * (proposal_log_likes - log_likes)
+        particles[accept] = proposals[accept]
+        log_likes[accept] = proposal_log_likes[accept]
+
+    # Final predictions: the unique sequences carrying the most weight
+    weights = np.exp(log_weights - log_weights.max())
+    top_sequences, _ = tally_tickets(particles, weights)
+
+    return top_sequences[:num_predictions].tolist()
 
 def main():
     file_path = "merged_uk_49s_results.json"
@@ -22,46 +22,136 @@
 
 # Use those to estimate expected likelihood and choose the top ones.
 
-import random
-import json
-from collections import Counter
+import heapq
+import time
+import numpy as np
+
+from aggregates import aggregates_of
+from combos import colex_rank, colex_unrank
+from draw_store import load_draws
+from incidence import frequency_dict
+from ticket_scores import all_tickets, get_scorer
+from tickets import distinct_numbers
 
 def load_lottery_data(file_path):
-    with open(file_path, "r") as f:
-        return json.load(f)
+    return load_draws(file_path)
 
 def get_filtered_draws(data, draw_time):
-    return [entry for entry in data if entry['time'].lower() == draw_time]
+    return data.filter_time(draw_time)
 
 def compute_number_frequencies(draws):
-    all_numbers = [num for entry in draws for num in entry['numbers']]
-    frequency = Counter(all_numbers)
-    total = sum(frequency.values())
-    return {num: freq / total for num, freq in frequency.items()}
-
-def generate_random_sequence(number_pool, k=4):
-    return sorted(random.sample(number_pool, k))
-
-def estimate_expectation(sequences, freq_dist):
-    estimates = {}
-    for seq in sequences:
-        prob = sum([freq_dist.get(num, 0.0001) for num in seq])
-        estimates[tuple(seq)] = prob
-    return estimates
-
-def monte_carlo_integration_predict(draws, num_predictions=5, num_samples=1000, sequence_length=4):
-    freq_dist = compute_number_frequencies(draws)
-    number_pool = list(freq_dist.keys())
-
-    # Step 1: Randomly sample 4-number sets
-    random_sequences = [generate_random_sequence(number_pool, sequence_length) for _ in range(num_samples)]
-
-    # Step 2: Estimate expected value (likelihood)
-    estimates = estimate_expectation(random_sequences, freq_dist)
-
-    # Step 3: Select top N sequences with highest estimated value
-    top_sequences = sorted(estimates.items(), key=lambda x: x[1], reverse=True)[:num_predictions]
-    return [list(seq) for seq, _ in top_sequences]
+    return frequency_dict(aggregates_of(draws).counts())
+
+# Streaming mode: tickets are generated and scored in fixed-size chunks with
+# a vectorised RNG. Each chunk only hands its best candidates to a K-entry
+# heap (deduplicated by combination rank), and the running mean/variance are
+# merged chunk by chunk, so memory is O(K + chunk) however many samples are
+# drawn. This also covers spaces too big to enumerate, e.g. 7-ball tickets.
+
+CHUNK_SIZE = 1 << 20
+
+def random_sequences(number_pool, count, k, rng):
+    # left unsorted: only the shortlisted rows need sorting, for their rank
+    return distinct_numbers(count, k, rng, pool=number_pool)
+
+def streaming_integration(draws, num_samples, top_k=5, sequence_length=4, scorer="frequency",
+                          chunk_size=CHUNK_SIZE, seed=None, report=None):
+    """Monte Carlo estimate of E[score] plus the top_k distinct sampled tickets, in bounded memory.
+
+    Returns (tickets best first, stats) where stats holds the running
+    estimate, its variance, the number of samples and samples/sec. If
+    `report` is given it is called with the stats after every chunk.
+    """
+    if scorer == "history" and sequence_length != 4:
+        raise ValueError("The history scorer counts 4-number tickets only (got sequence_length=%d)" % sequence_length)
+    rng = np.random.default_rng(seed)
+    score = get_scorer(scorer)
+    number_pool = sorted(compute_number_frequencies(draws))
+    heap = []  # (score, rank) min-heap holding the best top_k seen so far
+    in_heap = set()
+    count, mean, m2 = 0, 0.0, 0.0
+    stats = {"samples": 0, "estimate": 0.0, "variance": 0.0, "samples_per_sec": 0.0}
+    started = time.perf_counter()
+
+    for start in range(0, num_samples, chunk_size):
+        sequences = random_sequences(number_pool, min(chunk_size, num_samples - start), sequence_length, rng)
+        values = score(draws, sequences)
+
+        # Chan et al. parallel update of the running mean and variance
+        n, chunk_mean = len(values), values.mean()
+        delta = chunk_mean - mean
+        total = count + n
+        m2 += ((values - chunk_mean) ** 2).sum() + delta ** 2 * count * n / total
+        mean += delta * n / total
+        count = total
+
+        # Only the chunk's own best distinct tickets can enter the heap; look
+        # at a few times top_k of them so repeated tickets can't crowd it out
+        shortlist = np.arange(n)
+        if n > 8 * top_k:
+            shortlist = np.argpartition(-values, 8 * top_k - 1)[:8 * top_k]
+        ranks = colex_rank(np.sort(sequences[shortlist], axis=1))
+        _, first = np.unique(ranks, return_index=True)
+        if len(first) < min(top_k, n) and len(shortlist) < n:
+            shortlist = np.arange(n)
+            ranks = colex_rank(np.sort(sequences, axis=1))
+            _, first = np.unique(ranks, return_index=True)
+        for i in first[np.argsort(-values[shortlist[first]], kind="stable")[:top_k]]:
+            rank = int(ranks[i])
+            value = values[shortlist[i]]
+            if rank in in_heap:
+                continue
+            entry = (float(value), rank)
+            if len(heap) < top_k:
+                heapq.heappush(heap, entry)
+            elif entry > heap[0]:
+                in_heap.discard(heapq.heappushpop(heap, entry)[1])
+            else:
+                continue
+            in_heap.add(rank)
+
+        stats = {
+            "samples": count,
+            "estimate": float(mean),
+            "variance": float(m2 / (count - 1)) if count > 1 else 0.0,
+            "samples_per_sec": count / max(time.perf_counter() - started, 1e-9),
+        }
+        if report is not None:
+            report(stats)
+
+    best = sorted(heap, reverse=True)
+    tickets = colex_unrank([rank for _, rank in best], sequence_length)
+    return tickets.tolist(), stats
+
+# Exact mode: there are only C(49, 4) = 211,876 tickets, so instead of
+# sampling some of them we score all of them in one vectorised pass. Score
+# arrays are indexed by colex rank and cached on the DrawTable per scorer,
+# so later queries on the same draws are just an argpartition.
+
+def exact_scores(draws, scorer="frequency"):
+    """Score of every possible 4-number ticket, indexed by colex rank."""
+    key = ("exact_scores", scorer)
+    if key not in draws.cache:
+        draws.cache[key] = get_scorer(scorer)(draws, all_tickets())
+    return draws.cache[key]
+
+def exact_top(draws, num_predictions=5, scorer="frequency"):
+    """The num_predictions best tickets over the whole space, best first."""
+    scores = exact_scores(draws, scorer)
+    best = np.argpartition(-scores, num_predictions - 1)[:num_predictions]
+    best = best[np.argsort(-scores[best], kind="stable")]
+    return all_tickets()[best].tolist()
+
+def monte_carlo_integration_predict(draws, num_predictions=5, num_samples=1000, sequence_length=4, exact=False, scorer="frequency"):
+    if exact:
+        if sequence_length != 4:
+            raise ValueError(f"Exact mode scores every 4-number ticket; got sequence_length={sequence_length}")
+        return exact_top(draws, num_predictions, scorer)
+
+    # Randomly sample sets, estimate their expected value (likelihood) and
+    # keep the top N with the highest estimate
+    top_sequences, _ = streaming_integration(draws, num_samples, num_predictions, sequence_length, scorer)
+    return top_sequences
 
 def main():
     file_path = "merged_uk_49s_results.json"
@@ -74,7 +164,7 @@ def main():
     dataset = get_filtered_draws(lottery_data, time_filter)
 
     print(f"\n🎲 {num_predictions} Predictions using Monte Carlo Integration:")
-    predictions = monte_carlo_integration_predict(dataset, num_predictions=num_predictions)
+    predictions = monte_carlo_integration_predict(dataset, num_predictions=num_predictions, exact=True)
     for pred in predictions:
         print(pred)
 
@@ -6,25 +6,36 @@
 
 # Using that statistic to make predictions (e.g., which numbers appear most frequently across resamples).
 
+import os
 import random
-import json
+import numpy as np
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+
+from draw_store import load_draws
+from incidence import incidence_of
 
 def load_lottery_data(file_path):
-    with open(file_path, "r") as f:
-        return json.load(f)
+    return load_draws(file_path)
 
 def get_filtered_draws(data, draw_time):
-    return [entry for entry in data if entry['time'].lower() == draw_time]
+    return data.filter_time(draw_time)
 
 def bootstrap_resample(draws, n_samples=1000):
-    """Generate bootstrap samples (with replacement)."""
-    return [random.choice(draws)['numbers'] for _ in range(n_samples)]
+    """Generate bootstrap samples (with replacement): (n_samples, 7) number rows."""
+    picks = [random.randrange(len(draws)) for _ in range(n_samples)]
+    return np.asarray(draws.numbers)[picks]
 
 def aggregate_frequencies(bootstrap_samples):
     """Count frequency of all numbers across samples."""
-    all_numbers = [num for sample in bootstrap_samples for num in sample]
-    return Counter(all_numbers)
+    balls = np.asarray(bootstrap_samples).ravel()
+    balls = balls[balls > 0]
+    counts = np.bincount(balls, minlength=50)
+    # in order of first appearance, like Counter(all_numbers), so most_common
+    # breaks ties the same way
+    numbers, first = np.unique(balls, return_index=True)
+    return Counter({int(n): int(counts[n]) for n in numbers[np.argsort(first)]})
 
 def generate_predictions(freq_counter, num_predictions=5, sequence_length=4):
     """Use top frequent numbers to form predictions."""
@@ -39,6 +50,117 @@ def bootstrap_predict(draws, num_predictions=5, sequence_length=4, bootstrap_ite
     freq_counter = aggregate_frequencies(samples)
     return generate_predictions(freq_counter, num_predictions, sequence_length)
 
+# Bootstrap engine: a replicate is a vector of how many times each draw was
+# picked, so the per-number frequencies of a whole batch of replicates are one
+# (replicates x draws) @ (draws x 49) matrix product against the incidence
+# matrix. Shards of replicates run in a process pool, each on its own RNG
+# stream spawned from the seed.
+
+SHARD_SIZE = 4096  # replicates per pool task
+SHARD_CHUNK = 256  # replicates per matrix product; bounds the (chunk x draws) array
+
+_bootstrap_balls = None
+
+def _init_bootstrap_worker(balls):
+    global _bootstrap_balls
+    _bootstrap_balls = balls
+
+def multinomial_counts(num_draws, replicates, rng):
+    """(replicates, num_draws) pick counts for the ordinary i.i.d. bootstrap."""
+    picks = rng.integers(num_draws, size=(replicates, num_draws))
+    offsets = np.arange(replicates)[:, None] * num_draws
+    return np.bincount((picks + offsets).ravel(), minlength=replicates * num_draws).reshape(replicates, num_draws)
+
+def moving_block_counts(num_draws, replicates, block_length, rng):
+    """(replicates, num_draws) pick counts for the moving-block bootstrap.
+
+    Each replicate glues together ceil(n / L) random runs of L consecutive
+    draws (cut to n draws in total), which keeps short-range serial
+    dependence inside each block.
+    """
+    block_length = min(block_length, num_draws)
+    blocks = -(-num_draws // block_length)
+    starts = rng.integers(num_draws - block_length + 1, size=(replicates, blocks))
+    lengths = np.full(blocks, block_length)
+    lengths[-1] = num_draws - block_length * (blocks - 1)
+    # +1 where a block starts, -1 just after it ends; a running sum gives coverage
+    offsets = np.arange(replicates)[:, None] * (num_draws + 1)
+    edges = np.concatenate([(starts + offsets).ravel(), (starts + lengths + offsets).ravel()])
+    signs = np.concatenate([np.ones(starts.size), -np.ones(starts.size)])
+    diff = np.bincount(edges, weights=signs, minlength=replicates * (num_draws + 1))
+    return np.cumsum(diff.reshape(replicates, num_draws + 1), axis=1)[:, :num_draws]
+
+def _bootstrap_shard(replicates, seed, block_length):
+    balls = _bootstrap_balls.astype(np.float32)
+    rng = np.random.default_rng(seed)
+    frequencies = np.empty((replicates, balls.shape[1]), dtype=np.float32)
+    for start in range(0, replicates, SHARD_CHUNK):
+        rows = min(SHARD_CHUNK, replicates - start)
+        if block_length:
+            counts = moving_block_counts(len(balls), rows, block_length, rng)
+        else:
+            counts = multinomial_counts(len(balls), rows, rng)
+        frequencies[start:start + rows] = counts.astype(np.float32) @ balls
+    return frequencies / len(balls)
+
+def percentile_interval(replicates, confidence=0.95):
+    """(49, 2) lower/upper percentile bounds per number."""
+    tail = (1 - confidence) / 2 * 100
+    return np.percentile(replicates, [tail, 100 - tail], axis=0).T
+
+def bca_interval(replicates, estimate, balls, confidence=0.95):
+    """(49, 2) bias-corrected and accelerated bounds per number.
+
+    The acceleration comes from the jackknife, which for a frequency has a
+    closed form: leaving draw i out shifts the estimate by that draw's
+    deviation from the mean incidence.
+    """
+    normal = NormalDist()
+    below = np.clip((replicates < estimate).mean(axis=0), 1e-9, 1 - 1e-9)
+    z0 = np.array([normal.inv_cdf(p) for p in below])
+
+    deviation = balls - balls.mean(axis=0)
+    spread = (deviation ** 2).sum(axis=0)
+    accel = np.divide((deviation ** 3).sum(axis=0), 6 * spread ** 1.5, out=np.zeros(balls.shape[1]), where=spread > 0)
+
+    bounds = np.empty((balls.shape[1], 2))
+    for side, tail in enumerate(((1 - confidence) / 2, (1 + confidence) / 2)):
+        z = z0 + normal.inv_cdf(tail)
+        adjusted = np.array([normal.cdf(v) for v in z0 + z / (1 - accel * z)])
+        for n in range(balls.shape[1]):
+            bounds[n, side] = np.quantile(replicates[:, n], adjusted[n])
+    return bounds
+
+def bootstrap_distribution(draws, replicates=1000, block_length=None, confidence=0.95, seed=None, processes=None):
+    """Bootstrap distribution of each number's per-draw frequency, with percentile and BCa intervals.
+
+    Returns a dict with "estimate" (49,), "replicates" (replicates, 49),
+    "percentile" (49, 2) and "bca" (49, 2); index 0 is ball 1. Pass
+    block_length for the moving-block bootstrap.
+    """
+    balls = incidence_of(draws).balls
+    # Fixed-size shards with their own seeds: the result depends only on the
+    # seed, not on how many processes share the work
+    shard_sizes = [min(SHARD_SIZE, replicates - start) for start in range(0, replicates, SHARD_SIZE)]
+    seeds = np.random.SeedSequence(seed).spawn(len(shard_sizes))
+    workers = min(processes or os.cpu_count() or 1, len(shard_sizes))
+
+    if workers == 1:
+        _init_bootstrap_worker(balls)
+        shards = list(map(_bootstrap_shard, shard_sizes, seeds, [block_length] * len(shard_sizes)))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_bootstrap_worker, initargs=(balls,)) as pool:
+            shards = list(pool.map(_bootstrap_shard, shard_sizes, seeds, [block_length] * len(shard_sizes)))
+
+    samples = np.concatenate(shards)
+    estimate = balls.mean(axis=0)
+    return {
+        "estimate": estimate,
+        "replicates": samples,
+        "percentile": percentile_interval(samples, confidence),
+        "bca": bca_interval(samples, estimate, balls.astype(np.float64), confidence),
+    }
+
 def main():
     file_path = "merged_uk_49s_results.json"
     lottery_data = load_lottery_data(file_path)
@@ -54,5 +176,14 @@ def main():
     for pred in predictions:
         print(pred)
 
+    distribution = bootstrap_distribution(dataset)
+    best = np.argsort(-distribution["estimate"], kind="stable")[:10]
+    print("\n📊 Most frequent numbers per draw, with 95% bootstrap intervals:")
+    for n in best:
+        low, high = distribution["percentile"][n]
+        bca_low, bca_high = distribution["bca"][n]
+        print(f"{n + 1:2d}: {distribution['estimate'][n]:.3f} "
+              f"(percentile {low:.3f}-{high:.3f}, BCa {bca_low:.3f}-{bca_high:.3f})")
+
 if __name__ == "__main__":
     main()
@@ -13,77 +13,188 @@
 
 # Termination: Repeat the process for several generations, then select the best-performing combination.
 
-import random
-import json
-from collections import Counter
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from aggregates import aggregates_of
+from combos import colex_rank, count_supersets, draw_masks, numbers_to_masks
+from draw_store import load_draws
+from sampler import TicketSampler
+from subset_table import subset_counts
+from tickets import deduplicate, repair_duplicates
 
 def load_lottery_data(file_path):
-    with open(file_path, "r") as f:
-        return json.load(f)
+    return load_draws(file_path)
 
 def get_filtered_draws(data, draw_time):
-    return [entry for entry in data if entry['time'].lower() == draw_time]
+    return data.filter_time(draw_time)
+
+TICKET_SIZE = 4
 
-def generate_initial_population(draws, population_size=100):
+def random_individuals(weights, size, rng):
+    """Draw `size` tickets of 4 distinct numbers, each number weighted by `weights` (index 0 = ball 1)."""
+    return TicketSampler(weights, TICKET_SIZE).sample(size, rng)
+
+def generate_initial_population(draws, population_size=100, rng=None):
     """Generate an initial population of random number combinations."""
-    all_numbers = [num for entry in draws for num in entry['numbers']]
-    population = []
-    for _ in range(population_size):
-        individual = sorted(random.sample(all_numbers, 4))  # Randomly sample 4 numbers
-        population.append(individual)
-    return population
+    rng = np.random.default_rng() if rng is None else rng
+    # Numbers are weighted by how often they were drawn, as sampling from the
+    # flattened history used to do, but without repeats inside a ticket
+    return random_individuals(aggregates_of(draws).counts(), population_size, rng)
 
 def fitness_function(individual, draws):
     """Fitness function based on how frequently the individual (lottery numbers) appears in draws."""
-    match_count = 0
-    for entry in draws:
-        if set(individual).issubset(entry['numbers']):  # Check if the combination is in the draw
-            match_count += 1
-    return match_count
+    return int(population_fitness([individual], draws)[0])
+
+def population_fitness(population, draws):
+    """Score a whole population at once from the 4-subset occurrence table."""
+    individuals = np.sort(np.array(population, dtype=np.int64), axis=1)
+    distinct = np.all(individuals[:, 1:] != individuals[:, :-1], axis=1)
+    scores = np.empty(len(individuals), dtype=np.int64)
+    # A proper 4-set is a single lookup into the precomputed table
+    scores[distinct] = subset_counts(draws)[colex_rank(individuals[distinct])]
+    if distinct.all():
+        return scores
+
+    # Individuals with a repeated number are really 2- or 3-sets: count the
+    # draws whose bitmask covers them
+    scores[~distinct] = count_supersets(draw_masks(draws), numbers_to_masks(individuals[~distinct]))
+    return scores
 
 def selection(population, draws, num_parents=50):
     """Select the best individuals based on fitness."""
-    fitness_scores = [(individual, fitness_function(individual, draws)) for individual in population]
-    fitness_scores.sort(key=lambda x: x[1], reverse=True)  # Sort by fitness score
-    parents = [individual for individual, _ in fitness_scores[:num_parents]]
-    return parents
-
-def crossover(parents, offspring_size=50):
+    population = np.asarray(population)
+    return select_fittest(population, population_fitness(population, draws), num_parents)
+
+def select_fittest(population, fitness_scores, num_parents=50):
+    """The num_parents rows of `population` with the highest scores, best first."""
+    best = np.arange(len(population))
+    if num_parents < len(population):
+        best = np.argpartition(-fitness_scores, num_parents - 1)[:num_parents]
+    order = best[np.argsort(-fitness_scores[best], kind="stable")]  # Sort by fitness score
+    return population[order]
+
+def crossover(parents, offspring_size=50, rng=None):
     """Crossover function to create offspring from selected parents."""
-    offspring = []
-    while len(offspring) < offspring_size:
-        parent1, parent2 = random.sample(parents, 2)
-        # Perform single-point crossover
-        crossover_point = random.randint(1, 3)
-        child = parent1[:crossover_point] + parent2[crossover_point:]
-        offspring.append(sorted(child))
-    return offspring
-
-def mutate(offspring, mutation_rate=0.1):
+    rng = np.random.default_rng() if rng is None else rng
+    parents = np.asarray(parents, dtype=np.uint8)
+    if len(parents) < 2:
+        raise ValueError(f"Crossover needs at least 2 parents, got {len(parents)}")
+    # Two different parents per child
+    first = rng.integers(len(parents), size=offspring_size)
+    second = (first + rng.integers(1, len(parents), size=offspring_size)) % len(parents)
+    # Perform single-point crossover
+    crossover_point = rng.integers(1, TICKET_SIZE, size=(offspring_size, 1))
+    from_first = np.arange(TICKET_SIZE) < crossover_point
+    offspring = np.where(from_first, parents[first], parents[second])
+    return repair_duplicates(offspring, rng)
+
+def mutate(offspring, mutation_rate=0.1, rng=None):
     """Mutation function to introduce randomness into the offspring."""
-    for individual in offspring:
-        if random.random() < mutation_rate:
-            mutation_point = random.randint(0, 3)
-            mutation_value = random.randint(1, 49)  # Mutate to a random valid number
-            individual[mutation_point] = mutation_value
-            individual.sort()
-    return offspring
-
-def genetic_monte_carlo_predict(draws, generations=100, population_size=100, num_predictions=5):
-    """Run the Genetic Monte Carlo method to predict lottery numbers."""
-    population = generate_initial_population(draws, population_size)
+    rng = np.random.default_rng() if rng is None else rng
+    mutants = np.flatnonzero(rng.random(len(offspring)) < mutation_rate)
+    mutation_point = rng.integers(TICKET_SIZE, size=len(mutants))
+    offspring[mutants, mutation_point] = rng.integers(1, 50, size=len(mutants))  # Mutate to a random valid number
+    return repair_duplicates(offspring, rng)
+
+def evolve(population, draws, generations, rng):
+    """Run `generations` rounds of selection, crossover and mutation on one population."""
+    fitness = lambda individuals: population_fitness(individuals, draws)
+    return evolve_with(population, fitness, aggregates_of(draws).counts(), generations, rng)
+
+def evolve_with(population, fitness, weights, generations, rng):
+    """evolve() with any fitness(population) -> scores, immigrants drawn by `weights` (index 0 = ball 1)."""
+    population_size = len(population)
+    num_parents = max(2, population_size // 2)
     
     for generation in range(generations):
-        parents = selection(population, draws)
-        offspring = crossover(parents)
-        population = mutate(offspring)
+        parents = select_fittest(np.asarray(population), fitness(population), num_parents)
+        offspring = mutate(crossover(parents, population_size, rng), rng=rng)
+        # Identical children add nothing; replace them with fresh immigrants
+        population = deduplicate(offspring)
+        shortfall = population_size - len(population)
+        if shortfall:
+            population = np.concatenate([population, random_individuals(weights, shortfall, rng)])
+    return population
+
+def genetic_monte_carlo_predict(draws, generations=100, population_size=100, num_predictions=5, seed=None, islands=1, **island_options):
+    """Run the Genetic Monte Carlo method to predict lottery numbers."""
+    if islands > 1:
+        return island_genetic_predict(draws, islands, generations, population_size, num_predictions, seed, **island_options)
+
+    rng = np.random.default_rng(seed)
+    population = generate_initial_population(draws, population_size, rng)
+    population = evolve(population, draws, generations, rng)
     
     # After generations, select the top predictions
-    fitness_scores = [(individual, fitness_function(individual, draws)) for individual in population]
-    fitness_scores.sort(key=lambda x: x[1], reverse=True)
-    top_predictions = [individual for individual, _ in fitness_scores[:num_predictions]]
+    top_predictions = selection(deduplicate(population), draws, num_predictions)
     
-    return top_predictions
+    return top_predictions.tolist()
+
+# Island model: several populations evolve independently (one per process)
+# and every `migration_interval` generations each island sends its best
+# `migrants` individuals to its neighbours, which replace their worst ones.
+# Every island owns a Generator spawned from the master seed and carries it
+# from epoch to epoch, so a given seed gives the same result whatever the
+# number of worker processes or the order they finish in.
+
+MIGRATION_TOPOLOGIES = ("ring", "all")
+
+_island_draws = None
+
+def _init_island_worker(draws):
+    global _island_draws
+    _island_draws = draws
+
+def _island_epoch(population, rng, immigrants, generations, migrants, population_size):
+    draws = _island_draws
+    if population is None:
+        population = generate_initial_population(draws, population_size, rng)
+    elif len(immigrants):
+        survivors = selection(population, draws, len(population) - len(immigrants))
+        population = np.concatenate([survivors, immigrants])
+    population = evolve(population, draws, generations, rng)
+    return population, rng, selection(population, draws, migrants)
+
+def migration_sources(island, islands, topology):
+    """Islands whose elites flow into `island`."""
+    if topology == "ring":
+        return [(island - 1) % islands]
+    if topology == "all":
+        return [other for other in range(islands) if other != island]
+    raise ValueError(f"Unknown migration topology: {topology!r} (expected one of {MIGRATION_TOPOLOGIES})")
+
+def island_genetic_predict(draws, islands=4, generations=100, population_size=100, num_predictions=5, seed=None,
+                           migration_interval=10, migrants=5, topology="ring", processes=None):
+    """Run one GA population per island across a process pool and merge their best predictions."""
+    migration_sources(0, islands, topology)  # validate the topology up front
+    rngs = [np.random.default_rng(stream) for stream in np.random.SeedSequence(seed).spawn(islands)]
+    populations = [None] * islands
+    elites = [np.empty((0, TICKET_SIZE), dtype=np.uint8)] * islands
+    # Build the shared lookup tables once so forked workers inherit them
+    subset_counts(draws)
+    aggregates_of(draws)
+
+    with ProcessPoolExecutor(max_workers=processes or min(islands, os.cpu_count() or 1),
+                             initializer=_init_island_worker, initargs=(draws,)) as pool:
+        epochs = [migration_interval] * (generations // migration_interval)
+        if generations % migration_interval or not epochs:
+            epochs.append(generations % migration_interval)
+        for epoch in epochs:
+            jobs = []
+            for island in range(islands):
+                sources = migration_sources(island, islands, topology)
+                immigrants = deduplicate(np.concatenate([elites[source] for source in sources]))
+                immigrants = immigrants[:max(0, population_size - 2)]
+                jobs.append(pool.submit(_island_epoch, populations[island], rngs[island], immigrants,
+                                        epoch, migrants, population_size))
+            for island, job in enumerate(jobs):
+                populations[island], rngs[island], elites[island] = job.result()
+
+    merged = deduplicate(np.concatenate(populations))
+    return selection(merged, draws, num_predictions).tolist()
 
 def main():
     file_path = "merged_uk_49s_results.json"
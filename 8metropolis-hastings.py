@@ -0,0 +1,160 @@
+# Metropolis-Hastings over 4-number combinations, with parallel tempering.
+
+# The state of a chain is one 4-number ticket.
+
+# Target: pi(ticket) is proportional to exp(score(ticket) / T), where score is one of the
+# ticket scores (frequency sum, co-occurrence, recency, 4-subset history count),
+# standardised over all C(49, 4) tickets so temperatures mean the same thing for every score.
+
+# Proposal: swap one number of the ticket for a number it doesn't hold (symmetric, so the
+# acceptance probability is just min(1, pi(new) / pi(old))).
+
+# Many chains run side by side at each temperature of a ladder; every few steps
+# neighbouring temperatures try to exchange states (replica exchange), which lets the cold
+# chains escape local optima.
+
+# We report acceptance rates, the autocorrelation of the cold chains' score and the
+# effective samples per second, and predict the tickets the cold chains visit most.
+
+import time
+import numpy as np
+
+from combos import colex_rank
+from draw_store import load_draws
+from subset_table import TABLE_SIZE
+from ticket_scores import all_tickets, get_scorer
+from tickets import random_numbers, repair_duplicates, replace_one
+
+def load_lottery_data(file_path):
+    return load_draws(file_path)
+
+def get_filtered_draws(data, draw_time):
+    return data.filter_time(draw_time)
+
+def standardized_scores(draws, scorer="frequency"):
+    """Score of every ticket (indexed by colex rank), scaled to mean 0 and standard deviation 1."""
+    key = ("standardized_scores", scorer)
+    if key not in draws.cache:
+        scores = get_scorer(scorer)(draws, all_tickets())
+        spread = scores.std()
+        draws.cache[key] = (scores - scores.mean()) / (spread if spread > 0 else 1.0)
+    return draws.cache[key]
+
+def integrated_autocorrelation_time(trace, max_lag=None):
+    """Mean integrated autocorrelation time of the columns of a (steps, chains) trace."""
+    steps = trace.shape[0]
+    centered = trace - trace.mean(axis=0)
+    size = 1 << (2 * steps - 1).bit_length()
+    spectrum = np.fft.rfft(centered, n=size, axis=0)
+    acf = np.fft.irfft(spectrum * np.conj(spectrum), n=size, axis=0)[:steps].mean(axis=1)
+    if acf[0] <= 0:
+        return 1.0
+    acf /= acf[0]
+    # Sokal's automatic window: stop once the lag exceeds 5 x the running estimate
+    tau = 1.0
+    for lag in range(1, max_lag or steps):
+        tau += 2 * acf[lag]
+        if lag >= 5 * tau:
+            break
+    return max(tau, 1.0)
+
+def metropolis_hastings(draws, scorer="frequency", chains=256, steps=10000, temperatures=(0.25, 0.5, 1.0, 2.0),
+                        swap_interval=10, burn_in=0.1, seed=None):
+    """Run `chains` chains at every temperature for `steps` steps.
+
+    Returns (visits, stats): visits counts how often the cold chains sat on
+    each ticket after burn-in (indexed by colex rank); stats holds the
+    acceptance rates, swap rates, autocorrelation time and throughput.
+    """
+    rng = np.random.default_rng(seed)
+    scores = standardized_scores(draws, scorer)
+    betas = 1.0 / np.asarray(temperatures, dtype=np.float64)
+    levels = len(betas)
+    beta = np.repeat(betas, chains)  # row r runs at temperature r // chains
+
+    states = repair_duplicates(random_numbers((levels * chains, 4), rng).astype(np.uint8), rng)
+    current = scores[colex_rank(states)]
+    accepted = np.zeros(levels * chains)
+    swaps_tried = np.zeros(max(levels - 1, 0))
+    swaps_done = np.zeros(max(levels - 1, 0))
+
+    burn = int(steps * burn_in)
+    visits = np.zeros(TABLE_SIZE, dtype=np.int64)
+    pending = []
+    trace = np.empty((steps - burn, chains), dtype=np.float32)
+    started = time.perf_counter()
+
+    for step in range(steps):
+        # Propose: swap one number; accept with min(1, exp(beta * (new - old)))
+        proposal = replace_one(states.copy(), rng)
+        proposed = scores[colex_rank(proposal)]
+        accept = np.log(rng.random(len(states))) < beta * (proposed - current)
+        states[accept] = proposal[accept]
+        current[accept] = proposed[accept]
+        accepted += accept
+
+        # Replica exchange between neighbouring temperatures, alternating even/odd pairs
+        if levels > 1 and step % swap_interval == 0:
+            for low in range((step // swap_interval) % 2, levels - 1, 2):
+                cold = np.arange(low * chains, (low + 1) * chains)
+                hot = cold + chains
+                swap = np.log(rng.random(chains)) < (betas[low] - betas[low + 1]) * (current[hot] - current[cold])
+                cold, hot = cold[swap], hot[swap]
+                states[cold], states[hot] = states[hot], states[cold].copy()
+                current[cold], current[hot] = current[hot], current[cold].copy()
+                swaps_tried[low] += chains
+                swaps_done[low] += len(cold)
+
+        if step >= burn:
+            trace[step - burn] = current[:chains]
+            pending.append(colex_rank(states[:chains]))
+            if len(pending) >= 64:
+                visits += np.bincount(np.concatenate(pending), minlength=TABLE_SIZE)
+                pending = []
+
+    if pending:
+        visits += np.bincount(np.concatenate(pending), minlength=TABLE_SIZE)
+
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    tau = integrated_autocorrelation_time(trace) if len(trace) > 1 else 1.0
+    effective = float(trace.size / tau)
+    stats = {
+        "acceptance": (accepted.reshape(levels, chains).mean(axis=1) / steps).tolist(),
+        "swap_acceptance": np.divide(swaps_done, swaps_tried, out=np.zeros_like(swaps_done), where=swaps_tried > 0).tolist(),
+        "autocorrelation_time": float(tau),
+        "effective_samples": effective,
+        "steps_per_sec": levels * chains * steps / elapsed,
+        "effective_samples_per_sec": effective / elapsed,
+    }
+    return visits, stats
+
+def metropolis_hastings_predict(draws, num_predictions=5, scorer="frequency", chains=256, steps=10000, seed=None, **options):
+    visits, _ = metropolis_hastings(draws, scorer, chains, steps, seed=seed, **options)
+    best = np.argpartition(-visits, num_predictions - 1)[:num_predictions]
+    best = best[np.argsort(-visits[best], kind="stable")]
+    return all_tickets()[best].tolist()
+
+def main():
+    file_path = "merged_uk_49s_results.json"
+    lottery_data = load_lottery_data(file_path)
+
+    # User input
+    time_filter = input("Enter draw time (lunchtime/teatime): ").strip().lower()
+    num_predictions = int(input("How many 4-number predictions would you like to generate? "))
+
+    dataset = get_filtered_draws(lottery_data, time_filter)
+
+    visits, stats = metropolis_hastings(dataset)
+    best = np.argsort(-visits, kind="stable")[:num_predictions]
+
+    print(f"\n🔥 {num_predictions} Predictions using Metropolis-Hastings with parallel tempering:")
+    for pred in all_tickets()[best].tolist():
+        print(pred)
+
+    print("\nAcceptance per temperature:", [round(rate, 3) for rate in stats["acceptance"]])
+    print("Swap acceptance per neighbouring pair:", [round(rate, 3) for rate in stats["swap_acceptance"]])
+    print(f"Autocorrelation time: {stats['autocorrelation_time']:.1f} steps, "
+          f"{stats['steps_per_sec']:,.0f} steps/sec, {stats['effective_samples_per_sec']:,.0f} effective samples/sec")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+# Running totals over the whole draw history, kept on disk next to the draw
+# store and topped up from just the new rows when draws are appended.
+#
+# Every table is split by draw time (lunchtime/teatime) and, for the number
+# counts, by plane (main balls vs bonus ball), so the same totals serve the
+# full history, either time slot, and "with or without the bonus ball":
+#
+#   numbers      (plane, time, number)          draws holding the number
+#   dom          (plane, time, day of month, number)
+#   dow          (plane, time, day of week, number)
+#   pairs        (time, number, number)         draws holding both numbers
+#   transitions  (time, number, next number)    steps within each sorted draw
+#   last_seen    (time, number)                 last row holding the number, -1 = never
+#
+# All of it lives in one flat int64 array (~140 KB), so loading, topping up
+# and saving cost the same however long the history gets.
+
+import numpy as np
+
+from draw_store import load_derived, save_derived
+from incidence import NUMBERS, Incidence
+
+AGGREGATE_NAME = "aggregates"
+TIMES = 2
+DAYS_OF_MONTH = 32  # index = day of month, 0 unused
+DAYS_OF_WEEK = 7
+
+LAYOUT = (
+    ("numbers", (2, TIMES, NUMBERS)),
+    ("dom", (2, TIMES, DAYS_OF_MONTH, NUMBERS)),
+    ("dow", (2, TIMES, DAYS_OF_WEEK, NUMBERS)),
+    ("pairs", (TIMES, NUMBERS, NUMBERS)),
+    ("transitions", (TIMES, NUMBERS, NUMBERS)),
+    ("last_seen", (TIMES, NUMBERS)),
+)
+SIZE = sum(int(np.prod(shape)) for _, shape in LAYOUT)
+
+
+def _views(flat):
+    """Name -> shaped view into the flat array (writes go through to it)."""
+    views, offset = {}, 0
+    for name, shape in LAYOUT:
+        size = int(np.prod(shape))
+        views[name] = flat[offset:offset + size].reshape(shape)
+        offset += size
+    return views
+
+
+def empty_aggregates():
+    flat = np.zeros(SIZE, dtype=np.int64)
+    _views(flat)["last_seen"][:] = -1
+    return flat
+
+
+def transition_matrix(numbers):
+    """(49, 49) counts of number -> next number within each draw, balls sorted ascending."""
+    numbers = np.sort(np.asarray(numbers, dtype=np.int64), axis=1)
+    current, following = numbers[:, :-1].ravel(), numbers[:, 1:].ravel()
+    seen = current > 0  # empty slots sort first and are skipped
+    flat = (current[seen] - 1) * NUMBERS + following[seen] - 1
+    return np.bincount(flat, minlength=NUMBERS * NUMBERS).reshape(NUMBERS, NUMBERS)
+
+
+def _grouped(plane, keys, groups):
+    rows, cols = np.nonzero(plane)
+    return np.bincount(keys[rows] * NUMBERS + cols, minlength=groups * NUMBERS).reshape(-1, NUMBERS)
+
+
+def add_draws(flat, draws, start=0):
+    """Add rows start: of a DrawTable into the flat aggregate array, in place."""
+    table = _views(flat)
+    new = draws[start:]
+    if not len(new):
+        return flat
+    incidence = Incidence.from_draws(new)
+    times = incidence.times.astype(np.int64)
+    numbers = np.asarray(new.numbers)
+
+    for p, plane in enumerate((incidence.main, incidence.bonus)):
+        table["numbers"][p] += _grouped(plane, times, TIMES)
+        table["dom"][p] += _grouped(plane, times * DAYS_OF_MONTH + incidence.dom, TIMES * DAYS_OF_MONTH).reshape(TIMES, DAYS_OF_MONTH, NUMBERS)
+        table["dow"][p] += _grouped(plane, times * DAYS_OF_WEEK + incidence.dow, TIMES * DAYS_OF_WEEK).reshape(TIMES, DAYS_OF_WEEK, NUMBERS)
+
+    balls = incidence.balls
+    for t in range(TIMES):
+        rows = times == t
+        if not rows.any():
+            continue
+        plane = balls[rows].astype(np.float32)
+        table["pairs"][t] += (plane.T @ plane).round().astype(np.int64)
+        table["transitions"][t] += transition_matrix(numbers[rows])
+        # last row (of the whole table) in this slot holding each number
+        latest = np.where(plane.any(axis=0), len(plane) - 1 - np.argmax(plane[::-1], axis=0), -1)
+        positions = np.flatnonzero(rows) + start
+        table["last_seen"][t] = np.where(latest >= 0, positions[np.maximum(latest, 0)], table["last_seen"][t])
+    return flat
+
+
+class Aggregates:
+    """Read side of the aggregate array, optionally restricted to one draw time."""
+
+    def __init__(self, flat, rows, time=None):
+        self.flat = flat
+        self.rows = rows
+        self.time = time
+        self.tables = _views(flat)
+
+    def _times(self, array):
+        # sum over the time axis, or pick one slot
+        return array.sum(axis=0) if self.time is None else array[self.time]
+
+    def for_time(self, time):
+        return Aggregates(self.flat, self.rows, time)
+
+    def counts(self, bonus=True):
+        """Per-number counts (index 0 = ball 1), like Incidence.counts()."""
+        planes = self.tables["numbers"] if bonus else self.tables["numbers"][:1]
+        return self._times(planes.sum(axis=0))
+
+    def dom_counts(self, bonus=True):
+        """(32 x 49) counts per day of month."""
+        planes = self.tables["dom"] if bonus else self.tables["dom"][:1]
+        return self._times(planes.sum(axis=0))
+
+    def dow_counts(self, bonus=True):
+        """(7 x 49) counts per day of week, Monday first."""
+        planes = self.tables["dow"] if bonus else self.tables["dow"][:1]
+        return self._times(planes.sum(axis=0))
+
+    def cooccurrence(self):
+        """(49 x 49) draws holding both numbers (bonus included); diagonal = counts()."""
+        return self._times(self.tables["pairs"])
+
+    def transitions(self):
+        return self._times(self.tables["transitions"])
+
+    def last_seen(self):
+        """Row of the most recent draw holding each number, -1 if it never came out."""
+        last = self.tables["last_seen"]
+        return last.max(axis=0) if self.time is None else last[self.time].copy()
+
+    def draws_since(self):
+        """How many draws ago each number last came out (rows - 1 - last_seen)."""
+        return self.rows - 1 - self.last_seen()
+
+
+def aggregates_of(draws):
+    """Aggregates for a DrawTable, loaded from disk and topped up with any new draws."""
+    if AGGREGATE_NAME in draws.cache:
+        return draws.cache[AGGREGATE_NAME]
+
+    flat, rows = load_derived(draws, AGGREGATE_NAME)
+    if flat is None or flat.shape != (SIZE,):
+        flat, rows = empty_aggregates(), 0
+    if rows < len(draws):
+        add_draws(flat, draws, rows)
+        save_derived(draws, AGGREGATE_NAME, flat)
+
+    aggregates = Aggregates(flat, len(draws))
+    draws.cache[AGGREGATE_NAME] = aggregates
+    return aggregates
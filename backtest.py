@@ -0,0 +1,431 @@
+# Walk-forward backtest of the prediction methods.
+#
+# Every draw t (after a warm-up) is predicted from the draws before it and
+# the tickets are scored against draw t itself. Nothing is retrained: the
+# tables the methods learn from (per-slot number counts, transitions, 4-set
+# counts, pair counts, calendar cubes, sliding-window counts) are running
+# totals that gain one row per step, and sliding windows also drop the rows
+# that fall out of them. As in the scripts, each method learns from the
+# draws of the target's own draw time; the statistical signals use the whole
+# history like 0statistical-analysis.py does.
+#
+# Targets are split into contiguous shards that run in a process pool. A
+# shard builds its tables for the rows before its first target in one bulk
+# pass, then steps. Every (target, method) gets its own random stream from
+# the seed, so results don't depend on how the targets were sharded.
+# Tickets are scored at the end as bitmasks: hits[t, i] is how many main
+# balls of draw t ticket i holds, and bonus[t, i] whether it holds the bonus.
+#
+#   python backtest.py [methods...]
+
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+
+import numpy as np
+from tabulate import tabulate
+
+from aggregates import DAYS_OF_MONTH, DAYS_OF_WEEK, TIMES, transition_matrix
+from calendar_cubes import CalendarCubes
+from combos import colex_rank, numbers_to_masks, popcount
+from cooccurrence import Cooccurrence
+from draw_store import TIME_NAMES, DrawTable, load_draws
+from incidence import MAIN_BALLS, NUMBERS, Incidence
+from sampler import TicketSampler
+from scripts import load_script
+from signals import DEFAULT_SIGNALS, SignalEngine, first_seen
+from subset_table import TABLE_SIZE, build_counts
+from ticket_scores import MISSING_PROBABILITY
+
+markov = load_script("3markov-chain-monte-carlo.py")
+smc = load_script("4sequential-monte-carlo.py")
+genetic = load_script("7genetic-monte-carlo.py")
+
+WARMUP = 200  # earlier draws of the same draw time a target needs to be scored
+SHARD_TARGETS = 1024
+SEQUENCE_LENGTH = 4
+
+METHODS = ("random", "basic", "importance", "markov", "smc", "integration", "bootstrap", "genetic", "signals")
+
+# what each method needs kept up to date
+TABLES = {
+    "random": (),
+    "basic": ("counts",),
+    "importance": ("counts",),
+    "markov": ("transitions",),
+    "smc": ("counts",),
+    "integration": ("counts",),
+    "bootstrap": ("counts",),
+    "genetic": ("counts", "subsets"),
+    "signals": ("counts", "calendar", "pairs"),
+}
+
+# the scripts' defaults, except a shorter GA run: 100 generations at every
+# one of ~15k steps would dominate the whole backtest
+DEFAULT_OPTIONS = {
+    "random": {"num_predictions": 5},
+    "basic": {},
+    "importance": {"num_predictions": 5},
+    "markov": {"num_predictions": 5},
+    "smc": {"num_predictions": 5, "num_particles": 100, "iterations": 5},
+    "integration": {"num_predictions": 5},
+    "bootstrap": {"num_predictions": 5, "bootstrap_iterations": 1000},
+    "genetic": {"num_predictions": 5, "generations": 20, "population_size": 100},
+    "signals": {"num_predictions": 5, "signals": DEFAULT_SIGNALS},
+}
+
+
+class RunningTables:
+    """Per-slot totals over the history rows [lo, hi), moved forward a row range at a time.
+
+    counts (2, 49) and the calendar cubes (2, 32, 49) / (2, 7, 49) support
+    dropping rows as well, for sliding windows; pairs (49, 49, all draws),
+    transitions (2, 49, 49) and the 4-set table (2, 211876) only grow.
+    """
+
+    def __init__(self, incidence, numbers, tables=("counts",)):
+        self.incidence = incidence
+        self.numbers = numbers
+        self.tables = set(tables)
+        self.lo = self.hi = 0
+        self.counts = np.zeros((TIMES, NUMBERS), dtype=np.int64)
+        if "calendar" in self.tables:
+            self.dom = np.zeros((TIMES, DAYS_OF_MONTH, NUMBERS), dtype=np.int64)
+            self.dow = np.zeros((TIMES, DAYS_OF_WEEK, NUMBERS), dtype=np.int64)
+        if "pairs" in self.tables:
+            self.pairs = np.zeros((NUMBERS, NUMBERS), dtype=np.int64)
+        if "transitions" in self.tables:
+            self.transitions = np.zeros((TIMES, NUMBERS, NUMBERS), dtype=np.int64)
+        if "subsets" in self.tables:
+            self.subsets = np.zeros((TIMES, TABLE_SIZE), dtype=np.uint32)
+
+    def _apply(self, lo, hi, sign):
+        if hi <= lo:
+            return
+        incidence = self.incidence
+        balls = incidence.balls[lo:hi].astype(np.int64) * sign
+        times = incidence.times[lo:hi].astype(np.intp)
+        np.add.at(self.counts, times, balls)
+        if "calendar" in self.tables:
+            np.add.at(self.dom, (times, incidence.dom[lo:hi].astype(np.intp)), balls)
+            np.add.at(self.dow, (times, incidence.dow[lo:hi].astype(np.intp)), balls)
+        if sign < 0:
+            return
+        if "pairs" in self.tables:
+            plane = incidence.balls[lo:hi].astype(np.float32)
+            self.pairs += (plane.T @ plane).round().astype(np.int64)
+        for t in range(TIMES):
+            rows = lo + np.flatnonzero(times == t)
+            if not len(rows):
+                continue
+            if "transitions" in self.tables:
+                self.transitions[t] += transition_matrix(self.numbers[rows])
+            if "subsets" in self.tables:
+                build_counts(self.numbers[rows], self.subsets[t])
+
+    def advance(self, hi):
+        """Add the rows up to (not including) hi."""
+        self._apply(self.hi, hi, 1)
+        self.hi = max(self.hi, hi)
+
+    def trim(self, lo):
+        """Drop the rows before lo."""
+        self._apply(self.lo, lo, -1)
+        self.lo = max(self.lo, lo)
+
+    def slide(self, lo, hi):
+        """Move a window forward to rows [lo, hi)."""
+        if lo >= self.hi:
+            # nothing in common with what we hold: empty it and jump
+            self.trim(self.hi)
+            self.lo = self.hi = lo
+        self.advance(hi)
+        self.trim(lo)
+
+
+class Step:
+    """What the methods see when predicting draw `target`: tables over the draws before it."""
+
+    def __init__(self, backtest, target, tables, windows):
+        self.target = target
+        self.time = int(backtest.times[target])
+        self.day = int(backtest.dates[target])
+        self.tables = tables
+        self.windows = windows
+        self.backtest = backtest
+
+    def counts(self):
+        return self.tables.counts[self.time]
+
+    def slot_rows(self):
+        """Rows of the earlier draws with the target's draw time."""
+        rows = self.backtest.slot_rows[self.time]
+        return rows[:np.searchsorted(rows, self.target)]
+
+
+class HistorySignalEngine(SignalEngine):
+    """SignalEngine reading the running tables of a Step instead of a DrawTable."""
+
+    def __init__(self, step):
+        super().__init__(None, step.day)
+        self.step = step
+
+    def _window_cubes(self, window):
+        tables = self.step.tables if window is None else self.step.windows[window]
+        return self._cached(("cubes", window), lambda: CalendarCubes(tables.dom, tables.dow))
+
+    def _frequency_counts(self, population, window):
+        tables = self.step.tables if window is None else self.step.windows[window]
+        return tables.counts.sum(axis=0) if population is None else tables.counts[population].copy()
+
+    def _first_seen(self, population, window):
+        tables = self.step.tables if window is None else self.step.windows[window]
+        return first_seen(tables.numbers, tables.incidence.times, tables.lo, tables.hi, population)
+
+
+# Methods: predict(step, rng, **options) -> (tickets, 4) array of sorted balls
+
+def predict_random(step, rng, num_predictions=5):
+    return TicketSampler(np.ones(NUMBERS), SEQUENCE_LENGTH).sample(num_predictions, rng)
+
+
+def predict_basic(step, rng):
+    # one ticket, like the script's "Play numbers"
+    return TicketSampler(step.counts(), SEQUENCE_LENGTH).sample(1, rng)
+
+
+def predict_importance(step, rng, num_predictions=5):
+    return TicketSampler(step.counts(), SEQUENCE_LENGTH).sample(num_predictions, rng)
+
+
+def predict_markov(step, rng, num_predictions=5):
+    return markov.MarkovChain(step.tables.transitions[step.time]).sample(num_predictions, SEQUENCE_LENGTH, rng)
+
+
+def predict_smc(step, rng, num_predictions=5, **options):
+    return np.array(smc.smc_from_counts(step.counts(), num_predictions, sequence_length=SEQUENCE_LENGTH, rng=rng, **options))
+
+
+def top_sum_tickets(values, num_predictions=5, k=SEQUENCE_LENGTH):
+    """The num_predictions k-sets with the largest sum of per-number values, best first.
+
+    They only ever use the k + num_predictions - 1 best numbers, so only
+    those combinations are scored, instead of all C(49, k).
+    """
+    pool = np.argsort(-values, kind="stable")[:k + num_predictions - 1]
+    candidates = np.sort(np.array(list(combinations(pool + 1, k))), axis=1)
+    scores = values[candidates - 1].sum(axis=1)
+    order = np.lexsort((colex_rank(candidates), -scores))[:num_predictions]
+    return candidates[order]
+
+
+def predict_integration(step, rng, num_predictions=5):
+    # the exact mode of 5monte-carlo-integration.py with the frequency scorer
+    counts = step.counts()
+    shares = np.where(counts > 0, counts / max(counts.sum(), 1), MISSING_PROBABILITY)
+    return top_sum_tickets(shares, num_predictions)
+
+
+def predict_bootstrap(step, rng, num_predictions=5, bootstrap_iterations=1000, top=20):
+    # resample earlier draws, take the 20 numbers seen most in the resample
+    # and play random 4-sets of them, as bootstrap_predict does
+    rows = step.slot_rows()
+    picks = rows[rng.integers(len(rows), size=bootstrap_iterations)]
+    counts = step.backtest.incidence.balls[picks].sum(axis=0, dtype=np.int64)
+    drawn = np.flatnonzero(counts)
+    best = drawn[np.argsort(-counts[drawn], kind="stable")[:top]] + 1
+    chosen = np.argsort(rng.random((num_predictions, len(best))), axis=1)[:, :SEQUENCE_LENGTH]
+    return np.sort(best[chosen], axis=1)
+
+
+def predict_genetic(step, rng, num_predictions=5, generations=20, population_size=100):
+    subsets = step.tables.subsets[step.time]
+    fitness = lambda population: subsets[colex_rank(np.asarray(population, dtype=np.int64))].astype(np.int64)
+    weights = step.counts()
+    population = genetic.random_individuals(weights, population_size, rng)
+    population = genetic.evolve_with(population, fitness, weights, generations, rng)
+    population = genetic.deduplicate(population)
+    return genetic.select_fittest(population, fitness(population), num_predictions)
+
+
+def predict_signals(step, rng, num_predictions=5, signals=DEFAULT_SIGNALS):
+    # the daily suggestion for the target's draw time, each number played
+    # with its 3 most frequent partners
+    votes = HistorySignalEngine(step).evaluate(signals).for_time(step.time)
+    play_numbers = [number for number, _ in votes.top(num_predictions)]
+    partners = Cooccurrence(step.tables.pairs, step.target).partners(play_numbers, SEQUENCE_LENGTH - 1)[0]
+    return np.sort(np.column_stack([play_numbers, partners]), axis=1)
+
+
+PREDICTORS = {name: globals()["predict_" + name] for name in METHODS}
+
+
+# Sharded walk-forward run
+
+_backtest = None
+
+
+class _History:
+    """The history a worker replays: columns, incidence and each slot's row numbers."""
+
+    def __init__(self, dates, times, numbers):
+        self.dates, self.times, self.numbers = dates, times, numbers
+        self.incidence = Incidence.from_draws(DrawTable(dates, times, numbers))
+        self.slot_rows = [np.flatnonzero(times == t) for t in range(TIMES)]
+
+
+def _init_backtest_worker(dates, times, numbers):
+    global _backtest
+    _backtest = _History(dates, times, numbers)
+
+
+def _window_start(dates, day, window, hi):
+    # first row in the `window` days up to `day` (dates > day - window)
+    return int(np.searchsorted(dates[:hi], day - window, side="right"))
+
+
+def _backtest_shard(targets, methods, options, seed):
+    backtest = _backtest
+    needed = set()
+    for method in methods:
+        needed.update(TABLES[method])
+    tables = RunningTables(backtest.incidence, backtest.numbers, needed)
+    windows = {}
+    if "signals" in methods:
+        for window in {s.window for s in options["signals"]["signals"] if s.window is not None}:
+            windows[window] = RunningTables(backtest.incidence, backtest.numbers, ("counts", "calendar"))
+
+    tickets = {method: [] for method in methods}
+    seconds = dict.fromkeys(methods, 0.0)
+    for target in targets.tolist():
+        tables.advance(target)
+        step = Step(backtest, target, tables, windows)
+        for window, running in windows.items():
+            running.slide(_window_start(backtest.dates, step.day, window, target), target)
+        for method in methods:
+            rng = np.random.default_rng([seed, target, METHODS.index(method)])
+            started = time.perf_counter()
+            tickets[method].append(np.asarray(PREDICTORS[method](step, rng, **options[method]), dtype=np.uint8))
+            seconds[method] += time.perf_counter() - started
+    return {method: _stack(rows, options[method].get("num_predictions", 5)) for method, rows in tickets.items()}, seconds
+
+
+def _stack(rows, width):
+    # a method may come up with fewer distinct tickets than asked for (e.g.
+    # collapsed SMC particles); the missing ones are empty and don't count.
+    # Every shard pads to the requested count, so shards stack together.
+    stacked = np.zeros((len(rows), width, SEQUENCE_LENGTH), dtype=np.uint8)
+    for i, row in enumerate(rows):
+        stacked[i, :len(row)] = row
+    return stacked
+
+
+class BacktestResult:
+    """Tickets and hit matrices per method for the scored targets (row numbers of the history)."""
+
+    def __init__(self, targets, dates, times, numbers, tickets, seconds, wall):
+        self.targets = targets
+        self.dates = dates[targets]
+        self.times = times[targets]
+        self.tickets = tickets
+        self.seconds = seconds
+        self.wall = wall
+        main_masks = numbers_to_masks(numbers[targets, :MAIN_BALLS])
+        bonus_masks = numbers_to_masks(numbers[targets, MAIN_BALLS:])
+        self.hits, self.bonus, self.played = {}, {}, {}
+        for method, played in tickets.items():
+            masks = numbers_to_masks(played.reshape(-1, played.shape[-1])).reshape(played.shape[:2])
+            self.played[method] = masks != 0
+            self.hits[method] = popcount(masks & main_masks[:, None]).astype(np.int8)
+            self.bonus[method] = (masks & bonus_masks[:, None]) != 0
+
+    def hit_counts(self, method):
+        """(targets, 5) played tickets per number of main-ball hits, 0 to 4."""
+        hits, played = self.hits[method].astype(np.intp), self.played[method]
+        rows = np.repeat(np.arange(len(hits)), hits.shape[1])
+        counts = np.zeros((len(hits), SEQUENCE_LENGTH + 1), dtype=np.int64)
+        np.add.at(counts, (rows[played.ravel()], hits[played]), 1)
+        return counts
+
+    def summary(self):
+        # a random 4-set holds 4 * 6 / 49 main balls on average
+        expected = SEQUENCE_LENGTH * MAIN_BALLS / NUMBERS
+        rows = []
+        for method, hits in self.hits.items():
+            distribution = self.hit_counts(method).sum(axis=0)
+            played = self.played[method]
+            mean = float(hits[played].mean()) if played.any() else 0.0
+            rows.append({
+                "method": method,
+                "tickets": int(played.sum()),
+                "mean hits": round(mean, 4),
+                "vs random": round(mean / expected, 4),
+                **{f"{k} hits": int(distribution[k]) for k in range(2, SEQUENCE_LENGTH + 1)},
+                "bonus": int(self.bonus[method].sum()),
+                "ms/draw": round(1000 * self.seconds[method] / max(len(self.targets), 1), 2),
+            })
+        return rows
+
+
+def backtest(draws, methods=METHODS, start=None, end=None, warmup=WARMUP, options=None, seed=None,
+             processes=None, shard_targets=SHARD_TARGETS):
+    """Walk-forward backtest of `methods` over draws[start:end] of a DrawTable.
+
+    Targets with fewer than `warmup` earlier draws of their draw time are
+    skipped. options maps a method to keyword arguments overriding
+    DEFAULT_OPTIONS. Returns a BacktestResult.
+    """
+    for method in methods:
+        if method not in PREDICTORS:
+            raise ValueError(f"Unknown method: {method!r} (expected one of {METHODS})")
+    merged = {method: dict(DEFAULT_OPTIONS[method], **(options or {}).get(method, {})) for method in methods}
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+
+    dates, times, numbers = (np.asarray(column) for column in (draws.dates, draws.times, draws.numbers))
+    # how many earlier draws of its own time each row has
+    slot_position = np.zeros(len(times), dtype=np.int64)
+    for t in range(TIMES):
+        rows = times == t
+        slot_position[rows] = np.arange(np.count_nonzero(rows))
+    targets = np.arange(len(dates))[start:end]
+    targets = targets[slot_position[targets] >= warmup]
+
+    shards = [targets[i:i + shard_targets] for i in range(0, len(targets), shard_targets)]
+    workers = min(processes or os.cpu_count() or 1, len(shards)) if shards else 1
+    started = time.perf_counter()
+    if workers == 1:
+        _init_backtest_worker(dates, times, numbers)
+        results = [_backtest_shard(shard, methods, merged, seed) for shard in shards]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_backtest_worker,
+                                 initargs=(dates, times, numbers)) as pool:
+            results = list(pool.map(_backtest_shard, shards, [methods] * len(shards),
+                                    [merged] * len(shards), [seed] * len(shards)))
+    wall = time.perf_counter() - started
+
+    tickets, seconds = {}, dict.fromkeys(methods, 0.0)
+    for method in methods:
+        parts = [shard_tickets[method] for shard_tickets, _ in results]
+        tickets[method] = np.concatenate(parts) if parts else np.zeros((0, 1, SEQUENCE_LENGTH), dtype=np.uint8)
+    for _, shard_seconds in results:
+        for method, spent in shard_seconds.items():
+            seconds[method] += spent
+    return BacktestResult(targets, dates, times, numbers, tickets, seconds, wall)
+
+
+def main():
+    file_path = "merged_uk_49s_results.json"
+    methods = tuple(sys.argv[1:]) or METHODS
+    result = backtest(load_draws(file_path), methods)
+
+    print(f"\nWalk-forward backtest: {len(result.targets)} draws "
+          f"({', '.join(f'{int(np.count_nonzero(result.times == t))} {name}' for t, name in enumerate(TIME_NAMES))}) "
+          f"in {result.wall:.1f}s")
+    print(tabulate(result.summary(), headers="keys", tablefmt="grid"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,471 @@
+# Benchmarks for the loaders and estimators, on the real history and on
+# synthetic histories 10x, 100x and 1000x as long.
+#
+# A synthetic history has the real one's shape: two draws a day (lunchtime,
+# teatime) running back from the real last draw, seven distinct balls per
+# draw, picked with the real per-number frequencies as weights. Histories
+# are written once as memory-mapped columns under .bench-data/ and reused
+# until the real history's store version changes.
+# Two draws a day only fit the calendar (year 1 onwards, see
+# draw_store.date_to_day) up to ~75x the real history, so load_lottery_data,
+# which parses dates from JSON, is skipped at larger scales; everything else
+# reads the columns directly.
+#
+# Every (case, scale) runs in a fresh process, so derived tables are built
+# from scratch, the peak RSS is the case's own and an out-of-memory kill or
+# timeout only fails that case. A case is timed twice on the same table:
+# "cold" (the first call, building whatever it caches, which is what one run
+# of a script pays) and "warm" (a second call). Throughput is from the cold
+# time: draws/s is history rows consumed, tickets/s is tickets produced or
+# scored.
+#
+# Each case runs --repeat times, each in its own process, and the best run
+# is kept. Results are saved as JSON. With --baseline, a cold time or peak
+# RSS more than --threshold above the baseline's is reported, provided it
+# also grew by more than MIN_SECONDS / MIN_RSS_MB, and the exit status is 1.
+#
+#   python benchmark.py [--scales 1 10 100 1000] [--cases ...] [--baseline FILE]
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import sys
+import time
+from datetime import date, datetime
+
+import numpy as np
+from tabulate import tabulate
+
+from draw_store import BALLS_PER_DRAW, EPOCH_ORDINAL, TIME_NAMES, DrawTable, load_draws, save_array, write_json_array
+from incidence import NUMBERS
+import scraper
+from scripts import HERE, load_script
+
+DATA_FILE = os.path.join(HERE, "merged_uk_49s_results.json")
+DATA_DIR = os.path.join(HERE, ".bench-data")
+OUTPUT = "benchmark-results.json"
+
+SCALES = (1, 10, 100, 1000)
+THRESHOLD = 0.2  # 20% slower / bigger than the baseline counts as a regression
+# growth below these is timer / allocator noise, whatever the ratio
+MIN_SECONDS = 0.05
+MIN_RSS_MB = 16
+REPEAT = 3  # fresh-process runs per case; the best one is reported
+TIMEOUT = 1800  # seconds per case
+CHUNK_ROWS = 1 << 18  # synthetic rows generated at a time
+FIRST_DAY = date(1, 1, 1).toordinal() - EPOCH_ORDINAL
+FITNESS_INDIVIDUALS = 1000
+
+
+# histories
+
+class History:
+    """One benchmark history: memory-mapped columns, plus its JSON where the dates allow one."""
+
+    def __init__(self, directory, scale):
+        self.directory = directory
+        self.scale = scale
+        self.json_path = os.path.join(directory, "draws.json")
+        if not os.path.exists(self.json_path):
+            self.json_path = None
+
+    def columns(self):
+        return [np.load(os.path.join(self.directory, name + ".npy"), mmap_mode="r")
+                for name in ("dates", "times", "numbers")]
+
+    def table(self):
+        # no store_dir or version: derived tables are rebuilt, not read back from disk
+        return DrawTable(*self.columns())
+
+    def __len__(self):
+        return len(self.columns()[0])
+
+
+def _write_columns(directory, dates, times, numbers):
+    os.makedirs(directory, exist_ok=True)
+    save_array(os.path.join(directory, "dates.npy"), np.asarray(dates))
+    save_array(os.path.join(directory, "times.npy"), np.asarray(times))
+    save_array(os.path.join(directory, "numbers.npy"), np.asarray(numbers))
+
+
+def synthetic_numbers(rows, weights, rng):
+    """(rows, 7) distinct balls per draw, each draw a weighted sample without replacement."""
+    log_weights = np.log(weights / weights.sum())
+    numbers = np.empty((rows, BALLS_PER_DRAW), dtype=np.uint8)
+    for lo in range(0, rows, CHUNK_ROWS):
+        n = min(CHUNK_ROWS, rows - lo)
+        # Gumbel top-k: the k largest perturbed log-weights are a weighted sample without replacement
+        keys = log_weights + rng.gumbel(size=(n, NUMBERS))
+        numbers[lo:lo + n] = np.argpartition(-keys, BALLS_PER_DRAW - 1, axis=1)[:, :BALLS_PER_DRAW] + 1
+    return numbers
+
+
+def synthetic_calendar(rows, last_day):
+    """Day numbers and draw times for `rows` draws, two a day, the newest a teatime draw on last_day."""
+    back = np.arange(rows - 1, -1, -1, dtype=np.int64)  # 0 = newest
+    dates = (last_day - back // 2).astype(np.int32)
+    times = (1 - back % 2).astype(np.uint8)
+    return dates, times
+
+
+def prepare_history(scale, data_file=DATA_FILE, data_dir=DATA_DIR, seed=0):
+    """The History for a scale, written under data_dir on first use.
+
+    Every scale is built from the real history, so a built directory is
+    only reused while the store version of data_file (and the seed) is the
+    one it was built from; otherwise it is rebuilt.
+    """
+    directory = os.path.join(data_dir, "x%d" % scale)
+    real = load_draws(data_file)
+    source = {"version": real.version, "seed": seed}
+    stamp = os.path.join(directory, "source.json")
+    try:
+        with open(stamp, "r") as f:
+            if json.load(f) == source:
+                return History(directory, scale)
+    except (OSError, ValueError):
+        pass
+    shutil.rmtree(directory, ignore_errors=True)
+
+    if scale == 1:
+        _write_columns(directory, real.dates, real.times, real.numbers)
+        os.symlink(os.path.abspath(data_file), os.path.join(directory, "draws.json"))
+    else:
+        rows = scale * len(real)
+        counts = np.bincount(np.asarray(real.numbers).ravel(), minlength=NUMBERS + 1)[1:]
+        dates, times = synthetic_calendar(rows, int(real.dates[-1]))
+        numbers = synthetic_numbers(rows, counts.astype(np.float64), np.random.default_rng(seed))
+        _write_columns(directory, dates, times, numbers)
+        if dates[0] >= FIRST_DAY:
+            table = DrawTable(dates, times, numbers)
+            # newest first, like the merged file
+            write_json_array(os.path.join(directory, "draws.json"), reversed(table.to_records()))
+    # written last: a directory only counts as built once this exists
+    with open(stamp, "w") as f:
+        json.dump(source, f)
+    return History(directory, scale)
+
+
+# cases: each takes a History and returns (run, units), run() being what is timed
+
+def case_load_lottery_data(history):
+    if history.json_path is None:
+        raise Skip("synthetic dates run past year 1, so there is no JSON to load")
+    statistical = load_script("0statistical-analysis.py")
+    directory = os.path.join(history.directory, "load")
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory)
+    file_path = os.path.join(directory, "draws.json")
+    # a fresh directory has no store next to the JSON, so the first load rebuilds it
+    os.symlink(os.path.realpath(history.json_path), file_path)
+    return (lambda: statistical.load_lottery_data(file_path)), {"draws": len(history)}
+
+
+def case_process_data(history):
+    statistical = load_script("0statistical-analysis.py")
+    draws = history.table()
+    return (lambda: statistical.process_data(draws)), {"draws": len(draws)}
+
+
+def _slot(history):
+    return history.table().filter_time("lunchtime")
+
+
+def case_basic_predict(history):
+    basic = load_script("1basic-monte-carlo-simulation.py")
+    draws = _slot(history)
+    return (lambda: basic.basic_predict(draws, seed=0)), {"draws": len(draws), "tickets": 1}
+
+
+def case_importance_predict(history):
+    importance = load_script("2importance-sampling.py")
+    draws = _slot(history)
+    return (lambda: importance.importance_predict(draws, seed=0)), {"draws": len(draws), "tickets": 5}
+
+
+def case_build_markov_chain(history):
+    markov = load_script("3markov-chain-monte-carlo.py")
+    draws = _slot(history)
+    return (lambda: markov.build_markov_chain(draws)), {"draws": len(draws)}
+
+
+def case_mcmc_predict(history):
+    markov = load_script("3markov-chain-monte-carlo.py")
+    draws = _slot(history)
+    return (lambda: markov.mcmc_predict(draws, seed=0)), {"draws": len(draws), "tickets": 5}
+
+
+def case_smc_predict(history):
+    smc = load_script("4sequential-monte-carlo.py")
+    draws = _slot(history)
+    # tickets: particles x iterations weighed
+    return (lambda: smc.smc_predict(draws, seed=0)), {"draws": len(draws), "tickets": 100 * 5}
+
+
+def case_monte_carlo_integration_predict(history):
+    integration = load_script("5monte-carlo-integration.py")
+    draws = _slot(history)
+    # exact mode, as the script's main() runs it, scores every 4-number ticket
+    tickets = len(integration.all_tickets())
+    return (lambda: integration.monte_carlo_integration_predict(draws, exact=True)), {"draws": len(draws), "tickets": tickets}
+
+
+def case_bootstrap_predict(history):
+    bootstrap = load_script("6bootstrapping.py")
+    draws = _slot(history)
+    return (lambda: bootstrap.bootstrap_predict(draws)), {"draws": len(draws), "tickets": 5}
+
+
+def case_fitness_function(history):
+    genetic = load_script("7genetic-monte-carlo.py")
+    draws = _slot(history)
+    rng = np.random.default_rng(0)
+    individuals = [sorted(rng.choice(np.arange(1, NUMBERS + 1), 4, replace=False).tolist())
+                   for _ in range(FITNESS_INDIVIDUALS)]
+
+    def run():
+        return [genetic.fitness_function(individual, draws) for individual in individuals]
+    return run, {"draws": len(draws), "tickets": FITNESS_INDIVIDUALS}
+
+
+def case_genetic_monte_carlo_predict(history):
+    genetic = load_script("7genetic-monte-carlo.py")
+    draws = _slot(history)
+    # tickets: generations x population scored
+    return (lambda: genetic.genetic_monte_carlo_predict(draws, seed=0)), {"draws": len(draws), "tickets": 100 * 100}
+
+
+def case_metropolis_hastings_predict(history):
+    mh = load_script("8metropolis-hastings.py")
+    draws = _slot(history)
+    # tickets: chains x steps proposed
+    return (lambda: mh.metropolis_hastings_predict(draws, seed=0)), {"draws": len(draws), "tickets": 256 * 10000}
+
+
+def case_parse_results(history):
+    if history.scale != 1:
+        raise Skip("a results page holds one year of one draw time at any history length")
+    draws = history.table()
+    years = np.asarray(draws.dates).astype("datetime64[D]").astype("datetime64[Y]").astype(int) + 1970
+    pages = []
+    for code, draw_time in enumerate(TIME_NAMES):
+        for year in np.unique(years):
+            page = draws[(years == year) & (np.asarray(draws.times) == code)]
+            if len(page):
+                pages.append((scraper.fixture_page(reversed(page.to_records())), draw_time))
+
+    def run():
+        return [scraper.parse_results(html, draw_time) for html, draw_time in pages]
+    return run, {"draws": len(draws)}
+
+
+CASES = {
+    "load_lottery_data": case_load_lottery_data,
+    "process_data": case_process_data,
+    "basic_predict": case_basic_predict,
+    "importance_predict": case_importance_predict,
+    "build_markov_chain": case_build_markov_chain,
+    "mcmc_predict": case_mcmc_predict,
+    "smc_predict": case_smc_predict,
+    "monte_carlo_integration_predict": case_monte_carlo_integration_predict,
+    "bootstrap_predict": case_bootstrap_predict,
+    "fitness_function": case_fitness_function,
+    "genetic_monte_carlo_predict": case_genetic_monte_carlo_predict,
+    "metropolis_hastings_predict": case_metropolis_hastings_predict,
+    "parse_results": case_parse_results,
+}
+
+
+class Skip(Exception):
+    """A case that doesn't apply at this scale."""
+
+
+# running
+
+def _peak_rss_mb():
+    # Linux carries ru_maxrss over exec, so a spawned worker would report the
+    # parent's peak; VmHWM is this process's own
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss is in KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+
+
+def _run_case(conn, name, directory, scale):
+    try:
+        run, units = CASES[name](History(directory, scale))
+        start = time.perf_counter()
+        run()
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        run()
+        warm = time.perf_counter() - start
+        conn.send({"cold": cold, "warm": warm, "units": units, "peak_rss_mb": _peak_rss_mb()})
+    except Skip as skip:
+        conn.send({"skipped": str(skip)})
+    except Exception as error:
+        conn.send({"error": "%s: %s" % (type(error).__name__, error)})
+    finally:
+        conn.close()
+
+
+def _run_once(name, history, timeout):
+    result = {}
+    context = multiprocessing.get_context("spawn")
+    receive, send = context.Pipe(duplex=False)
+    process = context.Process(target=_run_case, args=(send, name, history.directory, history.scale))
+    process.start()
+    send.close()
+    try:
+        if receive.poll(timeout):
+            result.update(receive.recv())
+        else:
+            result["error"] = "timed out after %ds" % timeout
+            process.kill()
+    except EOFError:
+        # died without reporting, e.g. killed by the OOM killer
+        pass
+    process.join()
+    if not {"cold", "skipped", "error"} & set(result):
+        code = process.exitcode
+        result["error"] = ("worker killed by signal %d (out of memory?)" % -code if code and code < 0
+                           else "worker exited with code %s" % code)
+    return result
+
+
+def run_case(name, history, timeout=TIMEOUT, repeat=REPEAT):
+    """One case at one scale, best of `repeat` fresh processes; a result dict that always has case, scale and rows.
+
+    cold, warm and peak_rss_mb are each the smallest over the runs, and
+    cold_runs lists every cold time. The first run that is skipped or
+    fails decides the result.
+    """
+    result = {"case": name, "scale": history.scale, "rows": len(history)}
+    runs = []
+    for _ in range(max(repeat, 1)):
+        run = _run_once(name, history, timeout)
+        if "cold" not in run:
+            result.update(run)
+            return result
+        runs.append(run)
+    result["units"] = runs[0]["units"]
+    for key in ("cold", "warm", "peak_rss_mb"):
+        result[key] = min(run[key] for run in runs)
+    result["cold_runs"] = [run["cold"] for run in runs]
+    for unit, count in result["units"].items():
+        result[unit + "_per_sec"] = count / result["cold"] if result["cold"] > 0 else None
+    return result
+
+
+def run_benchmarks(cases=tuple(CASES), scales=SCALES, timeout=TIMEOUT, repeat=REPEAT, data_file=DATA_FILE, data_dir=DATA_DIR,
+                   log=print):
+    results = []
+    for scale in scales:
+        history = prepare_history(scale, data_file, data_dir)
+        for name in cases:
+            result = run_case(name, history, timeout, repeat)
+            if log:
+                log(_status_line(result))
+            results.append(result)
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "results": results,
+    }
+
+
+def _status_line(result):
+    if "cold" in result:
+        return "%-32s x%-5d %8.3fs cold %8.3fs warm %8.0f MB" % (
+            result["case"], result["scale"], result["cold"], result["warm"], result["peak_rss_mb"])
+    return "%-32s x%-5d %s" % (result["case"], result["scale"], result.get("skipped") or result.get("error"))
+
+
+# baselines
+
+# metric -> smallest growth that can count as a regression
+METRICS = {"cold": MIN_SECONDS, "peak_rss_mb": MIN_RSS_MB}
+
+
+def compare(results, baseline, threshold=THRESHOLD):
+    """[(case, scale, metric, baseline, now, ratio)] for every measurement above the baseline by more than threshold.
+
+    Growth must also clear the metric's absolute floor (MIN_SECONDS,
+    MIN_RSS_MB), so a 4 ms case taking 5 ms isn't a regression.
+    """
+    before = {(r["case"], r["scale"]): r for r in baseline["results"]}
+    regressions = []
+    for result in results["results"]:
+        old = before.get((result["case"], result["scale"]))
+        if old is None:
+            continue
+        for metric, floor in METRICS.items():
+            if metric in result and old.get(metric):
+                ratio = result[metric] / old[metric]
+                if ratio > 1 + threshold and result[metric] - old[metric] > floor:
+                    regressions.append((result["case"], result["scale"], metric, old[metric], result[metric], ratio))
+            elif metric == "cold" and "cold" in old and "error" in result:
+                # it ran before and fails now
+                regressions.append((result["case"], result["scale"], metric, old[metric], None, None))
+    return regressions
+
+
+def report(results):
+    rows = []
+    for r in results["results"]:
+        if "cold" in r:
+            rows.append([r["case"], r["scale"], r["rows"], r["cold"], r["warm"],
+                         r.get("draws_per_sec"), r.get("tickets_per_sec"), r["peak_rss_mb"], ""])
+        else:
+            rows.append([r["case"], r["scale"], r["rows"], None, None, None, None, None,
+                         r.get("skipped") or r.get("error")])
+    return tabulate(rows, headers=["case", "scale", "rows", "cold s", "warm s", "draws/s", "tickets/s", "peak MB", "note"],
+                    floatfmt=("", "", "", ".4f", ".4f", ".3g", ".3g", ".0f", ""), missingval="-")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the loaders and estimators at several history lengths.")
+    parser.add_argument("--scales", type=int, nargs="+", default=list(SCALES))
+    parser.add_argument("--cases", nargs="+", default=list(CASES), choices=list(CASES), metavar="CASE")
+    parser.add_argument("--output", default=OUTPUT, help="where to save the results JSON")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="allowed slowdown / growth (0.2 = 20%%)")
+    parser.add_argument("--timeout", type=int, default=TIMEOUT, help="seconds per case")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="fresh-process runs per case; the best is kept")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.cases, args.scales, args.timeout, args.repeat)
+    print()
+    print(report(results))
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=4)
+    print("\nSaved", args.output)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print("\nRegressions against %s (threshold %.0f%%):" % (args.baseline, 100 * args.threshold))
+            print(tabulate(regressions, headers=["case", "scale", "metric", "baseline", "now", "ratio"],
+                           floatfmt=".3f", missingval="failed"))
+            return 1
+        print("\nNo regressions against %s" % args.baseline)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
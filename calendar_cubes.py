@@ -0,0 +1,112 @@
+# (time x day-of-month x number) and (time x day-of-week x number) counts.
+#
+# The day-of-month / day-of-week tables are dense uint32 cubes plus their
+# per-(time, day) ball totals, so "probability of n on the 24th" is one
+# division and the top/bottom numbers for any date are one sort over one
+# slice, ties broken as the original pandas sort_values broke them (see
+# legacy_order). For the whole history the cubes come straight from the
+# persisted aggregate store; for a window they are one bincount over its
+# incidence rows.
+
+import numpy as np
+
+from aggregates import DAYS_OF_MONTH, DAYS_OF_WEEK, TIMES, aggregates_of
+from incidence import NUMBERS, Incidence, day_of_month, day_of_week
+
+CUBES_NAME = "calendar_cubes"
+
+
+def legacy_order(values, descending=False):
+    """Positions of values in sorted order, ties broken exactly as DataFrame.sort_values breaks them.
+
+    That is pandas' nargsort with its default (unstable) quicksort: a
+    descending sort runs on the reversed values and is reversed back. The
+    analysis has always picked its day samples this way, so keeping it
+    keeps the same numbers at the top/bottom-k cut.
+    """
+    values = np.asarray(values)
+    positions = np.arange(len(values))
+    if descending:
+        values, positions = values[::-1], positions[::-1]
+    order = positions[values.argsort(kind="quicksort")]
+    return order[::-1] if descending else order
+
+
+class CalendarCubes:
+    """Day-of-month and day-of-week count cubes, optionally restricted to one draw time."""
+
+    def __init__(self, dom, dow, time=None):
+        self.cubes = {"dom": dom.astype(np.uint32), "dow": dow.astype(np.uint32)}
+        # normalisers: balls drawn per (time, day)
+        self.totals = {kind: cube.sum(axis=2, dtype=np.int64) for kind, cube in self.cubes.items()}
+        self.time = time
+
+    def for_time(self, time):
+        view = CalendarCubes.__new__(CalendarCubes)
+        view.cubes, view.totals, view.time = self.cubes, self.totals, time
+        return view
+
+    def _counts(self, kind):
+        cube = self.cubes[kind]
+        return cube.sum(axis=0, dtype=np.int64) if self.time is None else cube[self.time].astype(np.int64)
+
+    def _totals(self, kind):
+        totals = self.totals[kind]
+        return totals.sum(axis=0) if self.time is None else totals[self.time]
+
+    def dom_counts(self):
+        """(32 x 49) counts per day of month, like Incidence.dom_counts()."""
+        return self._counts("dom")
+
+    def dow_counts(self):
+        return self._counts("dow")
+
+    def probabilities(self, kind, days):
+        """Share of each number among the balls drawn on the given day(s) of the month ("dom") or week ("dow").
+
+        days may be an array, giving one row per day; days never drawn give zeros.
+        """
+        counts = self._counts(kind)[days]
+        totals = self._totals(kind)[days][..., None]
+        return np.divide(counts, totals, out=np.zeros(counts.shape), where=totals > 0)
+
+    def ranked(self, kind, day, bottom=False):
+        """(numbers, prob): 0-based numbers ranked most (or least) likely first, and all 49 rounded probabilities.
+
+        Only numbers drawn at least once in this population are ranked, and
+        a day never drawn ranks none. Equal probabilities are ordered by
+        legacy_order, as the analysis always ordered them.
+        """
+        counts = self._counts(kind)
+        prob = np.round(self.probabilities(kind, day), 3)
+        if not counts[day].any():
+            return np.array([], dtype=np.intp), prob
+        candidates = np.flatnonzero(counts.any(axis=0))
+        return candidates[legacy_order(prob[candidates], descending=not bottom)], prob
+
+    def top(self, kind, day, k=6, bottom=False):
+        """[(number, probability)] for the k most (or least) likely numbers on a day, probabilities rounded to 3 places."""
+        numbers, prob = self.ranked(kind, day, bottom)
+        return [(int(n) + 1, float(prob[n])) for n in numbers[:k]]
+
+    def score_dates(self, days):
+        """(dom, dow) probability rows for day numbers (see draw_store.date_to_day), any dates at once."""
+        return self.probabilities("dom", day_of_month(days)), self.probabilities("dow", day_of_week(days))
+
+
+def cubes_from_incidence(incidence):
+    """Cubes for an Incidence (e.g. a date window), counted directly from its rows."""
+    times = incidence.times.astype(np.int64)
+    dom = incidence.grouped_counts(times * DAYS_OF_MONTH + incidence.dom, TIMES * DAYS_OF_MONTH)
+    dow = incidence.grouped_counts(times * DAYS_OF_WEEK + incidence.dow, TIMES * DAYS_OF_WEEK)
+    return CalendarCubes(dom.reshape(TIMES, DAYS_OF_MONTH, NUMBERS), dow.reshape(TIMES, DAYS_OF_WEEK, NUMBERS))
+
+
+def calendar_cubes(source):
+    """Cubes for a DrawTable (from the aggregate store, cached on the table) or an Incidence."""
+    if isinstance(source, Incidence):
+        return cubes_from_incidence(source)
+    if CUBES_NAME not in source.cache:
+        tables = aggregates_of(source).tables
+        source.cache[CUBES_NAME] = CalendarCubes(tables["dom"].sum(axis=0), tables["dow"].sum(axis=0))
+    return source.cache[CUBES_NAME]
@@ -0,0 +1,87 @@
+# Compact encodings for sets of lottery numbers.
+#
+# A set of balls from 1-49 fits in one 64-bit word (bit n set = ball n
+# present), so "does this draw contain this ticket" becomes
+# (draw_mask & ticket_mask) == ticket_mask over whole arrays at once.
+
+from math import comb
+
+import numpy as np
+
+BITS = np.left_shift(np.uint64(1), np.arange(64, dtype=np.uint64))
+POPCOUNT_8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.int64)
+
+
+def numbers_to_masks(numbers):
+    """(N, k) array of balls (0 = empty slot) -> (N,) uint64 bitmasks."""
+    numbers = np.asarray(numbers)
+    if numbers.ndim == 1:
+        numbers = numbers[None, :]
+    masks = np.bitwise_or.reduce(BITS[numbers.astype(np.intp)], axis=1)
+    # slot value 0 is padding, never a ball
+    return masks & ~np.uint64(1)
+
+
+def mask_to_numbers(mask):
+    mask = int(mask)
+    return [n for n in range(1, 50) if mask >> n & 1]
+
+
+def popcount(masks):
+    masks = np.asarray(masks, dtype=np.uint64)
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(masks).astype(np.int64)
+    counts = np.zeros(masks.shape, dtype=np.int64)
+    for shift in range(0, 64, 8):
+        counts += POPCOUNT_8[(masks >> np.uint64(shift)) & np.uint64(0xFF)]
+    return counts
+
+
+def draw_masks(draws):
+    """Bitmask of every draw in a DrawTable (bonus ball included), cached on the table."""
+    if "masks" not in draws.cache:
+        draws.cache["masks"] = numbers_to_masks(draws.numbers)
+    return draws.cache["masks"]
+
+
+def count_supersets(draw_mask_array, masks, chunk_cells=1 << 22):
+    """For each mask, how many draws contain all of its numbers."""
+    masks = np.asarray(masks, dtype=np.uint64)
+    counts = np.empty(len(masks), dtype=np.int64)
+    # bound the (masks x draws) temporary regardless of population size
+    step = max(1, chunk_cells // max(1, len(draw_mask_array)))
+    for start in range(0, len(masks), step):
+        block = masks[start:start + step, None]
+        counts[start:start + step] = np.count_nonzero(
+            (draw_mask_array[None, :] & block) == block, axis=1
+        )
+    return counts
+
+
+# Colex ranking: a sorted k-set a_1 < ... < a_k of 0-based values maps to
+# C(a_1, 1) + C(a_2, 2) + ... + C(a_k, k), a dense index in [0, C(49, k)).
+
+BINOM = np.array(
+    [[comb(n, k) for k in range(8)] for n in range(50)], dtype=np.int64
+)
+
+
+def colex_rank(sets):
+    """(N, k) sorted, distinct 1-based numbers -> (N,) int64 colex ranks."""
+    sets = np.asarray(sets, dtype=np.int64)
+    if sets.ndim == 1:
+        sets = sets[None, :]
+    k = sets.shape[1]
+    return BINOM[sets - 1, np.arange(1, k + 1)].sum(axis=1)
+
+
+def colex_unrank(ranks, k):
+    """Inverse of colex_rank: (N,) ranks -> (N, k) sorted 1-based numbers."""
+    ranks = np.array(ranks, dtype=np.int64, ndmin=1)
+    sets = np.empty((len(ranks), k), dtype=np.int64)
+    for i in range(k, 0, -1):
+        # largest a with C(a, i) <= rank
+        a = np.searchsorted(BINOM[:, i], ranks, side="right") - 1
+        sets[:, i - 1] = a + 1
+        ranks = ranks - BINOM[a, i]
+    return sets
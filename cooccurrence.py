@@ -0,0 +1,74 @@
+# Which numbers come out together?
+#
+# The 49x49 co-occurrence matrix counts, for every pair of numbers, the draws
+# holding both (bonus ball included); its diagonal is each number's own count.
+# For the whole history, per time slot or not, it comes from the aggregate
+# store; for a date window it is one incidence^T @ incidence product over the
+# window's rows. Partner queries for any number of play numbers are then a
+# single stable sort over the matching rows, on raw counts or normalised by
+# how often each number comes out on its own (lift / PMI).
+
+import numpy as np
+
+from aggregates import aggregates_of
+from incidence import Incidence
+
+MEASURES = ("count", "lift", "pmi")
+
+
+class Cooccurrence:
+    """Pair counts for one population of draws."""
+
+    def __init__(self, matrix, draws):
+        self.matrix = np.asarray(matrix, dtype=np.int64)
+        self.draws = draws  # how many draws the counts cover
+        self.counts = np.diagonal(self.matrix).copy()
+
+    def lift(self):
+        """P(a and b) / (P(a) P(b)); 1 = independent, above 1 = seen together more than chance."""
+        expected = np.outer(self.counts, self.counts) / max(self.draws, 1)
+        return np.divide(self.matrix, expected, out=np.zeros(self.matrix.shape), where=expected > 0)
+
+    def pmi(self):
+        """Pointwise mutual information, log(lift); -inf for pairs never seen together."""
+        with np.errstate(divide="ignore"):
+            return np.log(self.lift())
+
+    def scores(self, measure="count"):
+        if measure == "count":
+            return self.matrix.astype(np.float64)
+        if measure == "lift":
+            return self.lift()
+        if measure == "pmi":
+            return self.pmi()
+        raise ValueError(f"Unknown measure: {measure!r} (expected one of {MEASURES})")
+
+    def partners(self, numbers, k=3, measure="count"):
+        """For each play number, its k best partners (best first) and their scores, as (Q, k) arrays."""
+        numbers = np.asarray(numbers, dtype=np.intp).ravel()
+        rows = self.scores(measure)[numbers - 1]
+        rows[np.arange(len(numbers)), numbers - 1] = -np.inf  # a number isn't its own partner
+        k = min(k, rows.shape[1] - 1)
+        # best first; stable, so equal scores go to the lower ball number
+        best = np.argsort(-rows, axis=1, kind="stable")[:, :k]
+        return best + 1, np.take_along_axis(rows, best, axis=1)
+
+
+def cooccurrence_of(draws, time=None):
+    """Pair counts over a whole DrawTable, optionally one draw time, from the aggregate store."""
+    aggregates = aggregates_of(draws)
+    if time is not None:
+        aggregates = aggregates.for_time(time)
+    rows = len(draws) if time is None else int(np.count_nonzero(np.asarray(draws.times) == time))
+    return Cooccurrence(aggregates.cooccurrence(), rows)
+
+
+def window_cooccurrence(draws, start_day, end_day=None, time=None):
+    """Pair counts for the draws with start_day <= day < end_day (day numbers), optionally one draw time."""
+    dates = np.asarray(draws.dates)
+    lo = np.searchsorted(dates, start_day, side="left")
+    hi = len(dates) if end_day is None else np.searchsorted(dates, end_day, side="left")
+    incidence = Incidence.from_draws(draws[lo:hi])
+    if time is not None:
+        incidence = incidence.select(incidence.times == time)
+    return Cooccurrence(incidence.cooccurrence(), len(incidence))
@@ -0,0 +1,546 @@
+# Columnar, memory-mapped store for the merged draw history.
+#
+# Parsing merged_uk_49s_results.json (indent=4, ~4 MB) on every run is where
+# most of the start-up time goes, so the first load converts it into three
+# NumPy columns saved next to the JSON:
+#
+#   dates.npy    int32  day number (days since 1970-01-01)
+#   times.npy    uint8  0 = lunchtime, 1 = teatime
+#   numbers.npy  uint8  (N, 7) drawn balls, bonus ball last, 0 = no ball
+#
+# Rows are kept in chronological order (oldest first, lunchtime before
+# teatime on the same day). Later runs memory-map the columns and only rebuild
+# them when the JSON's mtime/size changes *and* its content hash differs.
+#
+# New draws are not written into the big JSON. They are appended to a
+# journal next to it (merged_uk_49s_results.journal.jsonl, one draw per
+# line), and loading merges just the journal lines it hasn't seen yet into
+# the columns. Once the journal grows past COMPACT_BYTES it is folded back
+# into the JSON (written to a temp file and renamed) and emptied.
+
+import hashlib
+import json
+import os
+import threading
+from datetime import date
+
+import numpy as np
+
+LUNCHTIME = 0
+TEATIME = 1
+TIME_NAMES = ("lunchtime", "teatime")
+TIME_CODES = {name: code for code, name in enumerate(TIME_NAMES)}
+
+BALLS_PER_DRAW = 7
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+STORE_SUFFIX = ".store"
+STORE_FORMAT = 2
+JOURNAL_SUFFIX = ".journal.jsonl"
+COMPACT_BYTES = 1 << 16  # ~900 draws
+
+
+def store_path(file_path):
+    root, _ = os.path.splitext(file_path)
+    return root + STORE_SUFFIX
+
+
+def journal_path(file_path):
+    root, _ = os.path.splitext(file_path)
+    return root + JOURNAL_SUFFIX
+
+
+def date_to_day(date_str):
+    return date.fromisoformat(date_str).toordinal() - EPOCH_ORDINAL
+
+
+def day_to_date(day):
+    return date.fromordinal(int(day) + EPOCH_ORDINAL)
+
+
+def time_code(draw_time):
+    return TIME_CODES[draw_time.strip().lower()]
+
+
+class DrawTable:
+    """Draw history held as columns; behaves like the old list of draw dicts."""
+
+    def __init__(self, dates, times, numbers, store_dir=None, version=None, slot=None):
+        self.dates = dates
+        self.times = times
+        self.numbers = numbers
+        self.store_dir = store_dir
+        self.version = version
+        self.slot = slot
+        # derived structures (incidence matrix, bitmasks, ...) keyed by name
+        self.cache = {}
+        self._records = None
+
+    def __len__(self):
+        return len(self.dates)
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            return self._record(self.dates[index], self.times[index], self.numbers[index])
+        # An arbitrary subset is no longer the persisted history, so it does
+        # not inherit the store location used for derived tables.
+        return DrawTable(self.dates[index], self.times[index], self.numbers[index])
+
+    def __iter__(self):
+        # Legacy dict-per-draw view, materialised once per table.
+        if self._records is None:
+            self._records = self.to_records()
+        return iter(self._records)
+
+    @staticmethod
+    def _record(day, code, balls):
+        return {
+            "date": day_to_date(day).isoformat(),
+            "time": TIME_NAMES[code],
+            "numbers": [int(n) for n in balls if n],
+        }
+
+    def to_records(self):
+        days = self.dates.astype("datetime64[D]").astype(str).tolist()
+        times = self.times.tolist()
+        rows = self.numbers.tolist()
+        return [
+            {"date": day, "time": TIME_NAMES[code], "numbers": [n for n in balls if n]}
+            for day, code, balls in zip(days, times, rows)
+        ]
+
+    def filter_time(self, draw_time):
+        code = time_code(draw_time)
+        table = self[self.times == code]
+        if self.slot is None:
+            table.store_dir, table.version = self.store_dir, self.version
+        table.slot = code
+        return table
+
+    def key(self, index):
+        return [int(self.dates[index]), int(self.times[index])]
+
+
+def records_to_columns(records):
+    """Convert a list of draw dicts into chronologically sorted columns."""
+    count = len(records)
+    dates = np.empty(count, dtype=np.int32)
+    times = np.empty(count, dtype=np.uint8)
+    numbers = np.zeros((count, BALLS_PER_DRAW), dtype=np.uint8)
+    for i, entry in enumerate(records):
+        dates[i] = date_to_day(entry["date"])
+        times[i] = time_code(entry["time"])
+        balls = entry["numbers"][:BALLS_PER_DRAW]
+        numbers[i, :len(balls)] = balls
+
+    order = np.lexsort((times, dates))
+    return dates[order], times[order], numbers[order]
+
+
+def _file_digest(file_path, size=None):
+    # hash the whole file, or just its first `size` bytes
+    sha1 = hashlib.sha1()
+    remaining = float("inf") if size is None else size
+    with open(file_path, "rb") as f:
+        while remaining > 0:
+            block = f.read(int(min(1 << 20, remaining)))
+            if not block:
+                break
+            sha1.update(block)
+            remaining -= len(block)
+    return sha1.hexdigest()
+
+
+def _file_size(path):
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return 0
+
+
+def _read_meta(store_dir):
+    try:
+        with open(os.path.join(store_dir, "meta.json"), "r") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get("format") != STORE_FORMAT:
+        return None
+    return meta
+
+
+def _tmp_path(path):
+    # unique per process and thread, so concurrent writers of the same file
+    # never share a temp file; the last os.replace wins with a whole file
+    return "%s.%d.%d.tmp" % (path, os.getpid(), threading.get_ident())
+
+
+def _atomic_write_json(path, payload):
+    tmp_path = _tmp_path(path)
+    with open(tmp_path, "w") as f:
+        json.dump(payload, f)
+    os.replace(tmp_path, path)
+
+
+def save_array(path, array):
+    # np.save straight to the final name would leave a torn file behind if
+    # the process dies mid-write, so go through a temp file and rename.
+    tmp_path = _tmp_path(path)
+    with open(tmp_path, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+
+def _write_store(store_dir, dates, times, numbers, stat, digest, journal_bytes=0, journal_digest=None):
+    os.makedirs(store_dir, exist_ok=True)
+    save_array(os.path.join(store_dir, "dates.npy"), dates)
+    save_array(os.path.join(store_dir, "times.npy"), times)
+    save_array(os.path.join(store_dir, "numbers.npy"), numbers)
+    _write_meta(store_dir, len(dates), stat, digest, journal_bytes, journal_digest)
+
+
+def _write_meta(store_dir, rows, stat, digest, journal_bytes=0, journal_digest=None):
+    # meta.json goes last: it is what marks the columns as valid.
+    _atomic_write_json(os.path.join(store_dir, "meta.json"), {
+        "format": STORE_FORMAT,
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sha1": digest,
+        "rows": int(rows),
+        "journal_bytes": journal_bytes,
+        "journal_sha1": journal_digest,
+    })
+
+
+def _open_columns(store_dir):
+    return tuple(
+        np.load(os.path.join(store_dir, name + ".npy"), mmap_mode="r")
+        for name in ("dates", "times", "numbers")
+    )
+
+
+def read_journal(path, offset=0):
+    """Draw dicts from the journal after byte `offset`, and the offset they end at.
+
+    A last line without its newline is a write that never finished and is
+    left for later; complete lines that don't parse are skipped.
+    """
+    try:
+        with open(path, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+    except OSError:
+        return [], offset
+    complete = data.rfind(b"\n") + 1
+    records = []
+    for line in data[:complete].splitlines():
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            continue
+    return records, offset + complete
+
+
+def draw_keys(dates, times):
+    """One sortable int64 per draw: (day, time) -> day * 2 + time."""
+    return np.asarray(dates, dtype=np.int64) * 2 + np.asarray(times, dtype=np.int64)
+
+
+def merge_columns(base, new):
+    """Merge new (dates, times, numbers) columns into base, skipping draws base already has."""
+    base_keys = draw_keys(base[0], base[1])
+    new_keys = draw_keys(new[0], new[1])
+    _, first = np.unique(new_keys, return_index=True)
+    keep = np.zeros(len(new_keys), dtype=bool)
+    keep[first] = True
+    keep &= ~np.isin(new_keys, base_keys)
+    if not keep.any():
+        return base
+    merged = tuple(np.concatenate([np.asarray(b), n[keep]]) for b, n in zip(base, new))
+    if len(base_keys) and new_keys[keep].min() <= base_keys[-1]:
+        # a back-filled draw: fall back to a full (binary) sort
+        order = np.lexsort((merged[1], merged[0]))
+        merged = tuple(column[order] for column in merged)
+    return merged
+
+
+def _rebuild(file_path, store_dir, stat, digest):
+    with open(file_path, "r") as f:
+        columns = records_to_columns(json.load(f))
+    journal = journal_path(file_path)
+    records, journal_bytes = read_journal(journal)
+    if records:
+        columns = merge_columns(columns, records_to_columns(records))
+    journal_digest = _file_digest(journal, journal_bytes) if journal_bytes else None
+    try:
+        _write_store(store_dir, *columns, stat, digest, journal_bytes, journal_digest)
+    except OSError:
+        # Read-only checkout: still usable, just without the on-disk cache.
+        return DrawTable(*columns, version="%s+%d" % (digest, journal_bytes))
+    return DrawTable(*_open_columns(store_dir), store_dir=store_dir, version="%s+%d" % (digest, journal_bytes))
+
+
+def load_draws(file_path):
+    """Load the draw history (JSON plus journal), rebuilding the binary store only if the JSON changed."""
+    store_dir = store_path(file_path)
+    stat = os.stat(file_path)
+    meta = _read_meta(store_dir)
+
+    if meta and (meta["mtime_ns"] != stat.st_mtime_ns or meta["size"] != stat.st_size):
+        digest = _file_digest(file_path)
+        if meta["sha1"] != digest:
+            return _rebuild(file_path, store_dir, stat, digest)
+        # Touched but unchanged (e.g. a fresh checkout): just refresh the stamp.
+        meta.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+        try:
+            _atomic_write_json(os.path.join(store_dir, "meta.json"), meta)
+        except OSError:
+            pass
+    elif not meta:
+        return _rebuild(file_path, store_dir, stat, _file_digest(file_path))
+
+    # The columns cover the JSON and the first journal_bytes of the journal;
+    # if that part of the journal was rewritten rather than appended to, start over.
+    journal = journal_path(file_path)
+    merged = meta["journal_bytes"]
+    if _file_size(journal) < merged or (merged and _file_digest(journal, merged) != meta["journal_sha1"]):
+        return _rebuild(file_path, store_dir, stat, meta["sha1"])
+
+    columns = _open_columns(store_dir)
+    records, journal_bytes = read_journal(journal, merged)
+    if journal_bytes > merged:
+        if records:
+            columns = merge_columns(columns, records_to_columns(records))
+        try:
+            _write_store(store_dir, *columns, stat, meta["sha1"], journal_bytes, _file_digest(journal, journal_bytes))
+            columns = _open_columns(store_dir)
+        except OSError:
+            pass
+    return DrawTable(*columns, store_dir=store_dir, version="%s+%d" % (meta["sha1"], journal_bytes))
+
+
+def append_draws(file_path, records):
+    """Journal the draws the history doesn't have yet; returns how many were added.
+
+    Only the new lines are written, in one append. The journal is compacted
+    into the JSON once it passes COMPACT_BYTES.
+    """
+    draws = load_draws(file_path)
+    if not records:
+        return 0
+    known = set(draw_keys(draws.dates, draws.times).tolist())
+    fresh, seen = [], set()
+    for entry in records:
+        key = date_to_day(entry["date"]) * 2 + time_code(entry["time"])
+        if key not in known and key not in seen:
+            seen.add(key)
+            fresh.append(entry)
+    if not fresh:
+        return 0
+
+    journal = journal_path(file_path)
+    lines = "".join(json.dumps(entry) + "\n" for entry in fresh)
+    with open(journal, "a") as f:
+        if f.tell() and _last_byte(journal) != b"\n":
+            # terminate a torn line left by an interrupted append
+            lines = "\n" + lines
+        f.write(lines)
+        f.flush()
+        os.fsync(f.fileno())
+
+    if _file_size(journal) > COMPACT_BYTES:
+        compact(file_path)
+    return len(fresh)
+
+
+def _last_byte(path):
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1)
+
+
+def compact(file_path):
+    """Fold the journal into the JSON (newest first, indent=4) and empty it."""
+    draws = load_draws(file_path)
+    write_json_array(file_path, reversed(draws.to_records()))
+    # A crash here leaves journal lines that are already in the JSON; loading
+    # skips draws it already has, so that is harmless.
+    journal = journal_path(file_path)
+    if os.path.exists(journal):
+        os.remove(journal)
+
+    columns = tuple(np.array(column) for column in (draws.dates, draws.times, draws.numbers))
+    try:
+        _write_store(store_path(file_path), *columns, os.stat(file_path), _file_digest(file_path))
+    except OSError:
+        pass
+
+
+# Streaming I/O for inputs too big to hold in memory (merge-json-files.py):
+# JSON arrays are read and written one element at a time, and the binary
+# columns are built in fixed-size blocks.
+
+def iter_json_array(path, block_size=1 << 16):
+    """Yield the elements of a top-level JSON array without loading the whole file."""
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buffer, position, eof = "", 0, False
+        started = False
+        while True:
+            # skip whitespace, the opening bracket and separators
+            while position < len(buffer) and buffer[position] in " \t\r\n,[":
+                started = started or buffer[position] == "["
+                position += 1
+            if position < len(buffer) and buffer[position] == "]":
+                return
+            try:
+                if position == len(buffer):
+                    raise ValueError("need more input")
+                item, end = decoder.raw_decode(buffer, position)
+            except ValueError:
+                if eof:
+                    if position < len(buffer) or not started:
+                        raise ValueError("%s: truncated or invalid JSON array" % path)
+                    return
+                block = f.read(block_size)
+                eof = not block
+                buffer, position = buffer[position:] + block, 0
+                continue
+            # an element ending exactly at the buffer edge might be a cut-off number
+            if end == len(buffer) and not eof:
+                block = f.read(block_size)
+                eof = not block
+                buffer, position = buffer[position:] + block, 0
+                continue
+            yield item
+            position = end
+
+
+def write_json_array(path, items):
+    """Write items as an indent=4 JSON array (same text as json.dump), atomically, one element at a time."""
+    tmp_path = _tmp_path(path)
+    with open(tmp_path, "w") as output_file:
+        output_file.write("[")
+        separator = "\n"
+        for item in items:
+            output_file.write(separator)
+            output_file.write("    " + json.dumps(item, indent=4).replace("\n", "\n    "))
+            separator = ",\n"
+        output_file.write("\n]" if separator != "\n" else "]")
+    os.replace(tmp_path, path)
+
+
+class StoreWriter:
+    """Builds the binary columns from draws arriving newest first, one block in memory at a time.
+
+    finish() lays the rows out oldest first and stamps the store as
+    matching `file_path` (the JSON written from the same stream).
+    """
+
+    COLUMNS = (("dates", np.int32, ()), ("times", np.uint8, ()), ("numbers", np.uint8, (BALLS_PER_DRAW,)))
+
+    def __init__(self, store_dir, block_rows=1 << 16):
+        self.store_dir = store_dir
+        self.block_rows = block_rows
+        self.blocks = []  # rows in each flushed block
+        self.rows = 0
+        os.makedirs(store_dir, exist_ok=True)
+        # the old columns stop being valid as soon as we start replacing them
+        if os.path.exists(os.path.join(store_dir, "meta.json")):
+            os.remove(os.path.join(store_dir, "meta.json"))
+        self.parts = {name: open(os.path.join(store_dir, name + ".part"), "w+b") for name, _, _ in self.COLUMNS}
+        self._new_block()
+
+    def _new_block(self):
+        self.buffer = {name: np.zeros((self.block_rows,) + shape, dtype=dtype) for name, dtype, shape in self.COLUMNS}
+        self.filled = 0
+
+    def append(self, entry):
+        i = self.filled
+        self.buffer["dates"][i] = date_to_day(entry["date"])
+        self.buffer["times"][i] = time_code(entry["time"])
+        balls = entry["numbers"][:BALLS_PER_DRAW]
+        self.buffer["numbers"][i, :len(balls)] = balls
+        self.filled += 1
+        if self.filled == self.block_rows:
+            self._flush()
+
+    def _flush(self):
+        if self.filled:
+            for name, _, _ in self.COLUMNS:
+                # reversed within the block; the blocks themselves are reversed in finish()
+                self.parts[name].write(self.buffer[name][:self.filled][::-1].tobytes())
+            self.blocks.append(self.filled)
+            self.rows += self.filled
+        self._new_block()
+
+    def finish(self, file_path):
+        self._flush()
+        for name, dtype, shape in self.COLUMNS:
+            part = self.parts[name]
+            row_bytes = int(np.prod(shape, dtype=np.int64)) * np.dtype(dtype).itemsize
+            header = {"descr": np.lib.format.dtype_to_descr(np.dtype(dtype)),
+                      "fortran_order": False, "shape": (self.rows,) + shape}
+            path = os.path.join(self.store_dir, name + ".npy")
+            tmp_path = _tmp_path(path)
+            with open(tmp_path, "wb") as f:
+                np.lib.format.write_array_header_1_0(f, header)
+                end = self.rows * row_bytes
+                for rows in reversed(self.blocks):
+                    part.seek(end - rows * row_bytes)
+                    f.write(part.read(rows * row_bytes))
+                    end -= rows * row_bytes
+            os.replace(tmp_path, path)
+            part.close()
+            os.remove(part.name)
+        _write_meta(self.store_dir, self.rows, os.stat(file_path), _file_digest(file_path))
+
+
+# Derived tables (subset counts, aggregates, ...) are persisted next to the
+# columns, one file per time slot. Each remembers how many rows it covers and
+# the first/last draw it saw, so when draws are appended it can be topped up
+# from the new rows instead of rebuilt from the whole history.
+
+def slot_name(slot):
+    return "all" if slot is None else TIME_NAMES[slot]
+
+
+def _derived_paths(draws, name):
+    base = os.path.join(draws.store_dir, "%s-%s" % (name, slot_name(draws.slot)))
+    return base + ".npy", base + ".json"
+
+
+def load_derived(draws, name):
+    """Return (array, rows covered) for a persisted table, or (None, 0)."""
+    if draws.store_dir is None:
+        return None, 0
+    array_path, meta_path = _derived_paths(draws, name)
+    try:
+        with open(meta_path, "r") as f:
+            meta = json.load(f)
+        rows = meta["rows"]
+        if rows > len(draws) or (rows and (
+                meta["first"] != draws.key(0) or meta["last"] != draws.key(rows - 1))):
+            # history was rewritten, not appended to
+            return None, 0
+        return np.load(array_path), rows
+    except (OSError, ValueError, KeyError):
+        return None, 0
+
+
+def save_derived(draws, name, array):
+    if draws.store_dir is None or not len(draws):
+        return
+    array_path, meta_path = _derived_paths(draws, name)
+    try:
+        # drop the old stamp first so a crash mid-save reads as "missing"
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        save_array(array_path, array)
+        _atomic_write_json(meta_path, {
+            "rows": len(draws),
+            "first": draws.key(0),
+            "last": draws.key(len(draws) - 1),
+        })
+    except OSError:
+        pass
@@ -0,0 +1,120 @@
+# Draw x number incidence matrix shared by every estimator.
+#
+# Row i, column n-1 is 1 when ball n came out in draw i. Main balls and the
+# bonus ball live in separate planes so estimators can count either or both,
+# and the calendar columns (day of month, day of week, draw time) sit next to
+# them so any population filter is a boolean mask over the rows. Frequency
+# tables are then plain column sums instead of Counter passes over lists.
+#
+# Note: a draw that lists the same ball twice (there are two in the history)
+# counts it once here.
+
+import numpy as np
+
+from draw_store import BALLS_PER_DRAW
+
+NUMBERS = 49
+MAIN_BALLS = BALLS_PER_DRAW - 1
+DOW_NAMES = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+
+
+def _plane(balls):
+    plane = np.zeros((len(balls), NUMBERS + 1), dtype=np.uint8)
+    rows = np.repeat(np.arange(len(balls)), balls.shape[1])
+    plane[rows, balls.ravel()] = 1
+    # column 0 collected the "no ball" padding
+    return plane[:, 1:]
+
+
+def day_of_month(dates):
+    days = np.asarray(dates).astype("datetime64[D]")
+    return (days - days.astype("datetime64[M]")).astype(np.uint8) + 1
+
+
+def day_of_week(dates):
+    # 1970-01-01 was a Thursday; 0 = Monday like datetime.weekday()
+    return ((np.asarray(dates, dtype=np.int64) + 3) % 7).astype(np.uint8)
+
+
+class Incidence:
+    """(draws x 49) main/bonus planes plus per-draw date, dom, dow and time columns."""
+
+    def __init__(self, main, bonus, dates, times):
+        self.main = main
+        self.bonus = bonus
+        self.dates = dates
+        self.times = times
+        self.dom = day_of_month(dates)
+        self.dow = day_of_week(dates)
+        self._totals = None
+
+    @classmethod
+    def from_draws(cls, draws):
+        numbers = np.asarray(draws.numbers)
+        main = _plane(numbers[:, :MAIN_BALLS])
+        bonus = _plane(numbers[:, MAIN_BALLS:])
+        # a ball repeated as the bonus is already in the main plane
+        bonus &= 1 - main
+        return cls(main, bonus, np.asarray(draws.dates), np.asarray(draws.times))
+
+    def __len__(self):
+        return len(self.dates)
+
+    @property
+    def balls(self):
+        return self.main | self.bonus
+
+    def select(self, mask):
+        """Sub-matrix for the draws picked by a boolean mask or index array."""
+        return Incidence(self.main[mask], self.bonus[mask], self.dates[mask], self.times[mask])
+
+    def counts(self, mask=None, bonus=True):
+        """Per-number counts (index 0 = ball 1), optionally over a row mask."""
+        if mask is None:
+            if self._totals is None:
+                main = self.main.sum(axis=0, dtype=np.int64)
+                self._totals = (main, main + self.bonus.sum(axis=0, dtype=np.int64))
+            return self._totals[1 if bonus else 0].copy()
+
+        counts = self.main[mask].sum(axis=0, dtype=np.int64)
+        if bonus:
+            counts += self.bonus[mask].sum(axis=0, dtype=np.int64)
+        return counts
+
+    def ball_count(self, mask=None, bonus=True):
+        return int(self.counts(mask, bonus).sum())
+
+    def cooccurrence(self, mask=None, bonus=True):
+        """(49 x 49) count of draws holding both numbers; the diagonal is each number's count."""
+        plane = self.balls if bonus else self.main
+        if mask is not None:
+            plane = plane[mask]
+        plane = plane.astype(np.float32)
+        return (plane.T @ plane).round().astype(np.int64)
+
+    def grouped_counts(self, keys, groups, bonus=True):
+        """(groups x 49) counts with draw i added to row keys[i]."""
+        plane = self.balls if bonus else self.main
+        rows, cols = np.nonzero(plane)
+        flat = np.asarray(keys, dtype=np.int64)[rows] * NUMBERS + cols
+        return np.bincount(flat, minlength=groups * NUMBERS).reshape(groups, NUMBERS)
+
+    def dom_counts(self, bonus=True):
+        """(32 x 49) counts per day of month (row 0 unused), same shape as Aggregates.dom_counts()."""
+        return self.grouped_counts(self.dom, 32, bonus)
+
+    def dow_counts(self, bonus=True):
+        return self.grouped_counts(self.dow, len(DOW_NAMES), bonus)
+
+
+def incidence_of(draws):
+    """Incidence matrix for a DrawTable, built once and kept on the table."""
+    if "incidence" not in draws.cache:
+        draws.cache["incidence"] = Incidence.from_draws(draws)
+    return draws.cache["incidence"]
+
+
+def frequency_dict(counts):
+    """{number: share} over the numbers that were drawn at least once."""
+    total = counts.sum()
+    return {int(n) + 1: float(counts[n] / total) for n in np.flatnonzero(counts)}
@@ -1,45 +1,63 @@
-import json
-from datetime import datetime
+import heapq
+import os
+import sys
+from datetime import date
+
+from draw_store import StoreWriter, iter_json_array, store_path, time_code, write_json_array
+
+# Merge the per-year files (each already newest first) into one newest-first
+# history. Each year file (a few hundred draws) is read and checked once, a
+# bad one is skipped whole, and the files are merged through a heap; the
+# output is written as it is produced to both the merged JSON and the binary
+# draw store.
+#
+#   python merge-json-files.py [source_dir]
 
 first_year = 1996
-current_year = 2025
-all_results = []
-
-while first_year <= current_year:
-    play_time = 0
-    while play_time <= 1:
-        file_path = "uk-49s-"
-        
-        if play_time == 0:
-            file_path += "lunchtime"
-        else:
-            file_path += "teatime"
-        
-        file_path += f"-results-{first_year}.json"
-        
-        try:
-            with open(file_path, "r") as file:
-                data = json.load(file)
-                all_results.extend(
-                    data,
-                )
-        except FileNotFoundError:
-            print(f"Warning: {file_path} not found.")
-        except json.JSONDecodeError:
-            print(f"Error: {file_path} contains invalid JSON.")
-        
-        play_time += 1
-    
-    first_year += 1
-
-# sort results 
-all_results.sort(
-    key=lambda x: datetime.strptime(x["date"], "%Y-%m-%d"), 
-    reverse=True
-)
-
-# Save merged results into one JSON file
-with open("merged_uk_49s_results.json", "w") as output_file:
-    json.dump(all_results, output_file, indent=4)
+current_year = date.today().year
+source_dir = sys.argv[1] if len(sys.argv) > 1 else "."
+output_path = "merged_uk_49s_results.json"
+
+
+def draw_key(entry):
+    # ISO dates order as strings; on the same day teatime comes after lunchtime
+    return entry["date"], time_code(entry["time"])
+
+
+def read_draws(file_path):
+    """All draws of one file, or none (with a warning) if it is missing or not valid JSON."""
+    try:
+        return list(iter_json_array(file_path))
+    except FileNotFoundError:
+        print(f"Warning: {file_path} not found.")
+    except ValueError:
+        print(f"Error: {file_path} contains invalid JSON.")
+    return []
+
+
+def merge_draws(paths):
+    """Newest-first draws from newest-first files, skipping repeats of the same draw."""
+    last_key = None
+    for entry in heapq.merge(*(read_draws(path) for path in paths), key=draw_key, reverse=True):
+        key = draw_key(entry)
+        if key != last_key:
+            last_key = key
+            yield entry
+
+
+def write_both(draws, store):
+    for entry in draws:
+        store.append(entry)
+        yield entry
+
+
+paths = []
+for year in range(first_year, current_year + 1):
+    for play_time in ("lunchtime", "teatime"):
+        paths.append(os.path.join(source_dir, f"uk-49s-{play_time}-results-{year}.json"))
+
+store = StoreWriter(store_path(output_path))
+write_json_array(output_path, write_both(merge_draws(paths), store))
+store.finish(output_path)
 
 print("Merged JSON file created successfully.")
@@ -0,0 +1,92 @@
+# Weighted ticket sampler: build once from a distribution over the 49
+# numbers, then draw millions of tickets of k distinct numbers per call.
+#
+# Two interchangeable methods:
+#   "alias"  - Walker/Vose alias table gives O(1) weighted draws; a number
+#              that repeats one already in its ticket is redrawn, which is
+#              exactly sequential weighted sampling without replacement.
+#   "gumbel" - Gumbel-top-k: the k largest log(w) + Gumbel noise keys of a
+#              row are a weighted sample without replacement in one shot.
+# Both produce the same ticket distribution; alias is cheaper for small k.
+
+import numpy as np
+
+NUMBERS = 49
+CHUNK_ROWS = 1 << 16
+
+
+def alias_table(probabilities):
+    """Vose's alias method: (prob, alias) tables for O(1) weighted draws."""
+    n = len(probabilities)
+    scaled = np.asarray(probabilities, dtype=np.float64) * n
+    prob = np.ones(n)
+    alias = np.arange(n)
+    small = [i for i in range(n) if scaled[i] < 1.0]
+    large = [i for i in range(n) if scaled[i] >= 1.0]
+    while small and large:
+        s, l = small.pop(), large.pop()
+        prob[s], alias[s] = scaled[s], l
+        scaled[l] -= 1.0 - scaled[s]
+        (small if scaled[l] < 1.0 else large).append(l)
+    return prob, alias
+
+
+class TicketSampler:
+    """Draws tickets of k distinct numbers, each number weighted by `weights` (index 0 = ball 1)."""
+
+    def __init__(self, weights, k=4, seed=None, method="alias"):
+        weights = np.asarray(weights, dtype=np.float64)
+        if np.count_nonzero(weights > 0) < k:
+            raise ValueError(f"Need at least {k} numbers with positive weight to draw {k} distinct ones")
+        if method not in ("alias", "gumbel"):
+            raise ValueError(f"Unknown sampling method: {method!r} (expected 'alias' or 'gumbel')")
+        self.k = k
+        self.method = method
+        self.rng = np.random.default_rng(seed)
+        self.probabilities = weights / weights.sum()
+        self.prob, self.alias = alias_table(self.probabilities)
+        with np.errstate(divide="ignore"):
+            self.log_weights = np.log(self.probabilities).astype(np.float32)
+
+    @classmethod
+    def from_distribution(cls, prob_dist, k=4, seed=None, method="alias"):
+        """Build from a {number: probability} dict such as build_importance_distribution returns."""
+        weights = np.zeros(NUMBERS)
+        for num, prob in prob_dist.items():
+            weights[num - 1] = prob
+        return cls(weights, k, seed, method)
+
+    def draw_numbers(self, shape, rng=None):
+        """Independent weighted draws (with replacement) of single numbers."""
+        rng = self.rng if rng is None else rng
+        columns = rng.integers(len(self.prob), size=shape)
+        keep = rng.random(shape) < self.prob[columns]
+        return np.where(keep, columns, self.alias[columns]) + 1
+
+    def _successive(self, rows, rng):
+        # Fill one column at a time, redrawing a row's number until it differs
+        # from the numbers already in that row (rejection = renormalising).
+        block = np.zeros((rows, self.k), dtype=np.uint8)
+        for j in range(self.k):
+            pending = np.arange(rows)
+            while len(pending):
+                numbers = self.draw_numbers(len(pending), rng)
+                clash = (block[pending, :j] == numbers[:, None]).any(axis=1)
+                block[pending[~clash], j] = numbers[~clash]
+                pending = pending[clash]
+        return block
+
+    def sample(self, size, rng=None):
+        """(size, k) uint8 array of tickets, numbers distinct and sorted within each row."""
+        rng = self.rng if rng is None else rng
+        tickets = np.empty((size, self.k), dtype=np.uint8)
+        for start in range(0, size, CHUNK_ROWS):
+            rows = min(CHUNK_ROWS, size - start)
+            if self.method == "gumbel":
+                keys = self.log_weights + rng.gumbel(size=(rows, NUMBERS)).astype(np.float32)
+                block = np.argpartition(-keys, self.k - 1, axis=1)[:, :self.k] + 1
+            else:
+                block = self._successive(rows, rng)
+            tickets[start:start + rows] = block
+        tickets.sort(axis=1)
+        return tickets
@@ -0,0 +1,267 @@
+# Results-page scraper shared by scrap.py (full backfill) and the daily
+# update in 0statistical-analysis.py.
+#
+# Pages are fetched on a thread pool over one pooled requests.Session, so a
+# backfill of 60 year pages takes about as long as the slowest page. Every
+# response is kept in an on-disk cache with its ETag/Last-Modified:
+# a year's page is served straight from the cache once the copy there was
+# fetched FINAL_GRACE_DAYS after the year ended, and any other page is
+# revalidated with a conditional request (a 304 costs no body).
+#
+# Parsing uses lxml through BeautifulSoup when it is installed and only
+# builds the table rows; the parsed draws are cached next to the page, so an
+# unchanged page is never parsed twice. serve_fixtures() serves saved pages
+# from a local directory, so the whole pipeline can run (and be timed) offline.
+
+import hashlib
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from bs4 import BeautifulSoup, SoupStrainer
+from requests.adapters import HTTPAdapter
+
+from draw_store import _tmp_path
+
+try:
+    import lxml  # noqa: F401
+    PARSER = "lxml"
+except ImportError:
+    PARSER = "html.parser"
+
+BASE_URL = "https://za.lottonumbers.com/"
+CACHE_DIR = ".scrape-cache"
+FIRST_YEAR = 1996
+WORKERS = 8
+TIMEOUT = 30
+FINAL_GRACE_DAYS = 14  # a year's page may still change this long after the year ends
+
+ORDINAL = re.compile(r"(\d+)(st|nd|rd|th)")
+
+
+def results_url(draw_time, year, base_url=BASE_URL):
+    return f"{base_url}uk-49s-{draw_time}/results/{year}"
+
+
+def make_session(workers=WORKERS):
+    """One Session whose connection pool is big enough for every worker thread."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class PageCache:
+    """Response bodies on disk, keyed by URL, with their validators."""
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    def _paths(self, url):
+        base = os.path.join(self.cache_dir, hashlib.sha1(url.encode()).hexdigest())
+        return base + ".html", base + ".json"
+
+    def get(self, url):
+        """(body, headers) for a cached URL, or (None, {}).
+
+        headers holds the validators plus "fetched", the ISO date the body
+        was last confirmed with the server.
+        """
+        body_path, meta_path = self._paths(url)
+        try:
+            with open(meta_path, "r") as f:
+                headers = json.load(f)
+            with open(body_path, "r", encoding="utf-8") as f:
+                return f.read(), headers
+        except (OSError, ValueError):
+            return None, {}
+
+    def put(self, url, body, headers):
+        body_path, meta_path = self._paths(url)
+        validators = {k: headers[k] for k in ("ETag", "Last-Modified") if k in headers}
+        validators["fetched"] = date.today().isoformat()
+        # body first, meta last: a page only counts as cached once both exist
+        self._write(body_path, lambda f: f.write(body))
+        self._write(meta_path, lambda f: json.dump(validators, f))
+
+    def _write(self, path, write):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = _tmp_path(path)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            write(f)
+        os.replace(tmp_path, path)
+
+    def parsed(self, url, body, parse):
+        """parse(body), reusing the stored result while the body is unchanged."""
+        path = self._paths(url)[0][:-len(".html")] + ".draws.json"
+        digest = hashlib.sha1(body.encode()).hexdigest()
+        try:
+            with open(path, "r") as f:
+                stored = json.load(f)
+            if stored["sha1"] == digest:
+                return stored["draws"]
+        except (OSError, ValueError, KeyError):
+            pass
+        draws = parse(body)
+        self._write(path, lambda f: json.dump({"sha1": digest, "draws": draws}, f))
+        return draws
+
+
+def final_after(year):
+    """The day from which a year's page can no longer change."""
+    return date(year + 1, 1, 1) + timedelta(days=FINAL_GRACE_DAYS)
+
+
+def fetch(url, session, cache=None, final=None):
+    """Page text, or None when it couldn't be retrieved.
+
+    final is the date from which the page can no longer change (see
+    final_after); a cached copy fetched on or after it is used without
+    asking the server. Copies fetched earlier, e.g. a year's page cached
+    in late December, are still revalidated.
+    """
+    body, validators = cache.get(url) if cache else (None, {})
+    if body is not None and final is not None and validators.get("fetched", "") >= final.isoformat():
+        return body
+
+    headers = {}
+    if body is not None:
+        if "ETag" in validators:
+            headers["If-None-Match"] = validators["ETag"]
+        if "Last-Modified" in validators:
+            headers["If-Modified-Since"] = validators["Last-Modified"]
+    try:
+        response = session.get(url, headers=headers, timeout=TIMEOUT)
+    except requests.RequestException as e:
+        print("Failed to retrieve " + url + ": " + str(e))
+        return body
+
+    if response.status_code == 304 and body is not None:
+        if cache:
+            cache.put(url, body, validators)  # confirmed as of today
+        return body
+    if response.status_code != 200:
+        print("Failed to retrieve " + url + " results")
+        return body
+    if cache:
+        cache.put(url, response.text, response.headers)
+    return response.text
+
+
+def parse_date(text):
+    """'Thursday 26th March 2025' -> '2025-03-26'."""
+    text = " ".join(text.strip().split(" ")[1:])  # Removes "Thursday"
+    text = ORDINAL.sub(r"\1", text)  # Converts "26th" → "26"
+    return datetime.strptime(text, "%d %B %Y").strftime("%Y-%m-%d")
+
+
+def parse_results(html, draw_time, since=None):
+    """Draw dicts from one results page, optionally only those on or after `since` (a date)."""
+    soup = BeautifulSoup(html, PARSER, parse_only=SoupStrainer("tr"))
+    results = []
+    for row in soup.find_all("tr"):
+        columns = row.find_all("td")
+        if len(columns) <= 1:
+            continue
+        try:
+            formatted_date = parse_date(columns[0].text)
+        except ValueError:
+            print('Invalid date', columns[0].text)
+            continue  # Skip rows with invalid dates
+
+        try:
+            numbers = [int(num.text.strip()) for num in columns[1].find_all("li")]
+        except ValueError:
+            print('Invalid value skipped')
+            continue
+
+        results.append({"date": formatted_date, "time": draw_time, "numbers": numbers})
+    return on_or_after(results, since)
+
+
+def on_or_after(results, since):
+    if since is None:
+        return results
+    since = since.isoformat()  # ISO dates compare in date order
+    return [entry for entry in results if entry["date"] >= since]
+
+
+def scrape_pages(pages, base_url=BASE_URL, since=None, workers=WORKERS, cache_dir=CACHE_DIR):
+    """Fetch and parse (draw_time, year) pages concurrently -> {(draw_time, year): draws or None}."""
+    cache = PageCache(cache_dir) if cache_dir else None
+    with make_session(workers) as session:
+        def work(page):
+            draw_time, year = page
+            url = results_url(draw_time, year, base_url)
+            html = fetch(url, session, cache, final=final_after(year))
+            if html is None:
+                return None
+            if cache is None:
+                return parse_results(html, draw_time, since)
+            return on_or_after(cache.parsed(url, html, lambda body: parse_results(body, draw_time)), since)
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return dict(zip(pages, pool.map(work, pages)))
+
+
+def scrape_since(last_day, base_url=BASE_URL, workers=WORKERS, cache_dir=CACHE_DIR):
+    """Every lunchtime and teatime draw on or after `last_day` (a date)."""
+    pages = [(draw_time, year)
+             for year in range(last_day.year, date.today().year + 1)
+             for draw_time in ("lunchtime", "teatime")]
+    results = []
+    for draws in scrape_pages(pages, base_url, last_day, workers, cache_dir).values():
+        results.extend(draws or [])
+    return results
+
+
+def scrap_link(url, last_day, time):
+    """Single-page fetch kept for callers of the old helper (no cache)."""
+    with make_session(1) as session:
+        html = fetch(url, session)
+    return [] if html is None else parse_results(html, time, last_day)
+
+
+# Offline mode: saved pages laid out like the site's URL paths
+# (<dir>/uk-49s-lunchtime/results/2025) served over local HTTP, with
+# Last-Modified / If-Modified-Since handled by http.server.
+
+def save_fixture(directory, draw_time, year, html):
+    path = os.path.join(directory, f"uk-49s-{draw_time}", "results", str(year))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(html)
+
+
+def fixture_page(records):
+    """A results page in the site's table markup, for building fixtures from known draws."""
+    rows = []
+    for entry in records:
+        day = date.fromisoformat(entry["date"])
+        suffix = "th" if 10 <= day.day % 100 <= 20 else {1: "st", 2: "nd", 3: "rd"}.get(day.day % 10, "th")
+        label = f"{day:%A} {day.day}{suffix} {day:%B %Y}"
+        balls = "".join(f"<li>{n}</li>" for n in entry["numbers"])
+        rows.append(f"<tr><td>{label}</td><td><ul>{balls}</ul></td></tr>")
+    return "<html><body><table><tr><th>Date</th><th>Numbers</th></tr>%s</table></body></html>" % "".join(rows)
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_fixtures(directory, port=0):
+    """Serve `directory` on localhost in a background thread; returns (server, base_url).
+
+    Call server.shutdown() when done.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), partial(_QuietHandler, directory=directory))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/"
@@ -0,0 +1,25 @@
+# The numbered scripts (0statistical-analysis.py, 7genetic-monte-carlo.py, ...)
+# aren't valid module names, so tools that reuse their functions load them
+# from their files here.
+
+import importlib.util
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_script(file_name):
+    """Import one of the numbered scripts as a module.
+
+    It is registered in sys.modules under its file name minus the number
+    and with underscores, e.g. "genetic_monte_carlo", so its functions
+    pickle for process pools.
+    """
+    name = os.path.splitext(file_name)[0].lstrip("0123456789").replace("-", "_")
+    if name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(name, os.path.join(HERE, file_name))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+    return sys.modules[name]
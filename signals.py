@@ -0,0 +1,300 @@
+# Declarative number signals for the daily statistical analysis.
+#
+# A signal is one (population x window x statistic x side x k) choice, e.g.
+# "teatime draws, last 49 days, day-of-week share, bottom 6". The engine
+# evaluates any list of signals against one history: every distinct
+# (population, window, statistic) score vector is computed once and ranked
+# once, whatever number of signals use it, and the result is a
+# (signals x 49) vote matrix with the probability behind each vote. Weighted
+# tallies, provenance and "which signals fired for this ticket" checks for
+# any number of played tickets are array operations on that matrix (tickets
+# OR together per-number signal bitsets).
+#
+# Populations are None (all draws), LUNCHTIME or TEATIME; windows are None
+# (whole history) or a number of days back from `today`; statistics are
+#   "frequency"  share of draws holding the number (count / draws)
+#   "dom"        share of the balls drawn on today's day of the month
+#   "dow"        share of the balls drawn on today's day of the week
+
+from collections import namedtuple
+
+import numpy as np
+
+from aggregates import aggregates_of
+from calendar_cubes import calendar_cubes
+from draw_store import LUNCHTIME, TEATIME, TIME_NAMES
+from incidence import BALLS_PER_DRAW, NUMBERS, Incidence, day_of_month, day_of_week
+from windows import window_index
+
+STATISTICS = ("frequency", "dom", "dow")
+SIDES = ("top", "bottom")
+
+Signal = namedtuple("Signal", "name population window statistic side k")
+
+# the sample names the analysis has always used: all_top_sample,
+# last49_date_bottom_teatime_sample, ...
+_STATISTIC_LABELS = {"frequency": "", "dom": "date_", "dow": "day_"}
+
+
+def signal_name(population, window, statistic, side):
+    span = "all" if window is None else "last%d" % window
+    slot = "" if population is None else "_" + TIME_NAMES[population]
+    return "%s_%s%s%s_sample" % (span, _STATISTIC_LABELS[statistic], side, slot)
+
+
+def declare(population=None, window=None, statistic="frequency", side="top", k=6, name=None):
+    if statistic not in STATISTICS:
+        raise ValueError(f"Unknown statistic: {statistic!r} (expected one of {STATISTICS})")
+    if side not in SIDES:
+        raise ValueError(f"Unknown side: {side!r} (expected 'top' or 'bottom')")
+    return Signal(name or signal_name(population, window, statistic, side), population, window, statistic, side, k)
+
+
+def signal_grid(populations=(None, LUNCHTIME, TEATIME), windows=(None, 49), statistics=STATISTICS, sides=SIDES, k=6):
+    """Every combination of the given choices, in the order the old sample lists were built."""
+    return [declare(population, window, statistic, side, k)
+            for window in windows
+            for statistic in statistics
+            for population in populations
+            for side in sides]
+
+
+DEFAULT_SIGNALS = signal_grid()
+
+_NONE = np.array([], dtype=np.intp)
+_UNSEEN = np.iinfo(np.int64).max
+
+
+def first_seen(numbers, times, start, end, population=None, block=1024):
+    """(49,) where each number first appears reading rows end-1 down to start, balls in drawn order.
+
+    That is the order Counter(df["number"]) met them in the analysis'
+    newest-first frame, which is how it broke equal frequencies. Rows are
+    read a block at a time and the scan stops once every number turned up;
+    numbers never seen get the largest int64.
+    """
+    key = np.full(NUMBERS, _UNSEEN, dtype=np.int64)
+    offset = 0
+    while end > start and (key == _UNSEEN).any():
+        lo = max(start, end - block)
+        rows = np.asarray(numbers[lo:end])[::-1]
+        if population is not None:
+            rows = rows[np.asarray(times[lo:end])[::-1] == population]
+        balls = rows.ravel()
+        values, first = np.unique(balls, return_index=True)
+        drawn = values > 0
+        values, first = values[drawn].astype(np.intp) - 1, first[drawn] + offset
+        key[values] = np.minimum(key[values], first)
+        offset += balls.size
+        end = lo
+    return key
+
+
+class SignalVotes:
+    """(signals x 49) votes with the probability behind each one.
+
+    ranks[s, n] is where number n+1 came in signal s (0 = listed first, as
+    the analysis has always listed that sample), -1 where it got no vote. Each signal carries a
+    weight (1 unless reweighted) used by the tallies.
+
+    Played tickets are (T, m) arrays of numbers, zero-padded when they have
+    different lengths; every ticket query answers all of them at once.
+    """
+
+    def __init__(self, signals, ranks, probabilities, weights=None):
+        self.signals = list(signals)
+        self.names = [signal.name for signal in self.signals]
+        self.ranks = ranks
+        self.votes = ranks >= 0
+        self.probabilities = probabilities
+        self.weights = np.ones(len(self.signals), dtype=np.int64) if weights is None else np.asarray(weights)
+        self._bits = None
+
+    def __len__(self):
+        return len(self.signals)
+
+    def select(self, keep):
+        """Signals for which keep(signal) is true (or a boolean / index array)."""
+        if callable(keep):
+            keep = np.array([bool(keep(signal)) for signal in self.signals], dtype=bool)
+        rows = np.arange(len(self.signals))[keep]
+        return SignalVotes([self.signals[i] for i in rows], self.ranks[rows], self.probabilities[rows], self.weights[rows])
+
+    def for_time(self, time):
+        """Signals over all draws or over the given draw time (what a lunchtime/teatime suggestion uses)."""
+        return self.select(lambda signal: signal.population in (None, time))
+
+    def weighted(self, weights):
+        """The same votes with new signal weights: an array, a {name: weight} dict (others keep 1) or weight(signal)."""
+        if callable(weights):
+            weights = [weights(signal) for signal in self.signals]
+        elif isinstance(weights, dict):
+            weights = [weights.get(name, 1) for name in self.names]
+        weights = np.asarray(weights)
+        if weights.shape != (len(self.signals),):
+            raise ValueError(f"Expected {len(self.signals)} weights, got shape {weights.shape}")
+        return SignalVotes(self.signals, self.ranks, self.probabilities, weights)
+
+    # tallies
+
+    def tally(self):
+        """(49,) weighted votes per number."""
+        return self.weights @ self.votes
+
+    def top(self, k=7):
+        """[(number, votes)] for the k most voted numbers, like Counter.most_common over records().
+
+        Equal tallies keep the order the numbers first appear in records().
+        """
+        tally = self.tally()
+        seen = np.flatnonzero(self.votes.any(axis=0))
+        signal_rows = np.where(self.votes, np.arange(len(self.signals))[:, None], len(self.signals))
+        first = (signal_rows * NUMBERS + np.where(self.votes, self.ranks, 0)).min(axis=0)
+        best = seen[np.lexsort((first[seen], -tally[seen]))][:k]
+        return [(int(n) + 1, tally[n].item()) for n in best]
+
+    def provenance(self, number):
+        """Names of the signals that voted for a number."""
+        return [self.names[s] for s in np.flatnonzero(self.votes[:, number - 1])]
+
+    # played tickets
+
+    @property
+    def bits(self):
+        """(50, ceil(signals / 8)) packed signal bits per number; row 0 is the empty padding number."""
+        if self._bits is None:
+            packed = np.packbits(self.votes.T, axis=1)
+            self._bits = np.concatenate([np.zeros((1, packed.shape[1]), dtype=np.uint8), packed])
+        return self._bits
+
+    def hits(self, tickets):
+        """(T, m) weighted votes for every played number (0 for padding)."""
+        tally = np.concatenate([[0], self.tally()])
+        return tally[np.asarray(tickets, dtype=np.intp)]
+
+    def fired(self, tickets):
+        """(T, signals) bool: which signals voted for any number of each ticket."""
+        tickets = np.asarray(tickets, dtype=np.intp)
+        packed = np.bitwise_or.reduce(self.bits[tickets], axis=-2)
+        return np.unpackbits(packed, axis=-1, count=len(self.signals)).astype(bool)
+
+    def fired_by_number(self, tickets):
+        """(T, m, signals) bool: which signals voted for each played number."""
+        tickets = np.asarray(tickets, dtype=np.intp)
+        return np.unpackbits(self.bits[tickets], axis=-1, count=len(self.signals)).astype(bool)
+
+    def records(self):
+        """Legacy [{"number", "probability", "coming_from"}] list, one entry per vote, in signal then rank order."""
+        rows, cols = np.nonzero(self.votes)
+        order = np.lexsort((self.ranks[rows, cols], rows))
+        rows, cols = rows[order], cols[order]
+        return [{"number": int(n) + 1, "probability": float(self.probabilities[s, n]), "coming_from": self.names[s]}
+                for s, n in zip(rows.tolist(), cols.tolist())]
+
+
+def signal_groups(signals):
+    """Signals split by (window, statistic), the unit that shares score vectors, e.g. to spread over processes."""
+    groups = {}
+    for signal in signals:
+        groups.setdefault((signal.window, signal.statistic), []).append(signal)
+    return list(groups.values())
+
+
+def combine_votes(parts, signals=None):
+    """One SignalVotes from several, rows in the order of `signals` (default: as given)."""
+    merged = [signal for part in parts for signal in part.signals]
+    rows = {signal: i for i, signal in enumerate(merged)}
+    order = np.arange(len(merged)) if signals is None else np.array([rows[signal] for signal in signals], dtype=np.intp)
+    ranks = np.concatenate([part.ranks for part in parts])[order]
+    probabilities = np.concatenate([part.probabilities for part in parts])[order]
+    weights = np.concatenate([part.weights for part in parts])[order]
+    return SignalVotes([merged[i] for i in order], ranks, probabilities, weights)
+
+
+class SignalEngine:
+    """Evaluates signals against one DrawTable as of day `today` (a day number).
+
+    dom/dow default to today's day of the month and week; pass them to
+    score another calendar day.
+    """
+
+    def __init__(self, draws, today, dom=None, dow=None):
+        self.draws = draws
+        self.today = int(today)
+        self.dom = int(day_of_month(self.today)) if dom is None else dom
+        self.dow = int(day_of_week(self.today)) if dow is None else dow
+        self._memo = {}
+
+    def _cached(self, key, build):
+        if key not in self._memo:
+            self._memo[key] = build()
+        return self._memo[key]
+
+    def _window_cubes(self, window):
+        def build():
+            if window is None:
+                return calendar_cubes(self.draws)
+            return calendar_cubes(Incidence.from_draws(self.draws[self._window_start(window):]))
+        return self._cached(("cubes", window), build)
+
+    def _window_start(self, window):
+        # rows are in date order, so the window is a suffix of the history
+        return 0 if window is None else int(np.searchsorted(self.draws.dates, self.today - window, side="right"))
+
+    def _first_seen(self, population, window):
+        return first_seen(self.draws.numbers, self.draws.times, self._window_start(window), len(self.draws), population)
+
+    def _frequency_counts(self, population, window):
+        if window is None:
+            aggregates = aggregates_of(self.draws)
+            return (aggregates if population is None else aggregates.for_time(population)).counts()
+        return window_index(self.draws).counts(self.today - window + 1, time=population)
+
+    def scores(self, population, window, statistic):
+        """(top order, bottom order, rounded probabilities) for one score vector, computed once.
+
+        The orders list the candidate numbers (0-based) from the most extreme
+        in each direction, with the analysis' own tie rules: frequencies are
+        ranked on raw counts, equal counts by first appearance newest-first
+        (see first_seen), and the bottom order is that ranking reversed; day
+        probabilities are ranked by CalendarCubes.ranked.
+        """
+        def build():
+            if statistic == "frequency":
+                counts = self._frequency_counts(population, window)
+                total_draws = counts.sum() / BALLS_PER_DRAW
+                prob = np.zeros(NUMBERS)
+                if total_draws:
+                    # Python's round, as the analysis used (np.round differs on a few halves)
+                    prob = np.array([round(share, 3) for share in (counts / total_draws).tolist()])
+                candidates = np.flatnonzero(counts)
+                # ranked on raw counts; the bottom is the tail of that ranking
+                seen = self._first_seen(population, window)[candidates]
+                top = candidates[np.lexsort((seen, -counts[candidates]))]
+                return top, top[::-1], prob
+            cubes = self._window_cubes(window)
+            if population is not None:
+                cubes = cubes.for_time(population)
+            day = self.dom if statistic == "dom" else self.dow
+            top, prob = cubes.ranked(statistic, day)
+            bottom, _ = cubes.ranked(statistic, day, bottom=True)
+            return top, bottom, prob
+        return self._cached((population, window, statistic), build)
+
+    def evaluate(self, signals=DEFAULT_SIGNALS):
+        ranks = np.full((len(signals), NUMBERS), -1, dtype=np.int16)
+        probabilities = np.zeros((len(signals), NUMBERS))
+        for i, signal in enumerate(signals):
+            top, bottom, prob = self.scores(signal.population, signal.window, signal.statistic)
+            picked = (top if signal.side == "top" else bottom)[:signal.k]
+            if signal.side == "bottom" and signal.statistic == "frequency":
+                # the analysis always listed these as the tail of the frequency
+                # ranking (sorted_freq[-k:]), least frequent last
+                picked = picked[::-1]
+            ranks[i, picked] = np.arange(len(picked))
+            probabilities[i] = prob
+        return SignalVotes(signals, ranks, probabilities)
+
+
+def evaluate_signals(draws, today, signals=DEFAULT_SIGNALS, dom=None, dow=None):
+    return SignalEngine(draws, today, dom, dow).evaluate(signals)
@@ -0,0 +1,151 @@
+# A small dependency-graph runner for multi-stage scripts.
+#
+# Each stage names the stages it needs. It starts as soon as those have all
+# finished and is called with their results, in the order listed; stages in
+# `after` only have to finish first (their results stay where they are).
+#   "io"    network calls and disk appends, on a thread pool
+#   "cpu"   analysis, on a process pool; workers reopen the memory-mapped
+#           draw store, so the history is shared read-only through the
+#           page cache
+#   "main"  quick glue, in the calling process between the others
+# The run is then bounded by its critical path rather than by the sum of
+# its stages, and StageRun.report() shows that path.
+
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+KINDS = ("io", "cpu", "main")
+
+Stage = namedtuple("Stage", "name func deps kind after")
+Timing = namedtuple("Timing", "name kind start end")
+
+
+def stage(name, func, deps=(), kind="cpu", after=()):
+    if kind not in KINDS:
+        raise ValueError(f"Unknown stage kind: {kind!r} (expected one of {KINDS})")
+    return Stage(name, func, tuple(deps), kind, tuple(after))
+
+
+def _needs(s):
+    return s.deps + s.after
+
+
+def _ordered(stages):
+    """Stages in a dependency order, checking names and cycles."""
+    by_name = {}
+    for s in stages:
+        if s.name in by_name:
+            raise ValueError(f"Duplicate stage: {s.name!r}")
+        by_name[s.name] = s
+    for s in stages:
+        for dep in _needs(s):
+            if dep not in by_name:
+                raise ValueError(f"Stage {s.name!r} needs unknown stage {dep!r}")
+
+    order, state = [], {}
+
+    def visit(name, path):
+        if state.get(name) == "done":
+            return
+        if state.get(name) == "visiting":
+            raise ValueError("Stage cycle: " + " -> ".join(path + [name]))
+        state[name] = "visiting"
+        for dep in _needs(by_name[name]):
+            visit(dep, path + [name])
+        state[name] = "done"
+        order.append(by_name[name])
+
+    for s in stages:
+        visit(s.name, [])
+    return order
+
+
+def _timed(func, args):
+    # wall clock, so worker processes' times line up with ours
+    start = time.time()
+    result = func(*args)
+    return result, start, time.time()
+
+
+class StageRun:
+    """Results and timings of one run_stages() call."""
+
+    def __init__(self, stages, results, timings, start, end):
+        self.stages = {s.name: s for s in stages}
+        self.results = results
+        self.timings = timings
+        self.start = start
+        self.end = end
+
+    def __getitem__(self, name):
+        return self.results[name]
+
+    def critical_path(self):
+        """Stage names from the first to the last-finishing one, each gated by the dep that finished last."""
+        name = max(self.timings, key=lambda n: self.timings[n].end)
+        path = [name]
+        while _needs(self.stages[name]):
+            name = max(_needs(self.stages[name]), key=lambda n: self.timings[n].end)
+            path.append(name)
+        return path[::-1]
+
+    def report(self):
+        path = self.critical_path()
+        busy = sum(t.end - t.start for t in self.timings.values())
+        lines = ["%-24s %-4s %8s %8s %8s" % ("stage", "kind", "start", "end", "took")]
+        for t in sorted(self.timings.values(), key=lambda t: t.start):
+            lines.append("%-24s %-4s %8.3f %8.3f %8.3f%s" % (
+                t.name, t.kind, t.start - self.start, t.end - self.start, t.end - t.start,
+                "  *" if t.name in path else ""))
+        lines.append("wall %.3fs for %.3fs of stage time; critical path (*): %s"
+                     % (self.end - self.start, busy, " -> ".join(path)))
+        return "\n".join(lines)
+
+
+def run_stages(stages, workers=None, io_workers=4):
+    """Run a stage graph and return its StageRun.
+
+    workers is the process pool size (default: one per CPU). With a single
+    worker, cpu stages share the thread pool instead of paying for processes.
+    The first stage to fail stops the run, and its exception propagates.
+    """
+    stages = _ordered(stages)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    results, timings = {}, {}
+    pending = list(stages)
+    running = {}
+    start = time.time()
+
+    threads = ThreadPoolExecutor(io_workers)
+    processes = ProcessPoolExecutor(workers) if workers > 1 and any(s.kind == "cpu" for s in stages) else None
+    try:
+        while pending or running:
+            ready = [s for s in pending if all(dep in results for dep in _needs(s))]
+            for s in ready:
+                pending.remove(s)
+            # hand everything that can go to a pool over before working in this process
+            for s in sorted(ready, key=lambda s: s.kind == "main"):
+                args = [results[dep] for dep in s.deps]
+                if s.kind == "main":
+                    results[s.name], t0, t1 = _timed(s.func, args)
+                    timings[s.name] = Timing(s.name, s.kind, t0, t1)
+                else:
+                    pool = processes if s.kind == "cpu" and processes is not None else threads
+                    running[pool.submit(_timed, s.func, args)] = s
+            if any(s.kind == "main" for s in ready) or not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                s = running.pop(future)
+                results[s.name], t0, t1 = future.result()
+                timings[s.name] = Timing(s.name, s.kind, t0, t1)
+    finally:
+        for future in running:
+            future.cancel()
+        threads.shutdown()
+        if processes is not None:
+            processes.shutdown()
+    return StageRun(stages, results, timings, start, time.time())
@@ -0,0 +1,70 @@
+# How often has each 4-number set come out?
+#
+# A 7-ball draw contains C(7, 4) = 35 four-number subsets and there are only
+# C(49, 4) = 211,876 possible subsets, so the whole answer fits in one uint32
+# array indexed by colex rank (see combos.py). The table is built in a single
+# pass over the history, persisted next to the draw store, and topped up from
+# just the new rows when draws are appended.
+
+from itertools import combinations
+from math import comb
+
+import numpy as np
+
+from combos import colex_rank, colex_unrank
+from draw_store import BALLS_PER_DRAW, load_derived, save_derived
+
+SUBSET_SIZE = 4
+TABLE_SIZE = comb(49, SUBSET_SIZE)
+TABLE_NAME = "subset4"
+
+POSITIONS = np.array(list(combinations(range(BALLS_PER_DRAW), SUBSET_SIZE)), dtype=np.intp)
+
+
+def subset_ranks(numbers):
+    """Colex ranks of every distinct 4-subset of each draw, flattened."""
+    rows = np.sort(np.asarray(numbers, dtype=np.int64), axis=1)
+    # blank out repeated balls so a draw listing one twice counts each set once
+    rows[:, 1:][rows[:, 1:] == rows[:, :-1]] = 0
+    rows.sort(axis=1)
+
+    subsets = rows[:, POSITIONS].reshape(-1, SUBSET_SIZE)
+    # short draws (5 or 6 balls) are zero-padded; skip subsets touching padding
+    subsets = subsets[subsets[:, 0] > 0]
+    return colex_rank(subsets)
+
+
+def build_counts(numbers, counts=None):
+    """Add the 4-subsets of `numbers` into `counts` (a fresh table if None)."""
+    added = np.bincount(subset_ranks(numbers), minlength=TABLE_SIZE)
+    if counts is None:
+        return added.astype(np.uint32)
+    counts += added.astype(np.uint32)
+    return counts
+
+
+def subset_counts(draws):
+    """4-subset occurrence table for a DrawTable, loaded/updated from disk when possible."""
+    if TABLE_NAME in draws.cache:
+        return draws.cache[TABLE_NAME]
+
+    counts, rows = load_derived(draws, TABLE_NAME)
+    if counts is None or rows < len(draws):
+        counts = build_counts(np.asarray(draws.numbers[rows:]), counts)
+        save_derived(draws, TABLE_NAME, counts)
+
+    draws.cache[TABLE_NAME] = counts
+    return counts
+
+
+def subset_count(draws, numbers):
+    """Number of draws containing the given 4 distinct numbers."""
+    return int(subset_counts(draws)[colex_rank(sorted(numbers))[0]])
+
+
+def top_subsets(counts, k=10):
+    """The k most frequent historical 4-sets as (numbers, count), best first."""
+    k = min(k, len(counts))
+    best = np.argpartition(counts, len(counts) - k)[-k:]
+    best = best[np.argsort(-counts[best].astype(np.int64), kind="stable")]
+    return [(numbers.tolist(), int(counts[r])) for numbers, r in zip(colex_unrank(best, SUBSET_SIZE), best)]
@@ -0,0 +1,37 @@
+# The modules live flat in the repository root, next to the numbered
+# scripts, so the tests import them from there.
+
+import json
+import os
+import sys
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def synthetic_records(days, last_day=date(2025, 4, 6), seed=0):
+    """Newest-first draw dicts, lunchtime and teatime every day up to last_day, like the merged file."""
+    rng = np.random.default_rng(seed)
+    records = []
+    for back in range(days):
+        day = (last_day - timedelta(days=back)).isoformat()
+        for time in ("teatime", "lunchtime"):
+            records.append({"date": day, "time": time, "numbers": (rng.permutation(49)[:7] + 1).tolist()})
+    return records
+
+
+def write_history(path, records):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(records, f, indent=4)
+    return str(path)
+
+
+@pytest.fixture
+def history(tmp_path):
+    """(path, records) of a 120-day synthetic history written as a merged JSON file."""
+    records = synthetic_records(120)
+    return write_history(tmp_path / "draws.json", records), records
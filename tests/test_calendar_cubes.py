@@ -0,0 +1,16 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from calendar_cubes import legacy_order
+
+
+@pytest.mark.parametrize("descending", [False, True])
+def test_legacy_order_breaks_ties_like_sort_values(descending):
+    rng = np.random.default_rng(0)
+    for size in (6, 20, 49):
+        # few distinct values, so most of them tie
+        values = np.round(rng.integers(0, 5, size=size) / 40, 3)
+        frame = pd.DataFrame({"p": values})
+        expected = frame.sort_values(by="p", ascending=not descending).index.to_numpy()
+        assert legacy_order(values, descending).tolist() == expected.tolist()
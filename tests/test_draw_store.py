@@ -0,0 +1,41 @@
+import json
+import os
+
+from conftest import synthetic_records, write_history
+from draw_store import append_draws, compact, journal_path, load_draws, store_path
+
+
+def test_load_matches_json(history):
+    path, records = history
+    draws = load_draws(path)
+    assert os.path.isdir(store_path(path))
+    # the store holds the rows oldest first
+    assert list(reversed(draws.to_records())) == records
+    # a second load reads the store back instead of rebuilding it
+    assert list(reversed(load_draws(path).to_records())) == records
+
+
+def test_append_compact_round_trip(tmp_path):
+    everything = synthetic_records(130)
+    new, old = everything[:20], everything[20:]
+    path = write_history(tmp_path / "draws.json", old)
+    load_draws(path)
+
+    # draws already in the history are not journalled twice
+    assert append_draws(path, new + old[:3]) == len(new)
+    assert append_draws(path, new) == 0
+    assert os.path.exists(journal_path(path))
+    assert list(reversed(load_draws(path).to_records())) == everything
+
+    compact(path)
+    assert not os.path.exists(journal_path(path))
+    with open(path, "r", encoding="utf-8") as f:
+        assert json.load(f) == everything
+    assert list(reversed(load_draws(path).to_records())) == everything
+
+
+def test_edited_json_rebuilds_store(history):
+    path, records = history
+    load_draws(path)
+    write_history(path, records[:-10])
+    assert list(reversed(load_draws(path).to_records())) == records[:-10]
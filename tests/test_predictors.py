@@ -0,0 +1,43 @@
+# Every stochastic predictor takes a seed; the same seed must give the same
+# tickets, however the work is split.
+
+import numpy as np
+import pytest
+
+from draw_store import load_draws
+from scripts import load_script
+
+genetic = load_script("7genetic-monte-carlo.py")
+metropolis = load_script("8metropolis-hastings.py")
+smc = load_script("4sequential-monte-carlo.py")
+
+
+@pytest.fixture
+def draws(history):
+    return load_draws(history[0]).filter_time("lunchtime")
+
+
+def test_genetic_is_reproducible(draws):
+    first = genetic.genetic_monte_carlo_predict(draws, generations=5, population_size=30, seed=7)
+    assert first == genetic.genetic_monte_carlo_predict(draws, generations=5, population_size=30, seed=7)
+    assert len(first) == 5 and all(len(set(ticket)) == 4 for ticket in first)
+
+
+def test_island_genetic_is_reproducible_across_processes(draws):
+    options = dict(islands=2, generations=4, population_size=20, seed=3, migration_interval=2)
+    assert (genetic.genetic_monte_carlo_predict(draws, processes=1, **options)
+            == genetic.genetic_monte_carlo_predict(draws, processes=2, **options))
+
+
+def test_metropolis_hastings_is_reproducible(draws):
+    first = metropolis.metropolis_hastings_predict(draws, chains=8, steps=200, seed=5)
+    assert first == metropolis.metropolis_hastings_predict(draws, chains=8, steps=200, seed=5)
+    assert len(first) == 5
+
+
+def test_smc_is_reproducible(draws):
+    first = smc.smc_predict(draws, num_particles=50, seed=11)
+    assert first == smc.smc_predict(draws, num_particles=50, seed=11)
+    counts = np.asarray(draws.numbers).ravel()
+    drawn = set(counts[counts > 0].tolist())
+    assert all(set(ticket) <= drawn for ticket in first)
@@ -0,0 +1,113 @@
+# The signal engine against the pandas analysis it replaced. The reference
+# below is that analysis (process_data, number_frequency and the
+# probability tables, then the top/bottom 6 of each), so the samples, their
+# order and the play suggestions must come out identical, ties included.
+
+import json
+import shutil
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from conftest import ROOT, synthetic_records, write_history
+from draw_store import LUNCHTIME, TEATIME, date_to_day, load_draws
+from incidence import DOW_NAMES
+from signals import DEFAULT_SIGNALS, SignalEngine
+
+
+def process_data(lottery_data):
+    records = []
+    for entry in lottery_data:
+        date_obj = datetime.strptime(entry["date"], "%Y-%m-%d")
+        for num in entry["numbers"]:
+            records.append({"date": entry["date"], "time": entry["time"], "dom": date_obj.day,
+                            "dow": date_obj.strftime("%A"), "number": num})
+    return pd.DataFrame(records)
+
+
+def number_frequency(df):
+    freq = Counter(df["number"])
+    sorted_freq = sorted(freq.items(), key=lambda x: x[1], reverse=True)
+    total_draws = len(df) / 7
+    probability = {num: round(count / total_draws, 3) for num, count in freq.items()}
+    return sorted_freq, probability
+
+
+def probability_per_day(df, column):
+    grouped = df.groupby([column, "number"]).size().unstack(fill_value=0)
+    total_per_day = df.groupby(column).size()
+    return (grouped.div(total_per_day, axis=0)).fillna(0).round(3).T
+
+
+def legacy_samples(lottery_data, today, dom, dow):
+    """{sample name: [(number, probability)]} as the pandas analysis built them."""
+    full = process_data(lottery_data)
+    full["date"] = pd.to_datetime(full["date"])
+    # the analysis ran during the day, so "49 days back" kept the dates after today - 49
+    cutoff = datetime(today.year, today.month, today.day, 12) - timedelta(days=49)
+    samples = {}
+    for span, frame in (("all", full), ("last49", full[full["date"] >= cutoff])):
+        for slot, df in (("", frame), ("_lunchtime", frame[frame["time"] == "lunchtime"]),
+                         ("_teatime", frame[frame["time"] == "teatime"])):
+            sorted_freq, probability = number_frequency(df)
+            samples[f"{span}_top{slot}_sample"] = [(num, probability[num]) for num, _ in sorted_freq[:6]]
+            samples[f"{span}_bottom{slot}_sample"] = [(num, probability[num]) for num, _ in sorted_freq[-6:]]
+            for label, column, day in (("date_", "dom", dom), ("day_", "dow", dow)):
+                today_prob = probability_per_day(df, column)[[day]]
+                for side, ascending in (("top", False), ("bottom", True)):
+                    picked = today_prob.sort_values(by=day, ascending=ascending).head(6)
+                    samples[f"{span}_{label}{side}{slot}_sample"] = [(num, picked[day].loc[num]) for num in picked.index]
+    # in the order the analysis merged them: all_top, all_bottom,
+    # all_top_lunchtime, ..., all_date_top, ..., last49_day_bottom_teatime
+    order = [f"{span}_{label}{side}{slot}_sample" for span in ("all", "last49") for label in ("", "date_", "day_")
+             for slot in ("", "_lunchtime", "_teatime") for side in ("top", "bottom")]
+    return {name: samples[name] for name in order}
+
+
+def legacy_suggestion(samples, time_name):
+    """top_numbers over the samples a draw time's suggestion merged: all draws plus its own."""
+    other = "_teatime" if time_name == "lunchtime" else "_lunchtime"
+    numbers = [num for name, picks in samples.items() if other not in name for num, _ in picks]
+    return Counter(numbers).most_common(7)
+
+
+def engine_samples(votes):
+    samples = {}
+    for record in votes.records():
+        samples.setdefault(record["coming_from"], []).append((record["number"], record["probability"]))
+    return samples
+
+
+def rounded(samples):
+    return {name: [(int(num), round(float(prob), 3)) for num, prob in picks] for name, picks in samples.items()}
+
+
+def check_parity(path, lottery_data, today, dom, dow):
+    expected = legacy_samples(lottery_data, today, dom, dow)
+    votes = SignalEngine(load_draws(path), date_to_day(today.isoformat()), dom, DOW_NAMES.index(dow)).evaluate(DEFAULT_SIGNALS)
+    assert votes.names == list(expected)
+    assert rounded(engine_samples(votes)) == rounded(expected)
+    for time, name in ((LUNCHTIME, "lunchtime"), (TEATIME, "teatime")):
+        assert votes.for_time(time).top(7) == legacy_suggestion(expected, name)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_signals_match_pandas_analysis(tmp_path, seed):
+    # 60 days of draws: small enough that equal counts and probabilities are
+    # everywhere, so every tie rule is exercised at the top/bottom-6 cut
+    today = date(2025, 4, 6)
+    records = synthetic_records(60, today, seed)
+    path = write_history(tmp_path / "draws.json", records)
+    check_parity(path, records, today, today.day, today.strftime("%A"))
+
+
+def test_signals_match_pandas_analysis_on_real_history(tmp_path):
+    # a copy, so the test never writes a store next to the repository's file
+    path = str(tmp_path / "draws.json")
+    shutil.copy(f"{ROOT}/merged_uk_49s_results.json", path)
+    with open(path, "r", encoding="utf-8") as f:
+        records = json.load(f)
+    # the analysis' fixed scoring day: the 24th, a Monday
+    check_parity(path, records, date(2025, 4, 6), 24, "Monday")
@@ -0,0 +1,96 @@
+# Scores for 4-number tickets, shared by the estimators that rank or sample
+# tickets against the history (exact enumeration, Metropolis-Hastings, ...).
+#
+# Every scorer has the signature scorer(draws, tickets) -> float array, where
+# tickets is an (M, 4) array of sorted, distinct balls. Whatever a scorer
+# derives from the history (per-number shares, pair counts, ...) is kept on
+# the DrawTable so scoring many batches only pays for it once.
+
+import numpy as np
+
+from aggregates import aggregates_of
+from combos import colex_rank, colex_unrank
+from incidence import incidence_of
+from subset_table import SUBSET_SIZE, TABLE_SIZE, subset_counts
+
+MISSING_PROBABILITY = 0.0001
+RECENCY_HALF_LIFE = 365  # draws
+
+
+def _cached(draws, key, build):
+    if key not in draws.cache:
+        draws.cache[key] = build()
+    return draws.cache[key]
+
+
+def number_probabilities(draws):
+    """Share of all drawn balls per number (index 0 = ball 1), floored like freq_dist.get(n, 0.0001)."""
+    def build():
+        counts = aggregates_of(draws).counts()
+        return np.where(counts > 0, counts / max(counts.sum(), 1), MISSING_PROBABILITY)
+    return _cached(draws, "number_probabilities", build)
+
+
+def _pair_sum(matrix, tickets):
+    tickets = np.asarray(tickets, dtype=np.intp) - 1
+    total = np.zeros(len(tickets))
+    for i in range(tickets.shape[1]):
+        for j in range(i + 1, tickets.shape[1]):
+            total += matrix[tickets[:, i], tickets[:, j]]
+    return total
+
+
+def frequency_score(draws, tickets):
+    """Sum of the numbers' historical shares (the original Monte Carlo integrand)."""
+    return number_probabilities(draws)[np.asarray(tickets, dtype=np.intp) - 1].sum(axis=1)
+
+
+def cooccurrence_score(draws, tickets):
+    """Total number of draws in which each pair of the ticket's numbers came out together."""
+    pairs = _cached(draws, "cooccurrence", lambda: aggregates_of(draws).cooccurrence())
+    return _pair_sum(pairs, tickets)
+
+
+def recency_score(draws, tickets, half_life=RECENCY_HALF_LIFE):
+    """Like frequency_score, but a draw's weight halves every `half_life` draws back in time."""
+    def build():
+        incidence = incidence_of(draws)
+        age = np.arange(len(incidence))[::-1]  # rows are oldest first
+        weights = 0.5 ** (age / half_life)
+        counts = weights @ incidence.balls
+        return counts / max(counts.sum(), 1e-300)
+    shares = _cached(draws, ("recency", half_life), build)
+    return shares[np.asarray(tickets, dtype=np.intp) - 1].sum(axis=1)
+
+
+def history_score(draws, tickets):
+    """How many past draws contained the whole ticket (4-subset table lookup)."""
+    return subset_counts(draws)[colex_rank(tickets)].astype(np.float64)
+
+
+SCORERS = {
+    "frequency": frequency_score,
+    "cooccurrence": cooccurrence_score,
+    "recency": recency_score,
+    "history": history_score,
+}
+
+
+def get_scorer(scorer):
+    if callable(scorer):
+        return scorer
+    try:
+        return SCORERS[scorer]
+    except KeyError:
+        raise ValueError(f"Unknown scorer: {scorer!r} (expected one of {sorted(SCORERS)})") from None
+
+
+_all_tickets = None
+
+
+def all_tickets():
+    """Every possible 4-number ticket, row r being the ticket with colex rank r."""
+    global _all_tickets
+    if _all_tickets is None:
+        _all_tickets = colex_unrank(np.arange(TABLE_SIZE), SUBSET_SIZE).astype(np.uint8)
+    return _all_tickets
@@ -0,0 +1,102 @@
+# Array helpers shared by the estimators that evolve whole populations of
+# tickets at once (genetic search, sequential Monte Carlo, ...). A batch of
+# tickets is an (N, k) integer array of ball numbers, one ticket per row.
+
+import numpy as np
+
+from combos import numbers_to_masks
+
+
+def random_numbers(shape, rng, pool=None):
+    """Uniformly random balls from 1-49, or from `pool` when given."""
+    if pool is not None:
+        return pool[rng.integers(len(pool), size=shape)]
+    return rng.integers(1, 50, size=shape)
+
+
+def redraw_repeats(tickets, rng, pool=None):
+    """Redraw any number that repeats an earlier one in its ticket until all rows are distinct, in place.
+
+    Rows are not sorted, which keeps this cheap for streaming generation.
+    """
+    rows = np.arange(len(tickets))
+    while len(rows):
+        block = tickets[rows]
+        repeated = np.zeros(block.shape, dtype=bool)
+        for j in range(1, block.shape[1]):
+            for i in range(j):
+                repeated[:, j] |= block[:, j] == block[:, i]
+        bad = repeated.any(axis=1)
+        # only the tickets that still hold a repeat are touched again
+        rows, block, repeated = rows[bad], block[bad], repeated[bad]
+        block[repeated] = random_numbers(np.count_nonzero(repeated), rng, pool)
+        tickets[rows] = block
+    return tickets
+
+
+def _repeats(columns):
+    repeated = np.zeros(columns.shape[1], dtype=bool)
+    for j in range(1, len(columns)):
+        for i in range(j):
+            repeated |= columns[j] == columns[i]
+    return repeated
+
+
+def distinct_numbers(count, k, rng, pool=None):
+    """(count, k) tickets of k distinct balls from 1-49 (or `pool`), unsorted.
+
+    Built column by column from uint8 draws, and rows holding a repeat are
+    redrawn whole, so each ticket is a uniform k-subset in random order.
+    """
+    pool = np.arange(1, 50, dtype=np.uint8) if pool is None else np.asarray(pool, dtype=np.uint8)
+    columns = rng.integers(len(pool), size=(k, count), dtype=np.uint8)
+    rows = np.flatnonzero(_repeats(columns))
+    while len(rows):
+        block = rng.integers(len(pool), size=(k, len(rows)), dtype=np.uint8)
+        ok = ~_repeats(block)
+        columns[:, rows[ok]] = block[:, ok]
+        rows = rows[~ok]
+    return pool[columns.T]
+
+
+def repair_duplicates(tickets, rng, pool=None):
+    """Redraw repeated numbers until all rows are distinct, then sort each ticket, in place."""
+    redraw_repeats(tickets, rng, pool)
+    tickets.sort(axis=1)
+    return tickets
+
+
+def replace_one(tickets, rng, pool=None):
+    """Swap one random number in every ticket for a number the ticket doesn't already hold.
+
+    Raises ValueError unless `pool` has more distinct numbers than a ticket
+    holds; otherwise a ticket could hold the whole pool and never find one.
+    """
+    available = 49 if pool is None else len(np.unique(pool))
+    if available <= tickets.shape[1]:
+        raise ValueError(f"Pool of {available} numbers is too small to swap into tickets of {tickets.shape[1]}")
+    rows = np.arange(len(tickets))
+    slots = rng.integers(tickets.shape[1], size=len(tickets))
+    while len(rows):
+        candidates = random_numbers(len(rows), rng, pool=pool).astype(tickets.dtype)
+        clash = (tickets[rows] == candidates[:, None]).any(axis=1)
+        ok = rows[~clash]
+        tickets[ok, slots[~clash]] = candidates[~clash]
+        rows, slots = rows[clash], slots[clash]
+    tickets.sort(axis=1)
+    return tickets
+
+
+def deduplicate(tickets):
+    """Keep the first copy of each distinct ticket (compared by bitmask)."""
+    _, first = np.unique(numbers_to_masks(tickets), return_index=True)
+    return tickets[np.sort(first)]
+
+
+def tally_tickets(tickets, weights=None):
+    """Distinct tickets with their total weight (or count), heaviest first."""
+    masks = numbers_to_masks(tickets)
+    unique, first, inverse = np.unique(masks, return_index=True, return_inverse=True)
+    totals = np.bincount(inverse.ravel(), weights=weights, minlength=len(unique))
+    order = np.argsort(-totals, kind="stable")
+    return tickets[first[order]], totals[order]
@@ -0,0 +1,82 @@
+# Per-number counts over any date window, from one prefix-sum table.
+#
+# prefix[i, t, n] is how many of the first i draws were time-slot t draws
+# holding ball n+1 (bonus ball included), so the counts for the draws in
+# rows [lo, hi) are prefix[hi] - prefix[lo]. Rows are in date order, so a
+# date window maps to a row range with two binary searches, and any number
+# of windows is answered with one fancy-indexed subtraction.
+#
+# The table is persisted next to the draw store and extended from just the
+# new rows when draws are appended (each new row adds to the running total).
+
+import numpy as np
+
+from draw_store import load_derived, save_derived
+from incidence import NUMBERS, Incidence
+
+PREFIX_NAME = "prefix"
+TIMES = 2
+
+
+def build_prefix(draws, start=0, prefix=None):
+    """Prefix table for rows start: of a DrawTable, continuing `prefix` (the rows before)."""
+    if prefix is None:
+        prefix = np.zeros((1, TIMES, NUMBERS), dtype=np.int32)
+    new = draws[start:]
+    if not len(new):
+        return prefix
+    incidence = Incidence.from_draws(new)
+    steps = np.zeros((len(new), TIMES, NUMBERS), dtype=np.int32)
+    steps[np.arange(len(new)), incidence.times.astype(np.intp)] = incidence.balls
+    np.cumsum(steps, axis=0, out=steps)
+    steps += prefix[-1]
+    return np.concatenate([prefix, steps])
+
+
+class WindowIndex:
+    """Frequency queries over date windows; days are day numbers (see draw_store.date_to_day)."""
+
+    def __init__(self, dates, prefix):
+        self.dates = np.asarray(dates)
+        self.prefix = prefix
+
+    def rows(self, starts, ends=None):
+        """Row range [lo, hi) of the draws with starts <= day < ends (no end = up to the latest draw)."""
+        lo = np.searchsorted(self.dates, starts, side="left")
+        hi = np.full_like(lo, len(self.dates)) if ends is None else np.searchsorted(self.dates, ends, side="left")
+        return lo, np.maximum(hi, lo)
+
+    def row_counts(self, lo, hi, time=None):
+        """Per-number counts of the draws in rows [lo, hi); arrays of bounds give one row per window."""
+        counts = self.prefix[hi] - self.prefix[lo]
+        counts = counts.sum(axis=-2) if time is None else counts[..., time, :]
+        return counts.astype(np.int64)
+
+    def counts(self, starts, ends=None, time=None):
+        """(49,) counts for one window, or (W, 49) for arrays of starts/ends."""
+        return self.row_counts(*self.rows(starts, ends), time=time)
+
+    def last_days(self, days, today, time=None):
+        """Counts over the last `days` days up to and including day `today` (days may be an array)."""
+        days = np.asarray(days)
+        return self.counts(today - days + 1, today + 1, time)
+
+
+def window_index(draws):
+    """WindowIndex for a DrawTable, loaded from disk and extended with any new draws."""
+    if PREFIX_NAME in draws.cache:
+        return draws.cache[PREFIX_NAME]
+
+    prefix, rows = load_derived(draws, PREFIX_NAME)
+    if prefix is None or prefix.shape[1:] != (TIMES, NUMBERS):
+        prefix, rows = None, 0
+    else:
+        # the table has one more row than the draws it covers
+        prefix = prefix[:rows + 1]
+    if prefix is None or rows < len(draws):
+        prefix = build_prefix(draws, rows, prefix)
+        save_derived(draws, PREFIX_NAME, prefix)
+
+    index = WindowIndex(draws.dates, prefix)
+    draws.cache[PREFIX_NAME] = index
+    return index